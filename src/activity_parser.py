@@ -0,0 +1,280 @@
+"""
+Parseur des activités d'une page (ou d'un fragment) du fil syride.
+
+Chaque activité est parcourue une seule fois : le même parcours relève
+le marqueur photoGps, l'élément type<num>, l'élément site<num> et le
+texte des <ul>. Le dictionnaire produit est celui de get_nav_infos_bs.
+
+Backends disponibles :
+    - "html.parser" : BeautifulSoup, sans dépendance supplémentaire ;
+    - "lxml" : lxml.html ;
+    - "selectolax" : selectolax (Lexbor), si installé.
+"""
+
+# ------------------------ Imports -----------------------
+
+import re
+import traceback
+
+from bs4 import BeautifulSoup, Tag
+
+import flight_fields
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# ------------------------ Constants -----------------------
+
+ACTIVITY_ID = re.compile(r"^activite\d{5,10}$")
+TYPE_ID = re.compile(r"^type\d{5,10}$")
+SITE_ID = re.compile(r"^site\d{5,10}$")
+
+if lxml is not None:
+    # Candidats filtrés ensuite par ACTIVITY_ID
+    LXML_ACTIVITIES = etree.XPath("//*[starts-with(@id, 'activite')]")
+
+# ------------------------ Functions -----------------------
+
+
+def extract_site(text: str) -> str:
+    """
+    Fonction permettant d'extraire le nom du site
+    lorsqu'il est précédé de "à" et suivi de "("
+    """
+    # Trouver l'index du premier "à" dans la chaîne
+    index_de_a = text.find("à")
+
+    # Trouver l'index de la première parenthèse ouvrante "(" après le premier "à"
+    index_premiere_parenthese = text.find("(", index_de_a)
+
+    # Extraire le texte entre le premier "à" et la première parenthèse
+    texte_extrait = text[index_de_a + 1 : index_premiere_parenthese].strip()
+
+    return texte_extrait
+
+
+def has_class(classes: str, name: str) -> bool:
+    return classes is not None and name in classes.split()
+
+
+def build_resultats(
+    id_attr: str,
+    is_syride: bool,
+    type_id: str,
+    type_text: str,
+    site_text: str,
+    liste_data: list,
+    pilote: str,
+):
+    """
+    Construit le dictionnaire d'une activité à partir des éléments
+    relevés par un backend (type_id/type_text/site_text valent None si
+    l'élément est absent).
+
+    returns:
+    -----------
+    * num_activite: str
+        numéro de l'activité ("None" si ce n'est pas un vol).
+    * resultats: dict
+        données de l'activité.
+    """
+    id_activity = id_attr.replace("activite", "") if id_attr else "None"
+
+    if type_id is not None:
+        elements_type = type_text.replace("\n", "").replace("\t", "")
+        num_activite = type_id.replace("type", "")
+    else:
+        print(f"activite{id_activity}: Ceci n'est pas un vol")
+        elements_type = "None"
+        num_activite = "None"
+
+    flight_values = flight_fields.ACTIVITY_REGISTRY.parse(liste_data)
+    if is_syride is True:
+        if site_text is not None:
+            site_name = extract_site(text=site_text)
+        else:
+            site_name = "None"
+    else:
+        site_name = site_text if site_text is not None else "None"
+        # Seuls date, durée et voile sont lus pour une trace non syride
+        for column in flight_fields.NON_SYRIDE_EMPTY:
+            flight_values[column] = None
+
+    resultats = {
+        "pilote": pilote,
+        "id_activite": id_activity,
+        "num_activite": num_activite,
+        "types": elements_type,
+        "site": site_name,
+        "date": flight_values["date"],
+        "heure": flight_values["heure"],
+        "flight_time": flight_values["flight_time"],
+        "voile": flight_values["voile"],
+        "distance": flight_values["distance"],
+        "instrument": flight_values["instrument"],
+        "is_syride": is_syride,
+        flight_fields.ACTIVITY_REGISTRY.raw_column: liste_data,
+    }
+    return num_activite, resultats
+
+
+def scan_bs(activity: Tag) -> dict:
+    """
+    Parcours unique d'une activité BeautifulSoup : arguments
+    de build_resultats (hors pilote).
+    """
+    is_syride = False
+    type_element = None
+    site_element = None
+    liste_data = []
+    for element in activity.descendants:
+        if not isinstance(element, Tag):
+            continue
+        if not is_syride and "photoGps" in element.get("class", ()):
+            is_syride = True
+        element_id = element.get("id")
+        if element_id is not None:
+            if type_element is None and TYPE_ID.match(element_id):
+                type_element = element
+            elif site_element is None and SITE_ID.match(element_id):
+                site_element = element
+        if element.name == "ul":
+            liste_data.append(element.text)
+
+    return {
+        "id_attr": activity.get("id"),
+        "is_syride": is_syride,
+        "type_id": type_element.get("id") if type_element is not None else None,
+        "type_text": type_element.text if type_element is not None else None,
+        "site_text": site_element.text if site_element is not None else None,
+        "liste_data": liste_data,
+    }
+
+
+def iter_activities_bs(page_content: str):
+    soup = BeautifulSoup(page_content, "html.parser")
+    for activity in soup.find_all(id=ACTIVITY_ID):
+        yield scan_bs(activity=activity)
+
+
+def iter_activities_lxml(page_content: str):
+    root = lxml.html.document_fromstring(page_content)
+    for activity in LXML_ACTIVITIES(root):
+        if not ACTIVITY_ID.match(activity.get("id")):
+            continue
+        is_syride = False
+        type_element = None
+        site_element = None
+        liste_data = []
+        for element in activity.iterdescendants(tag=etree.Element):
+            if not is_syride and has_class(element.get("class"), "photoGps"):
+                is_syride = True
+            element_id = element.get("id")
+            if element_id is not None:
+                if type_element is None and TYPE_ID.match(element_id):
+                    type_element = element
+                elif site_element is None and SITE_ID.match(element_id):
+                    site_element = element
+            if element.tag == "ul":
+                liste_data.append(element.text_content())
+
+        yield {
+            "id_attr": activity.get("id"),
+            "is_syride": is_syride,
+            "type_id": type_element.get("id") if type_element is not None else None,
+            "type_text": (
+                type_element.text_content() if type_element is not None else None
+            ),
+            "site_text": (
+                site_element.text_content() if site_element is not None else None
+            ),
+            "liste_data": liste_data,
+        }
+
+
+def iter_activities_selectolax(page_content: str):
+    tree = LexborHTMLParser(page_content)
+    for activity in tree.css("[id^='activite']"):
+        if not ACTIVITY_ID.match(activity.attributes.get("id") or ""):
+            continue
+        is_syride = False
+        type_element = None
+        site_element = None
+        liste_data = []
+        for element in activity.traverse(include_text=False):
+            if element is activity:
+                continue
+            attributes = element.attributes
+            if not is_syride and has_class(attributes.get("class"), "photoGps"):
+                is_syride = True
+            element_id = attributes.get("id")
+            if element_id is not None:
+                if type_element is None and TYPE_ID.match(element_id):
+                    type_element = element
+                elif site_element is None and SITE_ID.match(element_id):
+                    site_element = element
+            if element.tag == "ul":
+                liste_data.append(element.text(deep=True))
+
+        yield {
+            "id_attr": activity.attributes.get("id"),
+            "is_syride": is_syride,
+            "type_id": (
+                type_element.attributes.get("id") if type_element is not None else None
+            ),
+            "type_text": (
+                type_element.text(deep=True) if type_element is not None else None
+            ),
+            "site_text": (
+                site_element.text(deep=True) if site_element is not None else None
+            ),
+            "liste_data": liste_data,
+        }
+
+
+# Backends : contenu HTML -> itérateur des relevés d'activité
+BACKENDS = {
+    "html.parser": iter_activities_bs,
+    "lxml": iter_activities_lxml,
+    "selectolax": iter_activities_selectolax,
+}
+
+
+def available_backends() -> list:
+    backends = ["html.parser"]
+    if lxml is not None:
+        backends.append("lxml")
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+
+def parse_activities(page_content: str, pilote: str, backend: str = "lxml") -> dict:
+    """
+    Parse une page (ou un fragment de page) et retourne les activités
+    trouvées sous la forme {num_activite: dict_activity}. Si le backend
+    demandé n'est pas installé, html.parser est utilisé.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de parsing inconnu : {backend}")
+    if backend not in available_backends():
+        backend = "html.parser"
+    if not page_content or not page_content.strip():
+        return {}
+
+    dict_navs = {}
+    for scan in BACKENDS[backend](page_content):
+        try:
+            num_activite, resultats = build_resultats(pilote=pilote, **scan)
+            dict_navs[f"{num_activite}"] = resultats
+        except Exception:
+            print("", "\n", traceback.format_exc())
+    return dict_navs
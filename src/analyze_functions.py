@@ -1,22 +1,88 @@
-import datetime as dt
 import os
+import re
 import pandas as pd
 import numpy as np
 import json
-from fastkml import kml
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import flight_fields
+import flight_log
+import flight_schema
+import instrumentation
+import normalization
+import trace_index
 
 # from datetime import datetime, timedelta
 
+# Valeurs de remplacement des valeurs manquantes, par colonne
+FILLNA_VALUES = {
+    "00:00:00": ["heure"],
+    0: [
+        "distance",
+        "distance_activite",
+        "distance_cumulee",
+        "vitesse_max",
+        "vitesse_moyenne",
+        "plafond",
+        "gain",
+        "duree_vol",
+        "vario_max",
+        "g_max",
+    ],
+    "None": [
+        "instrument",
+        "site_activite",
+        "adresse_zip",
+        "types",
+        "site",
+    ],
+    "01/01/2000": [
+        "date_activite",
+        "date",
+    ],
+}
+
+# Types des colonnes (assign_data_types)
+STR_FEATURES = [
+    "pilote",
+    "types",
+    "site",
+    "voile",
+    "instrument",
+    "site_activite",
+    "adresse_zip",
+]
+INT_FEATURES = [
+    "num_activite",
+    "distance",
+    "distance_activite",
+    "distance_cumulee",
+    "vitesse_max",
+    "plafond",
+    "gain",
+]
+FLT_FEATURES = [
+    "vitesse_moyenne",
+    "vario_max",
+    "g_max",
+]
+DATE_FEATURES = ["date", "date_activite"]
+HOUR_FEATURES = ["heure"]
+DURATION_FEATURES = ["flight_time", "duree_vol"]
+
+# Plafond minimal d'un vol gardé (m)
+MIN_PLAFOND = 50
+# Voiles des vols en biplan, retirés
+BIPLAN_WINGS = ["biplan celebri"]
+
 
 def log_func(f):
-    def wrapper(df, *args, **kwargs):
-        tic = dt.datetime.now()
-        result = f(df, *args, **kwargs)
-        toc = dt.datetime.now()
-        print(f"{f.__name__} took {toc - tic}, shape={result.shape}")
-        return result
-
-    return wrapper
+    """
+    Étape de la chaîne de nettoyage : durée, lignes et mémoire mesurées
+    si SYRIDE_PROFILE est renseignée (voir instrumentation.py).
+    """
+    return instrumentation.instrument(f)
 
 
 @log_func
@@ -25,19 +91,18 @@ def start_pipeline(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def get_json_files(directory: str):
-    json_files = []
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".json") and file[:-5].isdigit():
-                json_files.append(os.path.join(root, file))
-    return json_files
+    return [
+        path
+        for path, _, _ in trace_index.get_trace_files(
+            directory=directory, extension=".json"
+        ).values()
+    ]
 
 
 def get_kml_files(directory: str) -> dict:
     """
-    Fonction qui itère l'ensemble des dossiers
-    dans le dossier d'un pilote et qui recherhe tous les
-    fichiers .kml
+    Fonction qui recherche tous les fichiers .kml des traces d'un pilote
+    (index des dossiers de traces, voir trace_index.py).
 
     arguments:
         directory: str = chemin du dossier dans lequel
@@ -49,12 +114,12 @@ def get_kml_files(directory: str) -> dict:
             * value = le chemin de la trace
 
     """
-    kml_files = {}
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".kml") and file[:-5].isdigit():
-                kml_files[file[:-4]] = os.path.join(root, file)
-    return kml_files
+    return {
+        trace: path
+        for trace, (path, _, _) in trace_index.get_trace_files(
+            directory=directory, extension=".kml"
+        ).items()
+    }
 
 
 def extract_json_data(json_file):
@@ -63,44 +128,128 @@ def extract_json_data(json_file):
     return data
 
 
-def get_first_coordinates(kml_file_path: str) -> list:
+class TakeoffFound(Exception):
     """
-    Fonction permettant l'ouverture des fichiers kml et de l'extraction
-    des premières coordonnées longitude/latitude.
+    Levée par FirstFixTarget dès le premier point de trace, pour arrêter
+    le parseur au milieu d'un bloc.
+    """
+
+
+class FirstFixTarget:
+    """
+    Cible du parseur XML incrémental : relève le premier point du premier
+    Placemark portant une trace (LineString ou gx:Track), c'est-à-dire le
+    décollage, et à défaut le premier point du premier Placemark.
+    """
+
+    def __init__(self):
+        self.path = []
+        self.buffer = None
+        self.track = None
+        self.fallback = None
+
+    def start(self, tag, attrib):
+        name = tag.rsplit("}", 1)[-1]
+        self.path.append(name)
+        if name in ("coordinates", "coord") and "Placemark" in self.path:
+            self.buffer = []
+
+    def data(self, data):
+        if self.buffer is None:
+            return
+        self.buffer.append(data)
+        # <coordinates> : premier tuple "lon,lat[,alt]" complet dès
+        # qu'un séparateur le suit
+        if self.path[-1] == "coordinates":
+            text = "".join(self.buffer).lstrip()
+            if len(text.split(None, 1)) > 1:
+                self.set_point(text.split(None, 1)[0].split(","))
+
+    def end(self, tag):
+        name = self.path.pop()
+        if self.buffer is not None and name in ("coordinates", "coord"):
+            text = "".join(self.buffer).strip()
+            if text:
+                if name == "coordinates":
+                    self.set_point(text.split(None, 1)[0].split(","))
+                else:
+                    # <gx:coord> : "lon lat alt"
+                    self.set_point(text.split())
+            self.buffer = None
+
+    def close(self):
+        pass
+
+    def set_point(self, values: list) -> None:
+        point = [float(values[0]), float(values[1])]
+        self.buffer = None
+        if "LineString" in self.path or "Track" in self.path:
+            self.track = point
+            raise TakeoffFound
+        if self.fallback is None:
+            self.fallback = point
+
+
+def get_takeoff_coordinates(kml_file_path: str, chunk_size: int = 16 * 1024):
+    """
+    Coordonnées longitude/latitude du décollage (premier point de la trace)
+    d'un fichier kml. Le fichier est lu par blocs et parsé au fil de
+    l'eau : la lecture s'arrête dès que le point est trouvé.
 
     arguments:
-        kml_file_path: str = chemin du dossier d'un fichier kml.
+        kml_file_path: str = chemin du fichier kml.
 
     return:
-        liste des premières coordonnées longitude/latitude de la trace.
-
+        [longitude, latitude] ([0, 0] si le fichier n'a aucun point).
     """
-    # Ouverture du fichier KML et lecture du contenu
+    target = FirstFixTarget()
+    parser = ET.XMLParser(target=target)
     with open(kml_file_path, "rb") as kml_file:
-        kml_document = kml_file.read()
-        k = kml.KML()
-        k.from_string(kml_document)
+        try:
+            while True:
+                chunk = kml_file.read(chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+        except TakeoffFound:
+            pass
+
+    if target.track is not None:
+        return target.track
+    if target.fallback is not None:
+        return target.fallback
+    return [0, 0]
 
-        for feature0 in k.features():
-            for feature in feature0.features():
-                if isinstance(feature, kml.Placemark):
-                    geometry = feature.geometry
-                    if geometry:
-                        coords = list(geometry.coords)
-                    else:
-                        coords = [(0, 0, 0)]
 
-    longitude = coords[0][0]
-    latitude = coords[0][1]
+def create_dataframe_from_json(directory: str) -> pd.DataFrame:
+    json_files = trace_index.get_trace_files(directory=directory, extension=".json")
+    return create_dataframe_from_records(directory=directory, json_files=json_files)
 
-    return [longitude, latitude]
 
+@instrumentation.instrument
+def create_dataframe_from_records(
+    directory: str, json_files: dict, workers: int = 1
+) -> pd.DataFrame:
+    """
+    Fonction qui crée la dataframe des vols d'un pilote à partir de son
+    journal (voir flight_log.py), en une seule lecture. Les vols absents
+    du journal ou modifiés depuis sont lus dans leur fichier json.
 
-def create_dataframe_from_json(directory: str) -> pd.DataFrame:
-    json_files = get_json_files(directory=directory)
-    data_list = [extract_json_data(json_file=file) for file in json_files]
-    df = pd.DataFrame(data_list)
-    return df
+    arguments:
+        directory: str = dossier du pilote.
+        json_files: dict = {numéro de trace: [chemin, taille, mtime_ns]}
+        des fichiers json à lire (voir trace_index.select_files).
+        workers: int = processus de décodage du journal.
+
+    return:
+        df des vols, dans l'ordre de json_files.
+    """
+    records, missing = flight_log.load_records(
+        directory=directory, signatures=json_files, workers=workers
+    )
+    for trace in missing:
+        records[trace] = extract_json_data(json_file=json_files[trace][0])
+    return pd.DataFrame([records[trace] for trace in json_files])
 
 
 def create_dataframe_from_all_kml(directory: str) -> pd.DataFrame:
@@ -113,15 +262,32 @@ def create_dataframe_from_all_kml(directory: str) -> pd.DataFrame:
 
 
     return:
-        df contenant pour chaque trace les longitudes, latitude du premier point.
+        df contenant pour chaque trace les longitudes, latitude du décollage.
 
     """
     dict_kml_files = get_kml_files(directory=directory)
+    return create_dataframe_from_kml_files(dict_kml_files=dict_kml_files)
 
-    dict_first_coordinates = {
-        flight: get_first_coordinates(kml_file_path)
-        for flight, kml_file_path in dict_kml_files.items()
-    }
+
+@instrumentation.instrument
+def create_dataframe_from_kml_files(
+    dict_kml_files: dict, max_workers: int = 8
+) -> pd.DataFrame:
+    """
+    Comme create_dataframe_from_all_kml, pour un dict
+    {numéro de trace: chemin du kml} donné. Les fichiers sont lus
+    dans max_workers threads (get_takeoff_coordinates).
+    """
+    if len(dict_kml_files) == 0:
+        return pd.DataFrame(columns=["num_activite", "longitude", "latitude"])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dict_first_coordinates = dict(
+            zip(
+                dict_kml_files,
+                executor.map(get_takeoff_coordinates, dict_kml_files.values()),
+            )
+        )
 
     df = pd.DataFrame(dict_first_coordinates)
     df = df.transpose()
@@ -131,43 +297,109 @@ def create_dataframe_from_all_kml(directory: str) -> pd.DataFrame:
     return df
 
 
+def cast_values(values: pd.Series, cast) -> pd.Series:
+    """
+    Conversion vectorisée des valeurs extraites, selon le type
+    du champ (voir flight_fields.Field).
+    """
+    if cast is int:
+        return pd.to_numeric(values, errors="coerce").astype("Int64")
+    if cast is flight_fields.to_float:
+        return pd.to_numeric(values.str.replace(",", ".", regex=False), errors="coerce")
+    return values
+
+
+def extract_registry_fields(
+    lines: pd.Series, registry: flight_fields.FieldRegistry
+) -> pd.DataFrame:
+    """
+    Relit en bloc les lignes brutes de tous les vols (une liste de lignes
+    par vol) avec les motifs du registre : une extraction vectorisée par
+    champ sur l'ensemble des lignes. Comme pour FieldRegistry.parse,
+    la dernière valeur lisible d'un champ est gardée et les lignes
+    illisibles sont comptées.
+
+    returns:
+        df typée, une colonne par colonne du registre, même index que lines.
+    """
+    # Une ligne par ligne brute, espaces normalisés
+    exploded = lines.explode()
+    exploded = (
+        exploded[exploded.notna()]
+        .astype(str)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+    # Libellé de chaque ligne, puis extraction de la valeur sur les seules
+    # lignes de chaque champ
+    labels = "|".join(re.escape(field.label) for field in registry.fields.values())
+    line_labels = exploded.str.extract(rf"^[ \t]*({labels})\s*:", expand=False)
+
+    df_fields = pd.DataFrame(index=lines.index)
+    for key, field in registry.fields.items():
+        field_lines = exploded[line_labels == field.label]
+        extracted = field_lines.str.extract(
+            field.label_pattern() + field.value_pattern()
+        )
+        extracted.columns = field.columns
+        nb_failures = int(extracted[field.columns[0]].isna().sum())
+        if nb_failures > 0:
+            print(f"{registry.name}.{key} : {nb_failures} valeur(s) illisible(s)")
+
+        extracted = extracted.groupby(level=0).last()
+        for column in field.columns:
+            values = extracted[column].reindex(lines.index)
+            if column == field.columns[0]:
+                values = cast_values(values, field.cast)
+            df_fields[column] = values
+
+    return df_fields
+
+
 @log_func
-def valeurs_manquantes(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.replace("None", np.nan)
+def reparse_raw_fields(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reconstruit les colonnes lues dans le texte des activités à partir des
+    lignes brutes gardées dans les json (lignes_activite, lignes_detail),
+    sans accès réseau. Les vols sans lignes brutes (anciennes traces)
+    gardent leurs valeurs. Les colonnes de lignes brutes sont retirées.
+    """
+    df = df.reset_index(drop=True)
+    raw_columns = []
+    for registry in (flight_fields.ACTIVITY_REGISTRY, flight_fields.DETAIL_REGISTRY):
+        if registry.raw_column not in df.columns:
+            continue
+        raw_columns.append(registry.raw_column)
+        has_raw = df[registry.raw_column].map(lambda lines: isinstance(lines, list))
+        if not has_raw.any():
+            continue
+
+        df_fields = extract_registry_fields(
+            lines=df.loc[has_raw, registry.raw_column], registry=registry
+        )
+        if registry is flight_fields.ACTIVITY_REGISTRY:
+            non_syride = df.loc[has_raw, "is_syride"] != True
+            df_fields.loc[non_syride, list(flight_fields.NON_SYRIDE_EMPTY)] = None
 
-    col_fillna_00 = [
-        "heure",
-    ]
-    df[col_fillna_00] = df[col_fillna_00].fillna("00:00:00")
+        for column in registry.columns:
+            values = df_fields[column].astype(object)
+            values = values.where(values.notna(), None)
+            if column in df.columns:
+                df[column] = df[column].astype(object)
+                df.loc[has_raw, column] = values
+            else:
+                df[column] = values.reindex(df.index)
 
-    col_fillna_01 = [
-        "distance",
-        "distance_activite",
-        "distance_cumulee",
-        "vitesse_max",
-        "vitesse_moyenne",
-        "plafond",
-        "gain",
-        "duree_vol",
-        "vario_max",
-        "g_max",
-    ]
-    df[col_fillna_01] = df[col_fillna_01].fillna(0)
+    return df.drop(columns=raw_columns)
 
-    col_fillna_02 = [
-        "instrument",
-        "site_activite",
-        "adresse_zip",
-        "types",
-        "site",
-    ]
-    df[col_fillna_02] = df[col_fillna_02].fillna("None")
 
-    col_fillna_03 = [
-        "date_activite",
-        "date",
-    ]
-    df[col_fillna_03] = df[col_fillna_03].fillna("01/01/2000")
+@log_func
+def valeurs_manquantes(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.replace("None", np.nan)
+
+    for value, columns in FILLNA_VALUES.items():
+        df[columns] = df[columns].fillna(value)
 
     return df
 
@@ -180,53 +412,22 @@ def remove_too_low_flights(df: pd.DataFrame) -> pd.DataFrame:
 
     df["plafond"] = df["plafond"].astype(int)
 
-    df = df[df["plafond"] > 50]
+    df = df[df["plafond"] > MIN_PLAFOND]
 
     return df
 
 
 @log_func
 def assign_data_types(df: pd.DataFrame) -> pd.DataFrame:
-    str_features = [
-        "pilote",
-        "types",
-        "site",
-        "voile",
-        "instrument",
-        "site_activite",
-        "adresse_zip",
-    ]
-
-    int_features = [
-        "num_activite",
-        "distance",
-        "distance_activite",
-        "distance_cumulee",
-        "vitesse_max",
-        "plafond",
-        "gain",
-    ]
-
-    flt_features = [
-        "vitesse_moyenne",
-        "vario_max",
-        "g_max",
-    ]
-
-    date_features = ["date", "date_activite"]
-    hour_features = ["heure"]
-
-    duration_features = ["flight_time", "duree_vol"]
-
     df = df.fillna("-1")
-    df[str_features] = df[str_features].astype(str)
-    df[int_features] = df[int_features].astype(int)
-    df[flt_features] = df[flt_features].astype(float)
-    for col in date_features:
+    df[STR_FEATURES] = df[STR_FEATURES].astype(str)
+    df[INT_FEATURES] = df[INT_FEATURES].astype(int)
+    df[FLT_FEATURES] = df[FLT_FEATURES].astype(float)
+    for col in DATE_FEATURES:
         df[col] = pd.to_datetime(df[col], format="%d/%m/%Y")
-    for col in hour_features:
+    for col in HOUR_FEATURES:
         df[col] = pd.to_datetime(df[col], format="%Hh%M", errors="coerce").dt.time
-    for col in duration_features:
+    for col in DURATION_FEATURES:
         df[col] = pd.to_timedelta(df[col])
 
     df["duree_vol_minutes"] = df["flight_time"].dt.total_seconds() / 60
@@ -240,7 +441,7 @@ def remove_biplan_flights(df: pd.DataFrame) -> pd.DataFrame:
     Supression des vols réalisés en biplan
     """
 
-    df = df[~(df["voile"] == "biplan celebri")]
+    df = df[~df["voile"].isin(BIPLAN_WINGS)]
     df = df.reset_index(drop=True)
 
     return df
@@ -271,11 +472,11 @@ def transform_dates(df: pd.DataFrame) -> pd.DataFrame:
 
 @log_func
 def get_season(df: pd.DataFrame) -> pd.DataFrame:
-    df.loc[df["mois"].isin([12, 1, 2]), "saison"] = "hiver"
-    df.loc[df["mois"].isin([3, 4, 5]), "saison"] = "printemps"
-    df.loc[df["mois"].isin([6, 7, 8]), "saison"] = "été"
-    df.loc[df["mois"].isin([9, 10, 11]), "saison"] = "automne"
-    return df
+    """
+    Saison de chaque vol d'après son mois (table d'alias "saison", voir
+    aliases.json).
+    """
+    return normalization.normalize(df, table="saison", source="mois")
 
 
 @log_func
@@ -283,14 +484,30 @@ def replace_values(
     df: pd.DataFrame, dict_values: dict, var_interest: str = "jour_semaine"
 ):
     """
-    Fonction permettant de remplacer des valeurs en fonction d'un dictionnaire.
+    Fonction permettant de remplacer des valeurs en fonction d'un dictionnaire,
+    en un seul passage sur les valeurs distinctes (voir normalization.py).
     """
-    df[var_interest] = df[var_interest].astype(str)
+    aliases = {}
     for key, value in dict_values.items():
-        df.loc[df[var_interest] == key, var_interest] = value
+        aliases.setdefault(value, []).append(str(key))
+    table = normalization.AliasTable(
+        name=var_interest, revision=0, aliases=aliases, transform="str"
+    )
+    df[var_interest] = table.apply(df[var_interest])
     return df
 
 
+@log_func
+def normalize_values(
+    df: pd.DataFrame, table: str, column: str = None, source: str = None
+) -> pd.DataFrame:
+    """
+    Fonction qui uniformise une colonne avec une table d'alias
+    (voir normalization.py et aliases.json).
+    """
+    return normalization.normalize(df, table=table, column=column, source=source)
+
+
 @log_func
 def delete_zero_min_flights(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -303,33 +520,11 @@ def delete_zero_min_flights(df: pd.DataFrame) -> pd.DataFrame:
 @log_func
 def uniformize_data(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Fonction pour uniformiser les données.
+    Fonction pour uniformiser les données : voiles (en minuscules) et
+    sites, d'après les tables d'alias (voir aliases.json).
     """
-    # transform variable "voile"
-    df.loc[:, "voile"] = df["voile"].str.lower()
-    df.loc[df["voile"].isin(["boxer", "boxer j mou", "boxer pascal"]), "voile"] = (
-        "boxer"
-    )
-    df.loc[df["voile"].isin(["boxer gt", "boxer gt 16um"]), "voile"] = "boxer gt"
-    df.loc[df["voile"].isin(["buldog", "bulldog bi 16wl", "bulld"]), "voile"] = "buldog"
-    df.loc[df["voile"].isin(["daytona", "daytona yellow airrace"]), "voile"] = "daytona"
-    df.loc[df["voile"].isin(["démo", "non renseig"]), "voile"] = "inconnue"
-    df.loc[df["voile"].isin(["piper", "pipper"]), "voile"] = "piper"
-    df.loc[df["voile"].isin(["dolpo 3 katia"]), "voile"] = "dolpo 3"
-
-    # Uniformisation site
-    df.loc[df["site"].isin(["Idikel", "Idikl"]), "site"] = "Idikel"
-    df.loc[df["site"].isin(["Fayard", "Fayards"]), "site"] = "Fayards"
-    df.loc[
-        df["site"].isin(
-            ["Magnac Lavalette Paramoteur", "Magnac Lavalette Treuil", "Magnac"]
-        ),
-        "site",
-    ] = "Magnac Lavalette"
-    df.loc[df["site"].isin(["Accous - 500", "Accous-500", "Accous 500"]), "site"] = (
-        "Accous-500"
-    )
-
+    df = normalization.normalize(df, table="voile")
+    df = normalization.normalize(df, table="site")
     return df
 
 
@@ -364,6 +559,21 @@ def get_mean_site_coordinates(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@log_func
+def compact_data_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Types compacts des colonnes (voir flight_schema.py), à appliquer
+    après concaténation des pilotes (catégories communes). Affiche la
+    mémoire par vol avant et après.
+    """
+    df_compact = flight_schema.apply_schema(df)
+    nb_flights = max(len(df), 1)
+    before = df.memory_usage(deep=True).sum() / nb_flights
+    after = df_compact.memory_usage(deep=True).sum() / nb_flights
+    print(f"Mémoire par vol : {before:.0f} octets -> {after:.0f} octets")
+    return df_compact
+
+
 def get_data_by_wing(df: pd.DataFrame, spec_feat: list) -> pd.DataFrame:
     """
     returns :
@@ -4,8 +4,6 @@ de l'analyse des traces syride.
 """
 
 ########## IMPORTS ##########
-import pickle
-
 import dash
 
 # import dash_bootstrap_components as dbc
@@ -30,18 +28,24 @@ from dash_iconify import DashIconify
 import plotly.express as px
 
 import app_functions
+import flight_dataset
 
 ########## APP ##########
 
-# Load pkl file
+# Load data file (Parquet, ou ancien pkl)
 online = params.online
 
 if online == 1:
-    pkl_path = "/home/amoreau/mysite/docs/global_flights_data.pkl"
+    data_path = flight_dataset.find_flight_data(
+        "/home/amoreau/mysite/docs/global_flights_data.parquet"
+    )
+elif params.dataset_path:
+    data_path = flight_dataset.find_flight_data(
+        params.dataset_path, legacy_path=params.pkl_path
+    )
 else:
-    pkl_path = params.pkl_path
-with open(pkl_path, "rb") as pkl_file:
-    df = pickle.load(pkl_file)
+    data_path = params.pkl_path
+df = flight_dataset.read_flight_data(data_path, columns=flight_dataset.APP_COLUMNS)
 
 # Pilotes
 pilot_list = list(df["pilote"].unique())
@@ -64,7 +68,7 @@ sites_list.sort()
 activity_list_tot = ["paramoteur", "parapente", "Toutes"]
 
 # Obtention de la date de mise à jour des données
-date_update = df["date_update"].iloc[0].strftime("%d %m %Y")
+date_update = flight_dataset.read_date_update(data_path).strftime("%d %m %Y")
 month_replace = {
     " 01 ": " janvier ",
     " 02 ": " fevrier ",
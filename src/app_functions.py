@@ -186,7 +186,7 @@ def create_grouped_df(df: pd.DataFrame, group_var: list[str]):
     """
     var_name = group_var[0]
 
-    df_grouped = df.groupby(by=group_var, as_index=False).agg(
+    df_grouped = df.groupby(by=group_var, as_index=False, observed=True).agg(
         nb_vols=(var_name, "count"),
         nb_pilotes=("pilote", "nunique"),
         nb_sites_visites=("site", "nunique"),
@@ -207,6 +207,9 @@ def create_grouped_df(df: pd.DataFrame, group_var: list[str]):
         moyenne_plafond=("plafond", "mean"),
         max_plafond=("plafond", "max"),
     )
+    # Colonnes en catégories (fichier Parquet) : tri sur les valeurs
+    if isinstance(df_grouped[var_name].dtype, pd.CategoricalDtype):
+        df_grouped[var_name] = df_grouped[var_name].astype(str)
     if var_name == "jour_semaine":
         sorter = [
             "lundi",
@@ -288,7 +291,9 @@ def create_all_plots(
 
     df_coord_sites = (
         df_for_group[["site", "longitude", "latitude", "pilote"]]
-        .groupby("site", as_index=False)
+        # Liste des pilotes par site en tableau de valeurs (et non de catégories)
+        .astype({"pilote": "object"})
+        .groupby("site", as_index=False, observed=True)
         .agg(
             nb_vols=("site", "count"),
             latitude=("latitude", "first"),
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark du parseur d'activités (activity_parser.py) sur les pages
+du fil d'un corpus enregistré par record_corpus.py : temps de parsing
+pour 1 000 activités, pour chaque backend installé. Les résultats de
+chaque backend sont comparés à ceux de html.parser.
+
+Usage :
+    python bench_activity_parser.py --corpus <dossier> [--repeat 5]
+        [--backend lxml] [--json <fichier>]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import statistics
+import time
+
+import activity_parser
+
+# ------------------------ Functions -----------------------
+
+
+def load_pages(corpus_dir: str) -> list:
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(corpus_dir, "feed", "*.html"))):
+        with open(filename, encoding="utf-8") as file:
+            pages.append(file.read())
+    return pages
+
+
+def bench_backend(pages: list, backend: str, repeat: int = 5) -> dict:
+    """
+    Parse toutes les pages repeat fois ; temps médian pour 1 000 activités.
+    """
+    durations = []
+    nb_activities = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            nb_activities = 0
+            tic = time.perf_counter()
+            for page_content in pages:
+                nb_activities += len(
+                    activity_parser.parse_activities(
+                        page_content=page_content, pilote="bench", backend=backend
+                    )
+                )
+            durations.append(time.perf_counter() - tic)
+
+    duration = statistics.median(durations)
+    return {
+        "backend": backend,
+        "activities": nb_activities,
+        "duration": duration,
+        "ms_per_1000": 1e6 * duration / nb_activities if nb_activities else 0.0,
+    }
+
+
+def check_backend(pages: list, backend: str) -> bool:
+    """
+    Vrai si le backend produit les mêmes activités que html.parser.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return all(
+            activity_parser.parse_activities(page_content, "bench", backend)
+            == activity_parser.parse_activities(page_content, "bench", "html.parser")
+            for page_content in pages
+        )
+
+
+def print_results(results: list) -> None:
+    print(
+        f"{'backend':>12} {'activités':>10} {'total (s)':>10} "
+        f"{'ms / 1000':>10} {'identique':>10}"
+    )
+    for result in results:
+        print(
+            f"{result['backend']:>12} {result['activities']:>10} "
+            f"{result['duration']:>10.3f} {result['ms_per_1000']:>10.1f} "
+            f"{'oui' if result['identical'] else 'NON':>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark des backends du parseur d'activités."
+    )
+    parser.add_argument("--corpus", required=True, help="Dossier du corpus.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=sorted(activity_parser.BACKENDS),
+        help="Backend à mesurer (tous les backends installés par défaut).",
+    )
+    parser.add_argument("--json", help="Fichier où écrire les résultats.")
+    args = parser.parse_args()
+
+    pages = load_pages(args.corpus)
+    backends = args.backend or activity_parser.available_backends()
+    results = []
+    for backend in backends:
+        if backend not in activity_parser.available_backends():
+            print(f"Backend {backend} non installé, ignoré.")
+            continue
+        result = bench_backend(pages=pages, backend=backend, repeat=args.repeat)
+        result["identical"] = check_backend(pages=pages, backend=backend)
+        results.append(result)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,145 @@
+"""
+Benchmark du nettoyage des vols (create_global_pkl.clean_flight_data) :
+chaîne d'étapes d'analyze_functions contre un seul passage
+(cleaning_plan.py), sur des vols bruts synthétiques (mêmes colonnes que
+create_global_pkl.read_pilot_flights, avec valeurs "None", coordonnées
+manquantes, biplans, vols de durée nulle et plafonds trop bas). Durée,
+vols par seconde et pic mémoire (tracemalloc), puis vérification que
+les deux résultats sont identiques.
+
+Usage :
+    python bench_cleaning.py [--flights 1000000]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import contextlib
+import functools
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import create_global_pkl
+
+# ------------------------ Constants -----------------------
+
+SITES = ["Fayards", "Fayard", "Idikel", "Magnac", "Accous 500", "Paris"]
+WINGS = ["daytona", "Boxer GT", "piper", "biplan celebri", "dolpo 3 katia", "savage"]
+
+# ------------------------ Functions -----------------------
+
+
+def make_raw_flights(nb_flights: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Vols bruts synthétiques, au format de read_pilot_flights.
+    """
+    rng = np.random.default_rng(seed)
+
+    def numbers(low: int, high: int) -> np.ndarray:
+        return rng.integers(low, high, nb_flights).astype(str)
+
+    def pick(values: list) -> np.ndarray:
+        return np.asarray(values, dtype=object)[
+            rng.integers(0, len(values), nb_flights)
+        ]
+
+    num = 1000000 + np.arange(nb_flights)
+    minutes = rng.integers(0, 60, nb_flights)
+    # Un vol sur 50 de durée nulle
+    minutes[rng.random(nb_flights) < 0.02] = 0
+    seconds = np.where(minutes == 0, 0, rng.integers(0, 60, nb_flights))
+    durations = pd.Series(minutes).map("00:{:02d}".format) + pd.Series(seconds).map(
+        ":{:02d}".format
+    )
+    days = rng.integers(1, 29, nb_flights)
+    months = rng.integers(1, 13, nb_flights)
+    dates = pd.Series(days).map("{:02d}/".format) + pd.Series(months).map(
+        "{:02d}/2023".format
+    )
+    hours = pd.Series(rng.integers(6, 21, nb_flights)).map(
+        "{:02d}h".format
+    ) + pd.Series(rng.integers(0, 60, nb_flights)).map("{:02d}".format)
+    sites = pick(SITES)
+    df = pd.DataFrame(
+        {
+            "pilote": pick(["AdrienM", "j2f", "pilote3"]),
+            "id_activite": (num + 5).astype(str),
+            "num_activite": num.astype(str),
+            "types": pick(["Vol site", "Vol moteur"]),
+            "site": sites,
+            "date": dates.to_numpy(),
+            "heure": hours.to_numpy(),
+            "flight_time": durations.to_numpy(),
+            "voile": pick(WINGS),
+            "distance": numbers(0, 80),
+            "instrument": "Evolution",
+            "is_syride": rng.random(nb_flights) > 0.1,
+            "date_activite": "13/05/2023",
+            "site_activite": sites,
+            "distance_activite": numbers(0, 80),
+            "distance_cumulee": numbers(0, 90),
+            "vitesse_max": numbers(20, 80),
+            "vitesse_moyenne": np.round(rng.uniform(10, 40, nb_flights), 1).astype(str),
+            "plafond": numbers(0, 1500),
+            "gain": numbers(0, 900),
+            "duree_vol": durations.to_numpy(),
+            "vario_max": np.round(rng.uniform(0, 5, nb_flights), 1).astype(str),
+            "g_max": np.round(rng.uniform(1, 3, nb_flights), 1).astype(str),
+            "adresse_zip": "https://x/downloadZIP.php?id=1",
+            "longitude": rng.uniform(-1, 1, nb_flights),
+            "latitude": rng.uniform(44, 46, nb_flights),
+        }
+    )
+    df.loc[rng.random(nb_flights) < 0.3, "vitesse_max"] = "None"
+    df.loc[rng.random(nb_flights) < 0.01, "voile"] = "None"
+    df.loc[rng.random(nb_flights) < 0.05, ["longitude", "latitude"]] = np.nan
+    return df
+
+
+def measure(clean, df: pd.DataFrame) -> tuple:
+    """
+    Durée (s), pic mémoire (octets) et résultat d'un nettoyage. Le pic
+    mémoire est mesuré à part, tracemalloc ralentissant le nettoyage.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        tic = time.perf_counter()
+        result = clean(df)
+        duration = time.perf_counter() - tic
+        tracemalloc.start()
+        clean(df)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return duration, peak, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark du nettoyage des vols : chaîne contre un seul passage."
+    )
+    parser.add_argument("--flights", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = make_raw_flights(nb_flights=args.flights, seed=args.seed)
+    print(f"{len(df)} vols bruts")
+    print(
+        f"{'nettoyage':<10} {'durée (s)':>10} {'vols/s':>12} {'pic mémoire (Mo)':>17}"
+    )
+    results = {}
+    for label in ("chain", "fused"):
+        duration, peak, results[label] = measure(
+            functools.partial(
+                create_global_pkl.clean_flight_data, cleaning_pipeline=label
+            ),
+            df,
+        )
+        print(
+            f"{label:<10} {duration:>10.2f} {len(df) / duration:>12.0f} "
+            f"{peak / 1e6:>17.1f}"
+        )
+    pd.testing.assert_frame_equal(results["chain"], results["fused"])
+    print(f"Résultats identiques ({len(results['fused'])} vols gardés)")
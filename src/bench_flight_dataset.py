@@ -0,0 +1,89 @@
+"""
+Benchmark du fichier des vols : ancien pkl contre Parquet
+(flight_dataset.py). Taille des fichiers, puis temps de chargement
+complet, des seules colonnes de l'app et d'un pilote (filtre à la
+lecture). Les vols du pkl peuvent être répétés (--scale) pour mesurer
+sur un fichier plus gros.
+
+Usage :
+    python bench_flight_dataset.py --pkl <fichier pkl> [--scale 10]
+        [--repeat 5]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import os
+import pickle
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+import flight_dataset
+import params_scrap_syride as params
+
+# ------------------------ Functions -----------------------
+
+
+def measure(load, repeat: int) -> tuple:
+    durations = []
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        df = load()
+        durations.append(time.perf_counter() - tic)
+    return statistics.median(durations), df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark du fichier des vols : pkl contre Parquet."
+    )
+    parser.add_argument("--pkl", default=params.pkl_path, help="Fichier pkl.")
+    parser.add_argument(
+        "--scale", type=int, default=1, help="Nombre de copies des vols."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = flight_dataset.read_legacy_pickle(args.pkl)
+    df = pd.concat([df] * args.scale, ignore_index=True)
+    pilot = df["pilote"].value_counts().index[0]
+    filters = [("pilote", "==", pilot)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        pkl_path = os.path.join(directory, flight_dataset.LEGACY_PICKLE_NAME)
+        with open(pkl_path, "wb") as pkl_file:
+            pickle.dump(df, pkl_file)
+        dataset_path = os.path.join(directory, flight_dataset.DATASET_NAME)
+        flight_dataset.write_flight_data(df, dataset_path)
+
+        print(f"{len(df)} vols, {len(df.columns)} colonnes")
+        print(f"{'fichier':<10} {'taille (Mo)':>12}")
+        for label, path in (("pkl", pkl_path), ("parquet", dataset_path)):
+            print(f"{label:<10} {os.path.getsize(path) / 1e6:>12.2f}")
+
+        runs = {
+            "pkl complet": lambda: flight_dataset.read_legacy_pickle(pkl_path),
+            "parquet complet": lambda: flight_dataset.read_flight_data(dataset_path),
+            "pkl colonnes app": lambda: flight_dataset.read_legacy_pickle(
+                pkl_path, columns=flight_dataset.APP_COLUMNS
+            ),
+            "parquet colonnes app": lambda: flight_dataset.read_flight_data(
+                dataset_path, columns=flight_dataset.APP_COLUMNS
+            ),
+            f"pkl pilote {pilot}": lambda: flight_dataset.read_legacy_pickle(
+                pkl_path, filters=filters
+            ),
+            f"parquet pilote {pilot}": lambda: flight_dataset.read_flight_data(
+                dataset_path, filters=filters
+            ),
+        }
+        print(f"\n{'lecture':<32} {'durée (ms)':>11} {'vols':>8} {'mémoire (Mo)':>13}")
+        for label, load in runs.items():
+            duration, result = measure(load, args.repeat)
+            memory = result.memory_usage(deep=True).sum() / 1e6
+            print(
+                f"{label:<32} {1e3 * duration:>11.1f} {len(result):>8} {memory:>13.1f}"
+            )
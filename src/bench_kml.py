@@ -0,0 +1,77 @@
+"""
+Benchmark de l'extraction des coordonnées de décollage des fichiers kml
+(get_takeoff_coordinates, lecture incrémentale), en série puis dans un
+pool de threads, sur tous les dossiers de pilotes indiqués.
+
+Usage :
+    python bench_kml.py --directory <dossier> [--directory <dossier>]
+        [--workers 8] [--repeat 3]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import analyze_functions
+
+# ------------------------ Functions -----------------------
+
+
+def run_serial(function, paths: list) -> list:
+    return [function(path) for path in paths]
+
+
+def run_threads(function, paths: list, workers: int) -> list:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, paths))
+
+
+def measure(run, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        result = run()
+        durations.append(time.perf_counter() - tic)
+    return statistics.median(durations), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark de l'extraction du décollage des kml."
+    )
+    parser.add_argument(
+        "--directory",
+        action="append",
+        required=True,
+        help="Dossier d'un pilote (plusieurs possibles).",
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = []
+    for directory in args.directory:
+        paths.extend(analyze_functions.get_kml_files(directory=directory).values())
+    nb_bytes = sum(os.path.getsize(path) for path in paths)
+    print(f"{len(paths)} fichiers kml, {nb_bytes / 1e6:.1f} Mo")
+
+    runs = {
+        "incrémental (série)": lambda: run_serial(
+            analyze_functions.get_takeoff_coordinates, paths
+        ),
+        f"incrémental ({args.workers} threads)": lambda: run_threads(
+            analyze_functions.get_takeoff_coordinates, paths, args.workers
+        ),
+    }
+    results = {}
+    print(f"{'méthode':<26} {'durée (s)':>10} {'fichiers/s':>11}")
+    for label, run in runs.items():
+        duration, results[label] = measure(run, args.repeat)
+        print(f"{label:<26} {duration:>10.3f} {len(paths) / duration:>11.0f}")
+
+    serial, threads = results.values()
+    assert serial == threads, "résultats différents en série et en threads"
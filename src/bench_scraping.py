@@ -0,0 +1,151 @@
+"""
+Benchmark du scraping hors ligne : get_syride_traces est lancé de bout
+en bout contre standin_server.py, qui rejoue un corpus enregistré par
+record_corpus.py. Les résultats sont comparables d'un changement du
+scraper à l'autre.
+
+Usage :
+    python bench_scraping.py --corpus <dossier> [--latency 0.05]
+        [--error-rate 0.0] [--detail-concurrency 8]
+        [--download-concurrency 4] [--rate 1000] [--repeat 3]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import params_scrap_syride as params
+import python_functions
+import rate_limit
+from standin_server import start_standin_server
+
+# ------------------------ Functions -----------------------
+
+
+def run_once(corpus_dir: str, pilot: str, server, verbose: bool = False) -> dict:
+    """
+    Un run complet dans un dossier vide : toutes les traces du corpus
+    sont nouvelles.
+    """
+    server.reset_stats()
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with open(os.devnull, "w") as devnull:
+            redirect = (
+                contextlib.nullcontext()
+                if verbose
+                else contextlib.redirect_stdout(devnull)
+            )
+            tic = time.perf_counter()
+            with redirect:
+                nb_saved, nb_failed = python_functions.get_syride_traces(
+                    path=tmp_dir + "/",
+                    pilot=pilot,
+                    scroll=-1,
+                    base_url=server.root_url + "/pilotes/",
+                    feed_url=server.root_url + "/feed/{page}.html",
+                    timings=timings,
+                )
+        total = time.perf_counter() - tic
+
+    nb_pages = sum(server.requests[kind] for kind in ("feed", "activity", "iframe"))
+    page_time = timings.get("discovery", 0) + timings.get("detail", 0)
+    return {
+        "total": total,
+        "discovery": timings.get("discovery", 0.0),
+        "detail": timings.get("detail", 0.0),
+        "download": timings.get("download", 0.0),
+        "traces": nb_saved,
+        "failed": nb_failed,
+        "pages": nb_pages,
+        "bytes": server.bytes["zip"],
+        "errors_injected": server.errors,
+        "pages_per_s": nb_pages / page_time if page_time else 0.0,
+        "traces_per_s": nb_saved / total if total else 0.0,
+        "bytes_per_s": (
+            server.bytes["zip"] / timings["download"]
+            if timings.get("download")
+            else 0.0
+        ),
+    }
+
+
+def print_results(results: list) -> None:
+    print(
+        f"{'run':>4} {'total (s)':>10} {'discovery':>10} {'detail':>8} "
+        f"{'download':>9} {'pages/s':>8} {'traces/s':>9} {'Mo/s':>7} "
+        f"{'traces':>7} {'échecs':>7}"
+    )
+    for i, result in enumerate(results):
+        print(
+            f"{i + 1:>4} {result['total']:>10.2f} {result['discovery']:>10.2f} "
+            f"{result['detail']:>8.2f} {result['download']:>9.2f} "
+            f"{result['pages_per_s']:>8.1f} {result['traces_per_s']:>9.1f} "
+            f"{result['bytes_per_s'] / 1e6:>7.2f} {result['traces']:>7} "
+            f"{result['failed']:>7}"
+        )
+    if len(results) > 1:
+        print(
+            f"médiane : total {statistics.median(r['total'] for r in results):.2f}s, "
+            f"{statistics.median(r['traces_per_s'] for r in results):.1f} traces/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark du scraping contre le serveur de rejeu local."
+    )
+    parser.add_argument("--corpus", required=True, help="Dossier du corpus.")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--detail-concurrency", type=int, default=None)
+    parser.add_argument("--download-concurrency", type=int, default=None)
+    parser.add_argument(
+        "--rate", type=float, default=1000, help="Requêtes/s du limiteur."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Fichier où écrire les résultats.")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.corpus, "corpus.json"), encoding="utf-8") as file:
+        pilot = json.load(file)["pilot"]
+
+    # Configuration du scraper pour le rejeu
+    params.discovery_backend = "http"
+    params.detail_backend = "http"
+    params.feed_first_page = 1
+    params.retry_base_delay = 0.05
+    if args.detail_concurrency is not None:
+        params.detail_concurrency = args.detail_concurrency
+    if args.download_concurrency is not None:
+        params.download_concurrency = args.download_concurrency
+    rate_limit.set_default_limiter(
+        rate_limit.TokenBucket(rate=args.rate, capacity=args.rate)
+    )
+
+    server = start_standin_server(
+        corpus_dir=args.corpus,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    try:
+        results = [
+            run_once(args.corpus, pilot, server, verbose=args.verbose)
+            for _ in range(args.repeat)
+        ]
+    finally:
+        server.shutdown()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
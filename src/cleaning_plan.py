@@ -0,0 +1,171 @@
+"""
+Chaîne de nettoyage des vols d'un pilote en un seul passage (mode
+"fused" de create_global_pkl.clean_flight_data).
+
+Même résultat que la chaîne d'étapes d'analyze_functions (start_pipeline,
+valeurs_manquantes, ..., replace_values), mais :
+    - un plan d'opérations par colonne (remplacement de "None", valeur
+      de remplacement, type) construit à partir des constantes de la
+      chaîne, appliqué colonne par colonne et seulement aux colonnes
+      concernées, au lieu de réécrire toute la dataframe
+      (df.copy(), df.replace, df.fillna) ;
+    - chaque colonne typée une seule fois, les durées et heures en ne
+      lisant que leurs valeurs distinctes ;
+    - les filtres (plafond, biplan, vols de durée nulle) réunis : le
+      plafond, seul à filtrer avant la conversion des types, puis un
+      masque combiné pour les deux autres ;
+    - copy-on-write activé (par défaut depuis pandas 3).
+"""
+
+# ------------------------ Imports -----------------------
+
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+import analyze_functions
+
+# ------------------------ Functions -----------------------
+
+
+def build_plan(columns: list) -> dict:
+    """
+    Plan des opérations de chaque colonne présente : {colonne: {"fill":
+    valeur de remplacement des valeurs manquantes (None = "-1" après le
+    filtre du plafond), "cast": type}}.
+    """
+    plan = {column: {"fill": None, "cast": None} for column in columns}
+    for value, fill_columns in analyze_functions.FILLNA_VALUES.items():
+        for column in fill_columns:
+            plan[column]["fill"] = value
+    casts = {
+        "str": analyze_functions.STR_FEATURES,
+        "int": analyze_functions.INT_FEATURES,
+        "float": analyze_functions.FLT_FEATURES,
+        "date": analyze_functions.DATE_FEATURES,
+        "hour": analyze_functions.HOUR_FEATURES,
+        "duration": analyze_functions.DURATION_FEATURES,
+    }
+    for cast, cast_columns in casts.items():
+        for column in cast_columns:
+            plan[column]["cast"] = cast
+    return plan
+
+
+def fill_missing(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """
+    valeurs_manquantes, colonne par colonne : seules les colonnes qui
+    contiennent "None" ou des valeurs manquantes sont réécrites.
+    """
+    for column, operations in plan.items():
+        values = df[column]
+        changed = False
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            if (values == "None").any():
+                values = values.replace("None", np.nan)
+                changed = True
+        if operations["fill"] is not None and values.hasnans:
+            values = values.fillna(operations["fill"])
+            changed = True
+        if changed:
+            df[column] = values
+    return df
+
+
+def parse_distinct(values: pd.Series, parse) -> pd.Series:
+    """
+    Applique parse aux seules valeurs distinctes de values (durées et
+    heures se répètent beaucoup d'un vol à l'autre) puis reconstruit la
+    colonne à partir des codes.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques))
+    return pd.Series(parsed.to_numpy()[codes], index=values.index, name=values.name)
+
+
+def cast_column(values: pd.Series, cast: str) -> pd.Series:
+    if cast == "str":
+        return values.astype(str)
+    if cast == "int":
+        return values.astype(int)
+    if cast == "float":
+        return values.astype(float)
+    if cast == "date":
+        return pd.to_datetime(values, format="%d/%m/%Y")
+    if cast == "hour":
+        return parse_distinct(
+            values,
+            lambda uniques: pd.to_datetime(
+                uniques, format="%Hh%M", errors="coerce"
+            ).dt.time,
+        )
+    if cast == "duration":
+        return parse_distinct(values, pd.to_timedelta)
+    return values
+
+
+def assign_types(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """
+    assign_data_types : valeurs encore manquantes à "-1" puis conversion,
+    une fois par colonne.
+    """
+    for column, operations in plan.items():
+        # Plafond déjà converti pour son filtre
+        if column == "plafond":
+            continue
+        values = df[column]
+        changed = False
+        if values.hasnans:
+            values = values.fillna("-1")
+            changed = True
+        if operations["cast"] is not None:
+            values = cast_column(values, operations["cast"])
+            changed = True
+        if changed:
+            df[column] = values
+    df["duree_vol_minutes"] = df["flight_time"].dt.total_seconds() / 60
+    return df
+
+
+def run_plan(df: pd.DataFrame) -> pd.DataFrame:
+    df = analyze_functions.reparse_raw_fields.__wrapped__(df)
+    plan = build_plan(columns=list(df.columns))
+    df = fill_missing(df, plan)
+
+    # Filtre du plafond, avant la conversion des autres colonnes (comme
+    # remove_too_low_flights)
+    df["plafond"] = df["plafond"].astype(int)
+    df = df[df["plafond"] > analyze_functions.MIN_PLAFOND]
+    df = assign_types(df, plan)
+
+    # Biplans et vols de durée nulle en un masque ; index des vols gardés
+    # comme après le reset_index de remove_biplan_flights
+    not_biplan = ~df["voile"].isin(analyze_functions.BIPLAN_WINGS).to_numpy()
+    not_zero = ~((df["duree_vol_minutes"] == 0) & (df["is_syride"] == True)).to_numpy()
+    keep = not_biplan & not_zero
+    positions = np.cumsum(not_biplan) - 1
+    df = df[keep]
+    df.index = pd.Index(positions[keep])
+
+    df = analyze_functions.uniformize_data.__wrapped__(df)
+    df = analyze_functions.flight_type.__wrapped__(df)
+    df = analyze_functions.transform_dates.__wrapped__(df)
+    df = analyze_functions.get_season.__wrapped__(df)
+    df = analyze_functions.normalize_values.__wrapped__(df, table="jour_semaine")
+    df = analyze_functions.normalize_values.__wrapped__(df, table="mois")
+    return df
+
+
+@analyze_functions.log_func
+def fused_clean_flight_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Nettoyage des vols d'un pilote en un seul passage, même résultat que
+    la chaîne d'étapes (voir create_global_pkl.clean_flight_data).
+    """
+    if int(pd.__version__.split(".")[0]) < 3:
+        copy_on_write = pd.option_context("mode.copy_on_write", True)
+    else:
+        copy_on_write = contextlib.nullcontext()
+    with copy_on_write:
+        return run_plan(df)
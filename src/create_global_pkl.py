@@ -1,116 +1,449 @@
 """
-Script used to create a uniformed pkl grouping all flights
+Script used to create a uniformed Parquet file (formerly a pkl) grouping all flights
 from all pilots indicated in the param file.
 """
 
 ###########  IMPORTS  ################
 
+import argparse
+import contextlib
+import io
+import json
+import os
 import pickle
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import datetime
 
 import analyze_functions
+import cleaning_plan
+import flight_dataset
+import instrumentation
+import normalization
 import params_scrap_syride as params
+import trace_index
 
 
-################  SCRIPT  ################
+###########  CONSTANTS  ################
 
+# Ancien format, lu si le fichier Parquet n'existe pas encore
+PICKLE_NAME = flight_dataset.LEGACY_PICKLE_NAME
+# Fichiers déjà intégrés au fichier des vols (voir update_gobal_flight_data)
+BUILD_MANIFEST_NAME = "global_flights_manifest.json"
+BUILD_MANIFEST_VERSION = 1
 
-def create_gobal_flight_data(common_filename: str, dict_filenames: str) -> None:
-    df_names_raw = []
 
-    # Import d'une df par pilote
-    for name, foldername in dict_filenames.items():
-        full_filename = f"{common_filename}{foldername}/"
-        print(f"Collecting data for {name}...")
-        df_data = analyze_functions.create_dataframe_from_json(directory=full_filename)
-        print(f"Data for {name} collected.")
-        print(f"Collecting site coordinates for {name}...")
-        df_long_lat = analyze_functions.create_dataframe_from_all_kml(
-            directory=full_filename
+###########  FUNCTIONS  ################
+
+
+@instrumentation.instrument
+def clean_flight_data(df: pd.DataFrame, cleaning_pipeline: str = None) -> pd.DataFrame:
+    """
+    Chaîne de nettoyage des vols d'un pilote, sans le calcul des
+    coordonnées moyennes par site (get_mean_site_coordinates), fait une
+    seule fois sur l'ensemble des pilotes. En mode "fused"
+    (cleaning_pipeline, params.cleaning_pipeline par défaut), les étapes
+    sont faites en un seul passage (voir cleaning_plan.py), même résultat.
+    """
+    if cleaning_pipeline is None:
+        cleaning_pipeline = params.cleaning_pipeline
+    if cleaning_pipeline == "fused":
+        return cleaning_plan.fused_clean_flight_data(df)
+    return (
+        df.pipe(analyze_functions.start_pipeline)
+        .pipe(analyze_functions.reparse_raw_fields)
+        .pipe(analyze_functions.valeurs_manquantes)
+        .pipe(analyze_functions.remove_too_low_flights)
+        .pipe(analyze_functions.assign_data_types)
+        .pipe(analyze_functions.remove_biplan_flights)
+        .pipe(analyze_functions.uniformize_data)
+        .pipe(analyze_functions.flight_type)
+        .pipe(analyze_functions.transform_dates)
+        .pipe(analyze_functions.get_season)
+        .pipe(analyze_functions.delete_zero_min_flights)
+        .pipe(analyze_functions.normalize_values, table="jour_semaine")
+        .pipe(analyze_functions.normalize_values, table="mois")
+    )
+
+
+@instrumentation.instrument
+def scan_pilot_files(directory: str, refresh: bool = False) -> dict:
+    """
+    Fichiers json et kml des traces d'un pilote, avec leur signature
+    (index des dossiers de traces, voir trace_index.py).
+
+    return:
+        {numéro de trace: {"json"/"kml": [chemin, taille, mtime_ns]}}
+    """
+    folders = trace_index.load_trace_index(directory=directory, refresh=refresh)
+    traces = {}
+    for kind in ("json", "kml"):
+        files = trace_index.select_files(
+            directory=directory, folders=folders, extension=f".{kind}"
         )
-        print(f"Site coordinates for {name} collected.", "\n")
-        df = pd.merge(df_data, df_long_lat, on="num_activite", how="left")
-        globals()[f"df_{name}_raw"] = df.copy()
-        df_names_raw.append(f"df_{name}_raw")
+        for trace, signature in files.items():
+            traces.setdefault(trace, {})[kind] = signature
+    return traces
 
-    df_names = []
-    list_dfs = []
 
-    jours_replace = {
-        "Monday": "lundi",
-        "Tuesday": "mardi",
-        "Wednesday": "mercredi",
-        "Thursday": "jeudi",
-        "Friday": "vendredi",
-        "Saturday": "samedi",
-        "Sunday": "dimanche",
-    }
+@instrumentation.instrument
+def read_pilot_flights(directory: str, traces: dict) -> pd.DataFrame:
+    """
+    Vols (journal du pilote ou json) et coordonnées de décollage (kml)
+    des traces données (voir scan_pilot_files), fusionnés.
+    """
+    df_data = analyze_functions.create_dataframe_from_records(
+        directory=directory,
+        json_files={
+            trace: files["json"] for trace, files in traces.items() if "json" in files
+        },
+    )
+    df_long_lat = analyze_functions.create_dataframe_from_kml_files(
+        dict_kml_files={
+            trace: files["kml"][0] for trace, files in traces.items() if "kml" in files
+        }
+    )
+    if len(df_data) == 0:
+        return df_data
+    return pd.merge(df_data, df_long_lat, on="num_activite", how="left")
 
-    mois_replace = {
-        "1": "janvier",
-        "2": "fevrier",
-        "3": "mars",
-        "4": "avril",
-        "5": "mai",
-        "6": "juin",
-        "7": "juillet",
-        "8": "aout",
-        "9": "septembre",
-        "10": "octobre",
-        "11": "novembre",
-        "12": "decembre",
+
+def empty_report(name: str) -> dict:
+    return {
+        "name": name,
+        "traces": None,
+        "obsolete": [],
+        "df": None,
+        "durations": {},
+        "error": None,
+        "output": "",
+        "profile": [],
     }
 
-    # Modification des dfs
-    for df_name in df_names_raw:
-        print("")
-        print(df_name)
-        name_df = str(df_name[:-4])
-        globals()[f"{name_df}"] = (
-            globals()[f"{df_name}"]
-            .pipe(analyze_functions.start_pipeline)
-            .pipe(analyze_functions.valeurs_manquantes)
-            .pipe(analyze_functions.remove_too_low_flights)
-            .pipe(analyze_functions.assign_data_types)
-            .pipe(analyze_functions.remove_biplan_flights)
-            .pipe(analyze_functions.uniformize_data)
-            .pipe(analyze_functions.flight_type)
-            .pipe(analyze_functions.transform_dates)
-            .pipe(analyze_functions.get_season)
-            .pipe(analyze_functions.delete_zero_min_flights)
-            .pipe(analyze_functions.replace_values, dict_values=jours_replace)
-            .pipe(
-                analyze_functions.replace_values,
-                dict_values=mois_replace,
-                var_interest="mois",
-            )
-            .pipe(analyze_functions.get_mean_site_coordinates)
+
+def ingest_pilot(
+    name: str, directory: str, previous: dict = None, capture_output: bool = False
+) -> dict:
+    """
+    Lecture, fusion et nettoyage des vols d'un pilote. Les pilotes sont
+    indépendants jusqu'à la concaténation finale : la fonction peut
+    tourner dans un processus séparé.
+
+    arguments:
+        previous: dict = traces du pilote dans le manifeste du dernier
+        build ; seules les traces nouvelles ou modifiées sont lues.
+        None = toutes les traces.
+
+    return:
+        rapport du pilote : name, traces (signatures), obsolete (numéros
+        d'activité à retirer du fichier des vols), df, durations (s),
+        error, output, profile (appels mesurés, voir instrumentation.py).
+    """
+    report = empty_report(name=name)
+    buffer = io.StringIO()
+    redirect = (
+        contextlib.redirect_stdout(buffer)
+        if capture_output
+        else contextlib.nullcontext()
+    )
+    with redirect:
+        try:
+            tic = time.perf_counter()
+            # Build complet : index des traces relu entièrement
+            traces = scan_pilot_files(directory=directory, refresh=previous is None)
+            if previous is None:
+                changed = traces
+                removed = []
+            else:
+                changed = {
+                    trace: files
+                    for trace, files in traces.items()
+                    if files != previous.get(trace)
+                }
+                removed = [trace for trace in previous if trace not in traces]
+            report["traces"] = traces
+            report["obsolete"] = [int(trace) for trace in list(changed) + removed]
+            report["durations"]["scan"] = time.perf_counter() - tic
+
+            tic = time.perf_counter()
+            df = read_pilot_flights(directory=directory, traces=changed)
+            report["durations"]["lecture"] = time.perf_counter() - tic
+
+            tic = time.perf_counter()
+            if len(df) > 0:
+                normalization.reset_unmapped()
+                df = clean_flight_data(df)
+                normalization.print_unmapped()
+            report["durations"]["nettoyage"] = time.perf_counter() - tic
+            report["df"] = df
+        except Exception:
+            report["error"] = traceback.format_exc()
+            print(report["error"])
+    report["output"] = buffer.getvalue()
+    report["profile"] = instrumentation.drain()
+    return report
+
+
+def ingest_pilots(
+    common_filename: str, dict_filenames: dict, manifest: dict = None, jobs: int = 1
+) -> list:
+    """
+    Lance ingest_pilot pour chaque pilote, dans jobs processus si jobs > 1.
+    """
+    tasks = [
+        (
+            name,
+            f"{common_filename}{foldername}/",
+            None if manifest is None else manifest["pilots"].get(foldername, {}),
         )
+        for name, foldername in dict_filenames.items()
+    ]
+    if jobs <= 1:
+        reports = [ingest_pilot(*task) for task in tasks]
+        for report in reports:
+            instrumentation.add_records(report["profile"])
+        return reports
 
-        globals()[f"{name_df}_paramot"] = globals()[f"{name_df}"][
-            globals()[f"{name_df}"]["type_vol"] == "paramoteur"
+    reports = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(ingest_pilot, *task, capture_output=True) for task in tasks
         ]
+        for task, future in zip(tasks, futures):
+            try:
+                report = future.result()
+            except Exception as excep:
+                # Processus worker tombé : on isole l'échec sur ce pilote
+                report = empty_report(name=task[0])
+                report["error"] = repr(excep)
+            print(report["output"], end="")
+            instrumentation.add_records(report["profile"])
+            reports.append(report)
+    return reports
+
+
+def print_ingestion_report(reports: list) -> None:
+    print("Bilan de l'intégration :")
+    print(
+        f"{'pilote':<12} {'traces':>7} {'à lire':>7} {'vols':>6} {'scan (s)':>9} "
+        f"{'lecture (s)':>12} {'nettoyage (s)':>14}  erreur"
+    )
+    for report in reports:
+        durations = report["durations"]
+        error = report["error"].strip().splitlines()[-1] if report["error"] else ""
+        nb_traces = len(report["traces"]) if report["traces"] is not None else 0
+        nb_flights = len(report["df"]) if report["df"] is not None else 0
+        print(
+            f"{report['name']:<12} {nb_traces:>7} {len(report['obsolete']):>7} "
+            f"{nb_flights:>6} {durations.get('scan', 0.0):>9.2f} "
+            f"{durations.get('lecture', 0.0):>12.2f} "
+            f"{durations.get('nettoyage', 0.0):>14.2f}  {error}"
+        )
+
+
+def load_build_manifest(common_filename: str) -> dict:
+    """
+    Manifeste du dernier build ; None s'il est absent ou d'une autre version.
+    """
+    manifest_path = common_filename + BUILD_MANIFEST_NAME
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("version") != BUILD_MANIFEST_VERSION:
+        return None
+    return manifest
+
 
-        df_names.append(f"{name_df}")
-        list_dfs.append(globals()[f"{name_df}"])
+def save_build_manifest(common_filename: str, pilots: dict) -> None:
+    manifest_path = common_filename + BUILD_MANIFEST_NAME
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as manifest_file:
+        json.dump({"version": BUILD_MANIFEST_VERSION, "pilots": pilots}, manifest_file)
+    os.replace(manifest_path + ".tmp", manifest_path)
 
+
+@instrumentation.instrument
+def save_global_flight_data(common_filename: str, df_tot: pd.DataFrame) -> None:
+    date_update = datetime.datetime.today()
+
+    # Sauvegarde au format Parquet (voir flight_dataset.py), date de mise
+    # à jour en métadonnée
+    flight_dataset.write_flight_data(
+        df=df_tot,
+        path=common_filename + flight_dataset.DATASET_NAME,
+        date_update=date_update,
+    )
+    print(f"\n{flight_dataset.DATASET_NAME} sauvegardé !\n")
+
+    # Ancien pkl, pour les lecteurs pas encore passés au Parquet (date de
+    # mise à jour en colonne)
+    if params.write_legacy_pkl == 1:
+        full_pickle_name = common_filename + PICKLE_NAME
+        with open(full_pickle_name + ".tmp", "wb") as pickle_file:
+            pickle.dump(df_tot.assign(date_update=date_update), pickle_file)
+        os.replace(full_pickle_name + ".tmp", full_pickle_name)
+        print(f"{PICKLE_NAME} sauvegardé !\n")
+
+
+@instrumentation.instrument
+def load_global_flight_data(common_filename: str) -> pd.DataFrame:
+    """
+    Vols du dernier build : fichier Parquet, ou ancien pkl s'il n'y a pas
+    encore de fichier Parquet. None si aucun n'est utilisable (absent ou
+    schéma d'une autre version).
+    """
+    for name in (flight_dataset.DATASET_NAME, PICKLE_NAME):
+        path = common_filename + name
+        if os.path.exists(path):
+            try:
+                return flight_dataset.read_flight_data(path)
+            except ValueError as excep:
+                print(excep)
+                return None
+    return None
+
+
+def create_gobal_flight_data(
+    common_filename: str, dict_filenames: str, jobs: int = 1
+) -> None:
+    """
+    Build complet du fichier des vols. Les pilotes sont lus et nettoyés
+    en parallèle si jobs > 1 ; les coordonnées moyennes par site sont
+    calculées une fois, après concaténation. Un pilote en erreur est
+    absent du fichier des vols et du manifeste (il sera relu au prochain
+    build). Sans aucun vol (pilotes tous en erreur ou sans trace), rien
+    n'est écrit.
+    """
+    reports = ingest_pilots(
+        common_filename=common_filename, dict_filenames=dict_filenames, jobs=jobs
+    )
+    print_ingestion_report(reports=reports)
+
+    list_dfs = [
+        report["df"]
+        for report in reports
+        if report["error"] is None and len(report["df"]) > 0
+    ]
+    if len(list_dfs) == 0:
+        print("Aucun vol intégré : fichier des vols et manifeste non écrits.")
+        return
     df_tot = pd.concat(list_dfs)
+    df_tot = analyze_functions.get_mean_site_coordinates(df_tot)
+    df_tot = analyze_functions.compact_data_types(df_tot)
+
+    save_global_flight_data(common_filename=common_filename, df_tot=df_tot)
+    save_build_manifest(
+        common_filename=common_filename,
+        pilots={
+            foldername: report["traces"]
+            for foldername, report in zip(dict_filenames.values(), reports)
+            if report["error"] is None
+        },
+    )
+
 
-    df_tot["date_update"] = datetime.datetime.today()
+def update_gobal_flight_data(
+    common_filename: str, dict_filenames: str, jobs: int = 1
+) -> bool:
+    """
+    Mise à jour incrémentale du fichier des vols : seules les traces
+    nouvelles ou modifiées depuis le dernier build (taille ou date de
+    modification du json ou du kml différente de celle du manifeste)
+    passent dans la chaîne de nettoyage, et les traces supprimées sont
+    retirées. Un pilote en erreur garde ses vols et son manifeste
+    précédents.
 
-    # Sauvegarde du pkl
-    pickle_name = "global_flights_data.pkl"
-    full_pickle_name = common_filename + pickle_name
-    with open(full_pickle_name, "wb") as pickle_file:
-        pickle.dump(df_tot, pickle_file)
-    print(f"\n{pickle_name} sauvegardé !\n")
+    return:
+        False si aucun build précédent n'est utilisable : un build complet
+        (create_gobal_flight_data) est alors nécessaire.
+    """
+    manifest = load_build_manifest(common_filename=common_filename)
+    if manifest is None:
+        return False
+    # Build précédent encore au format pkl : le fichier Parquet est écrit
+    # même sans trace nouvelle
+    is_legacy = not os.path.exists(common_filename + flight_dataset.DATASET_NAME)
+    df_tot = load_global_flight_data(common_filename=common_filename)
+    if df_tot is None:
+        return False
+
+    reports = ingest_pilots(
+        common_filename=common_filename,
+        dict_filenames=dict_filenames,
+        manifest=manifest,
+        jobs=jobs,
+    )
+    print_ingestion_report(reports=reports)
+
+    pilots = {}
+    obsolete = set()
+    list_dfs = []
+    for foldername, report in zip(dict_filenames.values(), reports):
+        if report["error"] is not None:
+            if foldername in manifest["pilots"]:
+                pilots[foldername] = manifest["pilots"][foldername]
+            continue
+        pilots[foldername] = report["traces"]
+        obsolete.update(report["obsolete"])
+        if len(report["df"]) > 0:
+            list_dfs.append(report["df"])
+
+    if len(obsolete) > 0 or is_legacy:
+        is_obsolete = df_tot["num_activite"].isin(obsolete)
+        df_tot = pd.concat(
+            [df_tot[~is_obsolete]] + list_dfs,
+            ignore_index=True,
+        )
+        df_tot = analyze_functions.get_mean_site_coordinates(df_tot)
+        df_tot = analyze_functions.compact_data_types(df_tot)
+        save_global_flight_data(common_filename=common_filename, df_tot=df_tot)
+    else:
+        print("Aucune trace nouvelle ou modifiée : fichier des vols inchangé.")
+
+    save_build_manifest(common_filename=common_filename, pilots=pilots)
+    return True
+
+
+def build_global_flight_data(
+    common_filename: str, dict_filenames: str, full: bool = False, jobs: int = 1
+) -> None:
+    """
+    Mise à jour incrémentale du fichier des vols, ou build complet si
+    full ou si aucun build précédent n'est utilisable.
+    """
+    if full or not update_gobal_flight_data(
+        common_filename=common_filename, dict_filenames=dict_filenames, jobs=jobs
+    ):
+        create_gobal_flight_data(
+            common_filename=common_filename, dict_filenames=dict_filenames, jobs=jobs
+        )
 
 
 if __name__ == "__main__":
-    common_filename = params.main_path
-    dict_filenames = params.dict_pilotes
+    parser = argparse.ArgumentParser(
+        description="Création du fichier Parquet regroupant les vols de tous "
+        "les pilotes."
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Reconstruire tout le fichier des vols au lieu de n'intégrer que "
+        "les traces nouvelles ou modifiées.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Nombre de pilotes traités en parallèle (1 processus par job), défaut=1.",
+    )
+    args = parser.parse_args()
 
-    create_gobal_flight_data(
-        common_filename=common_filename, dict_filenames=dict_filenames
+    build_global_flight_data(
+        common_filename=params.main_path,
+        dict_filenames=params.dict_pilotes,
+        full=args.full,
+        jobs=args.jobs,
     )
+    instrumentation.save_report()
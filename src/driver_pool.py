@@ -0,0 +1,272 @@
+"""
+Pool de sessions Chrome headless partagé par les fonctions
+de scraping (get_all_navs, get_zip_adresses).
+
+Les navigateurs sont configurés une seule fois (headless, images,
+polices et CSS bloqués, chemin du chromedriver paramétrable) puis
+réutilisés d'un pilote à l'autre. Chaque session est vérifiée avant
+d'être rendue et recyclée après un nombre d'utilisations donné.
+"""
+
+# ------------------------ Imports -----------------------
+
+import atexit
+import contextlib
+import queue
+import threading
+import time
+import traceback
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+import params_scrap_syride as params
+
+# Ressources bloquées quand block_resources=True
+BLOCKED_URLS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.css",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.eot",
+]
+
+# ------------------------ Classes -----------------------
+
+
+class DriverPool:
+    """
+    Pool de webdriver.Chrome réutilisables.
+
+    args:
+    -----------
+    * webdriver_path: str
+        chemin du chromedriver (None = résolution automatique par selenium).
+    * size: int
+        nombre maximal de navigateurs ouverts simultanément.
+    * headless: bool
+        lancer Chrome sans interface graphique.
+    * block_resources: bool
+        bloquer images, polices et feuilles de style.
+    * max_uses: int
+        nombre d'utilisations avant recyclage d'une session.
+    """
+
+    def __init__(
+        self,
+        webdriver_path: str = None,
+        size: int = 1,
+        headless: bool = True,
+        block_resources: bool = True,
+        max_uses: int = 50,
+    ):
+        self.webdriver_path = webdriver_path
+        self.size = size
+        self.headless = headless
+        self.block_resources = block_resources
+        self.max_uses = max_uses
+
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._recycled = 0
+        self._acquire_times = []
+
+    def _build_options(self) -> Options:
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument("--headless")
+        if self.block_resources:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option(
+                "prefs",
+                {
+                    "profile.managed_default_content_settings.images": 2,
+                    "profile.managed_default_content_settings.stylesheets": 2,
+                    "profile.managed_default_content_settings.fonts": 2,
+                },
+            )
+        return chrome_options
+
+    def _create_driver(self) -> webdriver.Chrome:
+        if self.webdriver_path:
+            chrome_service = Service(self.webdriver_path)
+        else:
+            chrome_service = Service()
+        driver = webdriver.Chrome(service=chrome_service, options=self._build_options())
+        if self.block_resources:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _quit_driver(self, driver: webdriver.Chrome) -> None:
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, driver: webdriver.Chrome) -> bool:
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def _reset(self, driver: webdriver.Chrome) -> None:
+        # Remise à zéro de l'état laissé par l'utilisateur précédent
+        driver.switch_to.default_content()
+        driver.implicitly_wait(0)
+        driver.get("about:blank")
+
+    def acquire(self, timeout: float = None) -> webdriver.Chrome:
+        """
+        Fournit une session en bon état : une session libre si elle
+        passe le contrôle de santé, sinon une nouvelle session.
+        """
+        tic = time.perf_counter()
+        driver = None
+        while driver is None:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        driver = self._create_driver()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                    break
+                driver = self._idle.get(timeout=timeout)
+
+            if not self._is_healthy(driver):
+                print("Session navigateur défaillante, recyclage.")
+                self._discard(driver)
+                driver = None
+
+        toc = time.perf_counter()
+        self._acquire_times.append(toc - tic)
+        print(f"Session navigateur obtenue en {toc - tic:.2f}s")
+        return driver
+
+    def _discard(self, driver: webdriver.Chrome) -> None:
+        self._quit_driver(driver)
+        with self._lock:
+            self._created -= 1
+            self._recycled += 1
+
+    def release(self, driver: webdriver.Chrome, broken: bool = False) -> None:
+        """
+        Rend une session au pool. Elle est recyclée si elle est
+        marquée comme cassée, si elle a atteint max_uses ou si sa remise
+        à zéro échoue.
+        """
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        if broken or self._uses[id(driver)] >= self.max_uses:
+            self._discard(driver)
+            return
+        try:
+            self._reset(driver)
+        except WebDriverException:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    @contextlib.contextmanager
+    def session(self, timeout: float = None):
+        """
+        Context manager : with pool.session() as driver: ...
+        """
+        driver = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def stats(self) -> dict:
+        """
+        Statistiques du pool : sessions ouvertes, recyclées et
+        temps d'obtention d'une session (s).
+        """
+        times = self._acquire_times
+        return {
+            "created": self._created,
+            "recycled": self._recycled,
+            "acquisitions": len(times),
+            "acquire_mean": sum(times) / len(times) if times else 0.0,
+            "acquire_max": max(times) if times else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        Ferme toutes les sessions libres.
+        """
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit_driver(driver)
+            with self._lock:
+                self._created -= 1
+
+
+# ------------------------ Functions -----------------------
+
+_default_pool = None
+
+
+def get_default_pool() -> DriverPool:
+    """
+    Pool du processus courant, créé à la première demande à partir
+    du fichier de paramètres. En mode --jobs, chaque processus
+    dispose ainsi de son propre navigateur.
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = create_pool()
+        atexit.register(close_default_pool)
+    return _default_pool
+
+
+def create_pool() -> DriverPool:
+    """
+    Nouveau pool configuré depuis le fichier de paramètres (le
+    navigateur n'est lancé qu'à la première session demandée).
+    """
+    return DriverPool(
+        webdriver_path=params.webdriver_path,
+        headless=params.browser_headless,
+        block_resources=params.browser_block_resources,
+        max_uses=params.browser_max_uses,
+    )
+
+
+def close_default_pool() -> None:
+    global _default_pool
+    if _default_pool is not None:
+        try:
+            _default_pool.close()
+        except Exception:
+            print("", "\n", traceback.format_exc())
+        _default_pool = None
@@ -0,0 +1,240 @@
+"""
+Fichier des vols de tous les pilotes (global_flights_data.parquet).
+
+Format colonnaire Parquet (pyarrow) : la version du schéma et la date
+de mise à jour sont écrites dans les métadonnées du fichier, les
+colonnes ont les types compacts de flight_schema.py (catégories pour le
+texte répétitif, encodées en dictionnaire Parquet), et les lecteurs
+peuvent ne lire que certaines colonnes (columns) et filtrer les lignes à
+la lecture (filters, au format pyarrow : [("pilote", "==", "AdrienM"),
+("annee", ">=", 2023)]).
+
+L'ancien pkl (global_flights_data.pkl) et les fichiers Parquet de la
+version 1 (date de mise à jour en colonne, types d'origine) restent
+lisibles par read_flight_data, qui leur applique le schéma courant ; le
+pkl peut être converti (convert_pickle). Tant qu'un déploiement n'a que
+l'ancien pkl, find_flight_data le désigne à la place du fichier Parquet.
+
+Usage :
+    python flight_dataset.py --convert <fichier pkl> [<fichier parquet>]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import datetime
+import operator
+import os
+import pickle
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import flight_schema
+
+# ------------------------ Constants -----------------------
+
+DATASET_NAME = "global_flights_data.parquet"
+LEGACY_PICKLE_NAME = "global_flights_data.pkl"
+# Version du schéma, à incrémenter à chaque changement de colonnes ou de
+# types ; un fichier d'une version inconnue est refusé (build complet)
+SCHEMA_VERSION = 2
+# Versions relues en leur appliquant le schéma courant
+UPGRADABLE_VERSIONS = (1,)
+SCHEMA_VERSION_KEY = b"syride.schema_version"
+DATE_UPDATE_KEY = b"syride.date_update"
+
+# Colonnes lues par l'app (app.py)
+APP_COLUMNS = [
+    "pilote",
+    "type_vol",
+    "annee",
+    "mois",
+    "jour_semaine",
+    "saison",
+    "voile",
+    "site",
+    "longitude",
+    "latitude",
+    "duree_vol_minutes",
+    "distance_cumulee",
+    "vitesse_moyenne",
+    "vitesse_max",
+    "vario_max",
+    "g_max",
+    "plafond",
+]
+
+FILTER_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# ------------------------ Functions -----------------------
+
+
+def write_flight_data(
+    df: pd.DataFrame, path: str, date_update: datetime.datetime = None
+) -> None:
+    """
+    Écrit les vols au format Parquet (compression zstd), typés selon
+    flight_schema, avec la version du schéma et la date de mise à jour
+    (maintenant par défaut), dans un fichier temporaire renommé ensuite.
+    """
+    if date_update is None:
+        date_update = datetime.datetime.today()
+    table = pa.Table.from_pandas(flight_schema.apply_schema(df), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SCHEMA_VERSION_KEY] = str(SCHEMA_VERSION).encode()
+    metadata[DATE_UPDATE_KEY] = date_update.isoformat().encode()
+    table = table.replace_schema_metadata(metadata)
+    pq.write_table(table, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+
+def read_metadata(path: str) -> dict:
+    """
+    Métadonnées d'un fichier Parquet (lecture du pied de fichier
+    seulement).
+    """
+    return pq.read_schema(path).metadata or {}
+
+
+def read_schema_version(path: str) -> int:
+    """
+    Version du schéma d'un fichier Parquet ; None si elle n'est pas
+    renseignée.
+    """
+    version = read_metadata(path).get(SCHEMA_VERSION_KEY)
+    return int(version) if version is not None else None
+
+
+def read_date_update(path: str) -> datetime.datetime:
+    """
+    Date de mise à jour des vols : métadonnée du fichier Parquet, ou
+    colonne date_update (ancien pkl, Parquet version 1).
+    """
+    if not path.endswith(".pkl"):
+        date_update = read_metadata(path).get(DATE_UPDATE_KEY)
+        if date_update is not None:
+            return datetime.datetime.fromisoformat(date_update.decode())
+        df = pq.read_table(path, columns=["date_update"]).to_pandas()
+    else:
+        df = read_legacy_pickle(path, columns=["date_update"])
+    return df["date_update"].iloc[0].to_pydatetime()
+
+
+def apply_filters(df: pd.DataFrame, filters: list) -> pd.DataFrame:
+    """
+    Filtres au format pyarrow (liste de (colonne, opérateur, valeur),
+    tous vérifiés) appliqués à une dataframe déjà chargée.
+    """
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        if op == "in":
+            mask &= df[column].isin(value)
+        elif op == "not in":
+            mask &= ~df[column].isin(value)
+        else:
+            mask &= FILTER_OPERATORS[op](df[column], value)
+    return df[mask]
+
+
+def read_legacy_pickle(
+    path: str, columns: list = None, filters: list = None
+) -> pd.DataFrame:
+    with open(path, "rb") as pkl_file:
+        df = pickle.load(pkl_file)
+    if filters is not None:
+        df = apply_filters(df, filters)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def find_flight_data(path: str, legacy_path: str = None) -> str:
+    """
+    Fichier des vols à lire : path s'il existe, sinon l'ancien pkl
+    (legacy_path, par défaut global_flights_data.pkl du dossier de path)
+    d'un déploiement pas encore converti (voir convert_pickle).
+    """
+    if os.path.exists(path) or path.endswith(".pkl"):
+        return path
+    if legacy_path is None:
+        legacy_path = os.path.join(os.path.dirname(path), LEGACY_PICKLE_NAME)
+    if os.path.exists(legacy_path):
+        print(f"{path} absent, lecture de l'ancien pkl {legacy_path}")
+        return legacy_path
+    return path
+
+
+def read_flight_data(
+    path: str, columns: list = None, filters: list = None
+) -> pd.DataFrame:
+    """
+    Lit le fichier des vols.
+
+    args:
+    -----------
+    * path: str
+        fichier Parquet, ou ancien pkl (extension .pkl).
+    * columns: list
+        colonnes à lire (toutes par défaut).
+    * filters: list
+        filtres appliqués à la lecture, au format pyarrow ; seuls les
+        groupes de lignes qui peuvent y répondre sont lus.
+
+    returns:
+    -----------
+    * df: pd.DataFrame
+        vols, typés selon flight_schema.
+    """
+    if path.endswith(".pkl"):
+        df = read_legacy_pickle(path, columns=columns, filters=filters)
+        return flight_schema.apply_schema(df)
+
+    version = read_schema_version(path)
+    if version != SCHEMA_VERSION and version not in UPGRADABLE_VERSIONS:
+        raise ValueError(
+            f"{path} : schéma version {version}, version {SCHEMA_VERSION} "
+            "attendue (build complet nécessaire)"
+        )
+    df = pq.read_table(path, columns=columns, filters=filters).to_pandas()
+    if version != SCHEMA_VERSION:
+        df = flight_schema.apply_schema(df)
+    return df
+
+
+def convert_pickle(pkl_path: str, path: str = None) -> str:
+    """
+    Convertit un ancien pkl au format Parquet (même dossier par défaut).
+    """
+    if path is None:
+        path = os.path.join(os.path.dirname(pkl_path), DATASET_NAME)
+    df = read_legacy_pickle(pkl_path)
+    write_flight_data(
+        df=df, path=path, date_update=df["date_update"].iloc[0].to_pydatetime()
+    )
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Conversion de l'ancien pkl des vols au format Parquet."
+    )
+    parser.add_argument(
+        "--convert",
+        nargs="+",
+        metavar="FICHIER",
+        required=True,
+        help="Fichier pkl, puis fichier Parquet (même dossier par défaut).",
+    )
+    args = parser.parse_args()
+    path = convert_pickle(*args.convert[:2])
+    print(f"{path} écrit (schéma version {SCHEMA_VERSION})")
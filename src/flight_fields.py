@@ -0,0 +1,208 @@
+"""
+Registre des champs lus dans le texte des activités syride.
+
+Chaque champ est décrit une seule fois (libellé, motif de la valeur,
+unité, type) ; les registres sont compilés en un seul motif qui lit
+toutes les lignes d'un bloc (lignes <ul> d'une activité du fil, lignes
+volTexte d'une page de détail) en un seul passage. Les valeurs sont
+typées et les lignes reconnues dont la valeur n'est pas lisible sont
+comptées par champ (voir get_failures), sans trace d'erreur.
+"""
+
+# ------------------------ Imports -----------------------
+
+import re
+import threading
+from collections import Counter
+
+# ------------------------ Classes -----------------------
+
+
+class Field:
+    """
+    Champ d'un registre.
+
+    args:
+    -----------
+    * label: str
+        libellé en début de ligne, avant ":".
+    * pattern: str
+        motif de la valeur ; chaque groupe nommé est une colonne produite
+        (le premier groupe est obligatoire, les suivants optionnels).
+    * unit: str
+        unité attendue après la valeur (facultative dans le texte,
+        sans distinction de casse : "1.4g" comme "1.4G").
+    * cast: callable
+        conversion de la valeur (int, to_float ou str).
+    """
+
+    def __init__(self, label: str, pattern: str, unit: str = None, cast=str):
+        self.label = label
+        self.pattern = pattern
+        self.unit = unit
+        self.cast = cast
+        self.columns = list(re.compile(pattern).groupindex)
+
+    def value_pattern(self) -> str:
+        """
+        Motif de la valeur, unité comprise, jusqu'à la fin de la ligne.
+        """
+        unit = rf"(?:\s*(?i:{re.escape(self.unit)}))?" if self.unit else ""
+        return rf"\s*{self.pattern}{unit}\s*$"
+
+    def label_pattern(self) -> str:
+        return rf"^[ \t]*{re.escape(self.label)}\s*:"
+
+
+class FieldRegistry:
+    """
+    Registre compilé : une alternative par champ dans un seul motif
+    multiligne. Une ligne dont le libellé est reconnu mais dont la valeur
+    ne correspond pas au motif est un échec pour ce champ.
+
+    Les lignes brutes lues sont gardées dans la colonne raw_column des
+    données de la trace, pour pouvoir les relire sans re-scraper
+    (voir analyze_functions.reparse_raw_fields).
+    """
+
+    def __init__(self, name: str, raw_column: str, fields: dict):
+        self.name = name
+        self.raw_column = raw_column
+        self.fields = fields
+        self.columns = [column for field in fields.values() for column in field.columns]
+        alternatives = []
+        for key, field in fields.items():
+            alternatives.append(
+                rf"(?P<_{key}>{re.escape(field.label)}\s*:"
+                rf"(?:{field.value_pattern()}|.*))"
+            )
+        self.regex = re.compile(
+            r"^[ \t]*(?:" + "|".join(alternatives) + ")", re.MULTILINE
+        )
+
+    def parse(self, lines: list) -> dict:
+        """
+        Lit toutes les lignes d'un bloc. Les colonnes absentes ou
+        illisibles valent None.
+        """
+        values = dict.fromkeys(self.columns)
+        block = "\n".join(" ".join(line.split()) for line in lines)
+        for match in self.regex.finditer(block):
+            key = match.lastgroup[1:]
+            field = self.fields[key]
+            columns = iter(field.columns)
+            first = next(columns)
+            raw = match.group(first)
+            if raw is None:
+                count_failure(self.name, key)
+                continue
+            try:
+                values[first] = field.cast(raw)
+            except ValueError:
+                count_failure(self.name, key)
+                continue
+            for column in columns:
+                if match.group(column) is not None:
+                    values[column] = match.group(column)
+        return values
+
+
+# ------------------------ Functions -----------------------
+
+_failures = Counter()
+_failures_lock = threading.Lock()
+
+
+def count_failure(registry: str, key: str) -> None:
+    with _failures_lock:
+        _failures[(registry, key)] += 1
+
+
+def get_failures() -> dict:
+    """
+    Nombre d'échecs de lecture par champ : {(registre, champ): nombre}.
+    """
+    with _failures_lock:
+        return dict(_failures)
+
+
+def reset_failures() -> None:
+    with _failures_lock:
+        _failures.clear()
+
+
+def print_failures() -> None:
+    failures = get_failures()
+    if len(failures) > 0:
+        details = ", ".join(
+            f"{registry}.{key} : {nb}"
+            for (registry, key), nb in sorted(failures.items())
+        )
+        print(f"Valeurs illisibles ({details}).")
+
+
+def to_float(value: str) -> float:
+    return float(value.replace(",", "."))
+
+
+NUMBER = r"-?\d+(?:[.,]\d+)?"
+INTEGER = r"-?\d+"
+DATE = r"(?:le\s+)?(?P<{}>\d{{1,2}}/\d{{1,2}}/\d{{4}})"
+# Heure après la date : "29/04/2023 - 11h07" ou "29/04/2023 à 11h07"
+SEPARATOR = r"\s+(?:-|à)\s+"
+HEURE = r"(?:" + SEPARATOR + r"(?P<{}>\d{{1,2}}h\d{{2}}))?"
+DURATION = r"(?P<{}>\d+:\d{{2}}:\d{{2}})"
+# Nom suivi d'un complément entre parenthèses, ex. "daytona (Gin)"
+NAME = r"(?P<{}>[^(]*?)\s*(?:\(.*)?"
+
+# Lignes <ul> d'une activité du fil
+ACTIVITY_REGISTRY = FieldRegistry(
+    name="activite",
+    raw_column="lignes_activite",
+    fields={
+        "date": Field("Date", DATE.format("date") + HEURE.format("heure")),
+        "flight_time": Field("Temps de vol", DURATION.format("flight_time"), unit="s"),
+        "voile": Field("Voile utilisée", NAME.format("voile")),
+        "distance": Field(
+            "Distance parcourue", rf"(?P<distance>{INTEGER})", unit="km", cast=int
+        ),
+        "instrument": Field("Instrument utilisé", NAME.format("instrument")),
+    },
+)
+
+# Colonnes d'activité laissées vides pour une trace non syride
+NON_SYRIDE_EMPTY = ("heure", "distance", "instrument")
+
+# Lignes volTexte de la page de détail d'une activité
+DETAIL_REGISTRY = FieldRegistry(
+    name="detail",
+    raw_column="lignes_detail",
+    fields={
+        "date_activite": Field(
+            "Date", DATE.format("date_activite") + rf"(?:{SEPARATOR}\S+)?"
+        ),
+        "site_activite": Field("Décollage", NAME.format("site_activite")),
+        "distance_activite": Field(
+            "Distance", rf"(?P<distance_activite>{INTEGER})", unit="km", cast=int
+        ),
+        "distance_cumulee": Field(
+            "Distance cumulée", rf"(?P<distance_cumulee>{INTEGER})", unit="km", cast=int
+        ),
+        "vitesse_max": Field(
+            "Vitesse max", rf"(?P<vitesse_max>{INTEGER})", unit="km/h", cast=int
+        ),
+        "vitesse_moyenne": Field(
+            "Vitesse moyenne",
+            rf"(?P<vitesse_moyenne>{NUMBER})",
+            unit="km/h",
+            cast=to_float,
+        ),
+        "plafond": Field("Plafond", rf"(?P<plafond>{INTEGER})", unit="m", cast=int),
+        "gain": Field("Gain", rf"(?P<gain>{INTEGER})", unit="m", cast=int),
+        "duree_vol": Field("Temps de vol", DURATION.format("duree_vol"), unit="s"),
+        "vario_max": Field(
+            "Vario max", rf"(?P<vario_max>{NUMBER})", unit="m/s", cast=to_float
+        ),
+        "g_max": Field("G max", rf"(?P<g_max>{NUMBER})", unit="g", cast=to_float),
+    },
+)
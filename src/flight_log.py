@@ -0,0 +1,257 @@
+"""
+Journal des données de vol d'un pilote (<pilote>/flights.jsonl).
+
+save_flight_data ajoute chaque vol sauvegardé en fin de journal (une
+ligne JSON par vol) et une entrée de taille fixe dans l'index des
+positions (<pilote>/flights.idx) : numéro d'activité, position et
+longueur de la ligne, taille et date de modification du fichier
+<num>.json écrit en même temps. Le build lit tout le journal en une
+seule lecture séquentielle et décode les vols par blocs ; un vol absent
+du journal, ou dont le fichier json a changé depuis, est relu depuis son
+fichier json (données antérieures au journal, fichier modifié à la main).
+
+Le journal n'est jamais réécrit en place : une trace sauvegardée deux
+fois y figure deux fois, l'index désigne la dernière. rebuild_flight_log
+recrée le journal à partir des fichiers json (reprise de l'existant,
+compaction).
+
+Usage :
+    python flight_log.py --directory <dossier du pilote>
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import json
+import os
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import trace_index
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ------------------------ Constants -----------------------
+
+LOG_FILENAME = "flights.jsonl"
+OFFSETS_FILENAME = "flights.idx"
+# num_activite, position, longueur, taille et mtime_ns du fichier json
+OFFSET_ENTRY = struct.Struct("<qqqqq")
+# Taille des blocs décodés en un seul appel (octets)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+_append_lock = threading.Lock()
+
+# ------------------------ Functions -----------------------
+
+
+def dumps(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def get_paths(directory: str) -> tuple:
+    return (
+        os.path.join(directory, LOG_FILENAME),
+        os.path.join(directory, OFFSETS_FILENAME),
+    )
+
+
+def append_record(directory: str, record: dict, json_file: str) -> None:
+    """
+    Ajoute un vol au journal du pilote et son entrée à l'index.
+
+    args:
+    -----------
+    * directory: str
+        dossier du pilote.
+    * record: dict
+        données de vol (contenu du fichier json).
+    * json_file: str
+        fichier <num>.json qui vient d'être écrit ; sa taille et sa date
+        de modification permettent de savoir si le vol du journal est
+        encore à jour.
+    """
+    log_path, offsets_path = get_paths(directory)
+    line = dumps(record) + b"\n"
+    stat = os.stat(json_file)
+    # Les traces d'un pilote sont sauvegardées dans plusieurs threads
+    with _append_lock:
+        with open(log_path, "ab") as log_file:
+            # Fin réelle du fichier : une ligne incomplète laissée par une
+            # interruption n'est jamais désignée par l'index
+            offset = log_file.seek(0, os.SEEK_END)
+            log_file.write(line)
+        with open(offsets_path, "ab") as offsets_file:
+            offsets_file.write(
+                OFFSET_ENTRY.pack(
+                    int(record["num_activite"]),
+                    offset,
+                    len(line),
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                )
+            )
+
+
+def read_offsets(directory: str) -> dict:
+    """
+    Index des positions : {numéro de trace: (position, longueur, taille,
+    mtime_ns)}, dernière sauvegarde de chaque trace. Vide s'il n'y a pas
+    de journal.
+    """
+    _, offsets_path = get_paths(directory)
+    try:
+        with open(offsets_path, "rb") as offsets_file:
+            data = offsets_file.read()
+    except FileNotFoundError:
+        return {}
+    # Une entrée incomplète (interruption) est ignorée
+    end = len(data) - len(data) % OFFSET_ENTRY.size
+    return {str(entry[0]): entry[1:] for entry in OFFSET_ENTRY.iter_unpack(data[:end])}
+
+
+def decode_chunk(chunk: bytes) -> list:
+    """
+    Décode un bloc de lignes du journal (séparées par ",") en un seul
+    appel au décodeur.
+    """
+    return loads(b"[" + chunk + b"]")
+
+
+def split_chunks(spans: list, chunk_size: int) -> list:
+    chunks = []
+    current = []
+    size = 0
+    for span in spans:
+        current.append(span)
+        size += len(span)
+        if size >= chunk_size:
+            chunks.append(b",".join(current))
+            current = []
+            size = 0
+    if len(current) > 0:
+        chunks.append(b",".join(current))
+    return chunks
+
+
+def load_records(directory: str, signatures: dict, workers: int = 1) -> tuple:
+    """
+    Vols du journal d'un pilote pour les traces demandées.
+
+    args:
+    -----------
+    * directory: str
+        dossier du pilote.
+    * signatures: dict
+        {numéro de trace: [chemin, taille, mtime_ns]} des fichiers json
+        (voir trace_index.select_files).
+    * workers: int
+        nombre de processus de décodage des blocs (1 = dans le processus
+        courant).
+
+    returns:
+    -----------
+    * records: dict
+        {numéro de trace: données de vol} lus dans le journal.
+    * missing: list
+        numéros des traces à relire depuis leur fichier json.
+    """
+    offsets = read_offsets(directory)
+    selected = []
+    missing = []
+    for trace, (_, size, mtime) in signatures.items():
+        entry = offsets.get(trace)
+        if entry is not None and entry[2:] == (size, mtime):
+            selected.append((trace, entry[0], entry[1]))
+        else:
+            missing.append(trace)
+    if len(selected) == 0:
+        return {}, missing
+
+    log_path, _ = get_paths(directory)
+    try:
+        with open(log_path, "rb") as log_file:
+            data = log_file.read()
+    except FileNotFoundError:
+        return {}, missing + [trace for trace, _, _ in selected]
+
+    # Ordre du journal ; lignes prises sans copie, sans le "\n" final
+    selected.sort(key=lambda item: item[1])
+    view = memoryview(data)
+    traces = []
+    spans = []
+    for trace, offset, length in selected:
+        if offset + length > len(data):
+            missing.append(trace)
+            continue
+        traces.append(trace)
+        spans.append(view[offset : offset + length - 1])
+
+    chunks = split_chunks(spans=spans, chunk_size=CHUNK_SIZE)
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            decoded = list(executor.map(decode_chunk, chunks))
+    else:
+        decoded = [decode_chunk(chunk) for chunk in chunks]
+    records = dict(zip(traces, (record for chunk in decoded for record in chunk)))
+    return records, missing
+
+
+def rebuild_flight_log(directory: str) -> int:
+    """
+    Recrée le journal et l'index d'un pilote à partir des fichiers json
+    de ses traces. Les deux fichiers sont écrits à côté puis renommés.
+
+    returns:
+    -----------
+    * nb_records: int
+        nombre de vols écrits.
+    """
+    log_path, offsets_path = get_paths(directory)
+    json_files = trace_index.get_trace_files(directory=directory, extension=".json")
+    nb_records = 0
+    with _append_lock:
+        with open(log_path + ".tmp", "wb") as log_file, open(
+            offsets_path + ".tmp", "wb"
+        ) as offsets_file:
+            for trace, (path, size, mtime) in sorted(json_files.items()):
+                with open(path, "rb") as json_file:
+                    record = loads(json_file.read())
+                line = dumps(record) + b"\n"
+                offset = log_file.tell()
+                log_file.write(line)
+                offsets_file.write(
+                    OFFSET_ENTRY.pack(int(trace), offset, len(line), size, mtime)
+                )
+                nb_records += 1
+        os.replace(log_path + ".tmp", log_path)
+        os.replace(offsets_path + ".tmp", offsets_path)
+    return nb_records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recrée le journal des vols d'un pilote depuis ses fichiers json."
+    )
+    parser.add_argument(
+        "--directory",
+        action="append",
+        required=True,
+        help="Dossier d'un pilote (plusieurs possibles).",
+    )
+    args = parser.parse_args()
+    for directory in args.directory:
+        nb_records = rebuild_flight_log(directory=directory)
+        print(f"{directory} : {nb_records} vols écrits dans {LOG_FILENAME}")
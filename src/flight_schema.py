@@ -0,0 +1,155 @@
+"""
+Types compacts des colonnes du fichier des vols.
+
+Chaque colonne a un type : catégories pour le texte répétitif (pilote,
+site, voile...), entiers et flottants réduits pour les mesures. Les
+catégories du calendrier (mois, jours, saisons) sont fixes et dans
+l'ordre du calendrier ; les autres sont les valeurs présentes, triées.
+La date de mise à jour n'est plus une colonne mais une métadonnée du
+fichier (voir flight_dataset.py).
+
+Usage (rapport mémoire de l'ancien pkl des vols) :
+    python flight_schema.py --pkl <fichier pkl>
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import params_scrap_syride as params
+
+# ------------------------ Constants -----------------------
+
+MONTHS = [
+    "janvier",
+    "fevrier",
+    "mars",
+    "avril",
+    "mai",
+    "juin",
+    "juillet",
+    "aout",
+    "septembre",
+    "octobre",
+    "novembre",
+    "decembre",
+]
+WEEKDAYS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+SEASONS = ["hiver", "printemps", "été", "automne"]
+
+# Catégories fixes ; None = valeurs présentes dans les données
+CATEGORIES = {
+    "pilote": None,
+    "types": None,
+    "site": None,
+    "voile": None,
+    "instrument": None,
+    "site_activite": None,
+    "type_vol": None,
+    "mois": MONTHS,
+    "jour_semaine": WEEKDAYS,
+    "saison": SEASONS,
+}
+
+NUMERIC_TYPES = {
+    "num_activite": "int32",
+    "distance": "int16",
+    "distance_activite": "int16",
+    "distance_cumulee": "int16",
+    "vitesse_max": "int16",
+    "plafond": "int16",
+    "gain": "int16",
+    "annee": "int16",
+    "vitesse_moyenne": "float32",
+    "vario_max": "float32",
+    "g_max": "float32",
+    "duree_vol_minutes": "float32",
+    "longitude": "float32",
+    "latitude": "float32",
+    "mean_longitude": "float32",
+    "mean_latitude": "float32",
+}
+
+# Colonnes devenues métadonnées du fichier
+METADATA_COLUMNS = ["date_update"]
+
+# ------------------------ Functions -----------------------
+
+
+def fits(values: pd.Series, dtype: str) -> bool:
+    """
+    Vrai si les valeurs entières tiennent dans le type dtype.
+    """
+    if not np.issubdtype(np.dtype(dtype), np.integer) or len(values) == 0:
+        return True
+    info = np.iinfo(dtype)
+    return info.min <= values.min() and values.max() <= info.max
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applique les types de CATEGORIES et NUMERIC_TYPES aux colonnes
+    présentes et retire les colonnes de METADATA_COLUMNS. Un entier hors
+    de l'intervalle de son type garde son type d'origine.
+    """
+    df = df.drop(columns=METADATA_COLUMNS, errors="ignore")
+    for column, categories in CATEGORIES.items():
+        if column not in df.columns:
+            continue
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            values = df[column].cat.remove_unused_categories().cat.categories
+        else:
+            values = df[column].dropna().unique()
+        if categories is None:
+            categories = sorted(values)
+        else:
+            # Valeur hors calendrier gardée, en fin de catégories
+            categories = categories + sorted(set(values) - set(categories))
+        df[column] = pd.Categorical(df[column], categories=categories)
+    for column, dtype in NUMERIC_TYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if fits(df[column], dtype):
+            df[column] = df[column].astype(dtype)
+        else:
+            print(f"{column} : valeurs hors de {dtype}, type {df[column].dtype} gardé")
+    return df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Octets par vol de chaque colonne, avant et après apply_schema.
+    """
+    report = pd.DataFrame(
+        {
+            "avant": before.memory_usage(deep=True, index=False) / max(len(before), 1),
+            "après": after.memory_usage(deep=True, index=False) / max(len(after), 1),
+        }
+    )
+    report.loc["total"] = report.sum()
+    return report
+
+
+def print_memory_report(before: pd.DataFrame, after: pd.DataFrame) -> None:
+    report = memory_report(before=before, after=after)
+    print(f"{'colonne':<20} {'avant (o/vol)':>14} {'après (o/vol)':>14}")
+    for column, row in report.iterrows():
+        after_value = "-" if pd.isna(row["après"]) else f"{row['après']:.1f}"
+        print(f"{column:<20} {row['avant']:>14.1f} {after_value:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mémoire par vol de l'ancien pkl des vols, avant et après typage."
+    )
+    parser.add_argument("--pkl", default=params.pkl_path, help="Fichier pkl.")
+    args = parser.parse_args()
+
+    # Import local : flight_dataset dépend de ce module
+    import flight_dataset
+
+    before = flight_dataset.read_legacy_pickle(args.pkl)
+    print_memory_report(before=before, after=apply_schema(before))
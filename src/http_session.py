@@ -0,0 +1,114 @@
+"""
+Session HTTP partagée pour les requêtes vers syride.
+
+Une requests.Session garde les connexions ouvertes (keep-alive) et
+les réutilise d'une requête à l'autre ; la taille du pool de connexions
+est paramétrable pour les étapes concurrentes. Toutes les requêtes passent
+par request, qui applique le limiteur de débit et la politique de reprises
+de rate_limit.py.
+"""
+
+# ------------------------ Imports -----------------------
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import params_scrap_syride as params
+from rate_limit import (
+    RetryPolicy,
+    TokenBucket,
+    get_default_limiter,
+    get_default_retry_policy,
+)
+
+# ------------------------ Functions -----------------------
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Crée une session HTTP dont le pool de connexions
+    accepte pool_size connexions simultanées par hôte.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+_default_session = None
+
+
+def get_default_session() -> requests.Session:
+    """
+    Session du processus courant, créée à la première demande.
+    """
+    global _default_session
+    if _default_session is None:
+        _default_session = create_session(pool_size=params.http_pool_size)
+    return _default_session
+
+
+def request(
+    session: requests.Session,
+    url: str,
+    method: str = "GET",
+    limiter: TokenBucket = None,
+    retry_policy: RetryPolicy = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Requête limitée en débit et reprise sur erreur transitoire
+    (connexion, délai dépassé, codes retry_policy.retry_statuses).
+    La dernière réponse est retournée telle quelle ; la dernière exception
+    réseau est relancée.
+    """
+    if limiter is None:
+        limiter = get_default_limiter()
+    if retry_policy is None:
+        retry_policy = get_default_retry_policy()
+    kwargs.setdefault("timeout", params.http_timeout)
+
+    last_attempt = retry_policy.max_attempts - 1
+    for attempt in range(retry_policy.max_attempts):
+        limiter.acquire()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as excep:
+            if attempt == last_attempt:
+                raise
+            reason = excep.__class__.__name__
+            delay = retry_policy.delay(attempt)
+        else:
+            if (
+                response.status_code not in retry_policy.retry_statuses
+                or attempt == last_attempt
+            ):
+                return response
+            reason = f"code {response.status_code}"
+            delay = retry_policy.delay(attempt, response.headers.get("Retry-After"))
+            response.close()
+        print(f"{url} : {reason}, nouvelle tentative dans {delay:.1f}s")
+        time.sleep(delay)
+
+
+def fetch_text(session: requests.Session, url: str, timeout: float = None) -> str:
+    """
+    GET d'une page HTML ; lève une exception si le code d'état
+    n'est pas 2xx. Sans charset annoncé, la page est décodée en utf-8.
+    """
+    if timeout is None:
+        timeout = params.http_timeout
+    response = request(session=session, url=url, timeout=timeout)
+    response.raise_for_status()
+    if "charset" not in response.headers.get("Content-Type", ""):
+        response.encoding = "utf-8"
+    return response.text
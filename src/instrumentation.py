@@ -0,0 +1,282 @@
+"""
+Mesure des étapes du scraping et de la construction du fichier des vols.
+
+Chaque appel d'une étape décorée par instrument est enregistré dans un
+registre : durée (time.perf_counter), lignes en entrée et en sortie
+(dataframes), et, en mode "memory", pic mémoire de l'appel au-dessus de
+la mémoire à son début (tracemalloc). Le rapport donne par étape le
+nombre d'appels et les percentiles des durées, en JSON ou en CSV.
+
+Activation par variable d'environnement, lue à l'import :
+    SYRIDE_PROFILE=1 (ou time)  durées et lignes
+    SYRIDE_PROFILE=memory       en plus, pic mémoire (plus lent)
+    SYRIDE_PROFILE_REPORT=<fichier .json ou .csv>  rapport écrit par
+        save_report (fin de main.py et de create_global_pkl.py)
+Désactivée, une étape décorée coûte un test de booléen par appel.
+
+Les processus des modes --jobs ont leur propre registre : leurs appels
+sont renvoyés au processus principal avec le rapport du pilote (voir
+drain et add_records). Sous tracemalloc, le pic mémoire d'une étape
+lancée dans un thread compte aussi les allocations des autres threads.
+"""
+
+# ------------------------ Imports -----------------------
+
+import csv
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+# ------------------------ Constants -----------------------
+
+ENV_VAR = "SYRIDE_PROFILE"
+REPORT_ENV_VAR = "SYRIDE_PROFILE_REPORT"
+MODES = {"": None, "0": None, "1": "time", "time": "time", "memory": "memory"}
+PERCENTILES = (50, 90, 99)
+
+# ------------------------ Functions -----------------------
+
+_mode = None
+_records = []
+_records_lock = threading.Lock()
+# Pics mémoire des appels en cours (un par niveau d'imbrication et par thread)
+_memory_stack = threading.local()
+
+
+def configure(mode: str = None) -> None:
+    """
+    Active ("time", "memory") ou désactive (None) la mesure ; par défaut,
+    d'après la variable d'environnement SYRIDE_PROFILE.
+    """
+    global _mode
+    if mode is None:
+        mode = os.environ.get(ENV_VAR, "").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"{ENV_VAR}={mode!r} : valeurs possibles {list(MODES)}")
+    _mode = MODES[mode]
+    if _mode == "memory" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def is_enabled() -> bool:
+    return _mode is not None
+
+
+def count_rows(value) -> int:
+    """
+    Nombre de lignes d'une dataframe ou d'une série, None sinon.
+    """
+    shape = getattr(value, "shape", None)
+    if shape is None or len(shape) == 0:
+        return None
+    return int(shape[0])
+
+
+def first_rows(args: tuple, kwargs: dict) -> int:
+    for value in list(args) + list(kwargs.values()):
+        rows = count_rows(value)
+        if rows is not None:
+            return rows
+    return None
+
+
+def start_memory() -> int:
+    """
+    Début de la mesure mémoire d'un appel : le pic de l'appel parent est
+    reporté avant la remise à zéro du pic.
+    """
+    stack = getattr(_memory_stack, "peaks", None)
+    if stack is None:
+        stack = _memory_stack.peaks = []
+    current, peak = tracemalloc.get_traced_memory()
+    if len(stack) > 0:
+        stack[-1] = max(stack[-1], peak)
+    stack.append(current)
+    tracemalloc.reset_peak()
+    return current
+
+
+def stop_memory(start: int) -> int:
+    """
+    Fin de la mesure mémoire d'un appel : pic au-dessus de la mémoire au
+    début de l'appel (octets), reporté sur l'appel parent.
+    """
+    stack = _memory_stack.peaks
+    _, peak = tracemalloc.get_traced_memory()
+    peak = max(stack.pop(), peak)
+    if len(stack) > 0:
+        stack[-1] = max(stack[-1], peak)
+    return peak - start
+
+
+def record(step: str, duration: float, rows_in: int, rows_out: int, memory: int):
+    with _records_lock:
+        _records.append(
+            {
+                "step": step,
+                "duration": duration,
+                "rows_in": rows_in,
+                "rows_out": rows_out,
+                "memory_peak": memory,
+                "pid": os.getpid(),
+            }
+        )
+
+
+def instrument(f=None, name: str = None):
+    """
+    Décorateur d'une étape : @instrument ou @instrument(name="...") (nom
+    de la fonction par défaut).
+    """
+    if f is None:
+        return functools.partial(instrument, name=name)
+    step = f.__name__ if name is None else name
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if _mode is None:
+            return f(*args, **kwargs)
+        memory_start = start_memory() if _mode == "memory" else None
+        tic = time.perf_counter()
+        try:
+            result = f(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - tic
+            memory = None if memory_start is None else stop_memory(memory_start)
+        record(
+            step=step,
+            duration=duration,
+            rows_in=first_rows(args, kwargs),
+            rows_out=count_rows(result),
+            memory=memory,
+        )
+        return result
+
+    return wrapper
+
+
+def get_records() -> list:
+    with _records_lock:
+        return list(_records)
+
+
+def reset() -> None:
+    with _records_lock:
+        _records.clear()
+
+
+def drain() -> list:
+    """
+    Appels enregistrés par ce processus, retirés du registre (à renvoyer
+    au processus principal). Les appels hérités du processus parent (fork)
+    sont écartés.
+    """
+    pid = os.getpid()
+    with _records_lock:
+        records = [call for call in _records if call["pid"] == pid]
+        _records.clear()
+    return records
+
+
+def add_records(records: list) -> None:
+    with _records_lock:
+        _records.extend(records)
+
+
+def summarize(records: list = None) -> list:
+    """
+    Une ligne par étape, dans l'ordre du premier appel : nombre d'appels,
+    durées (s) totale, moyenne, percentiles et max, lignes en entrée et
+    en sortie (totaux), pic mémoire max (octets).
+    """
+    if records is None:
+        records = get_records()
+    steps = {}
+    for call in records:
+        steps.setdefault(call["step"], []).append(call)
+    summary = []
+    for step, calls in steps.items():
+        durations = np.array([call["duration"] for call in calls])
+        row = {
+            "step": step,
+            "calls": len(calls),
+            "total": float(durations.sum()),
+            "mean": float(durations.mean()),
+        }
+        for percentile in PERCENTILES:
+            row[f"p{percentile}"] = float(np.percentile(durations, percentile))
+        row["max"] = float(durations.max())
+        for column in ("rows_in", "rows_out"):
+            values = [call[column] for call in calls if call[column] is not None]
+            row[column] = sum(values) if len(values) > 0 else None
+        memory = [call["memory_peak"] for call in calls if call["memory_peak"]]
+        row["memory_peak"] = max(memory) if len(memory) > 0 else None
+        summary.append(row)
+    return summary
+
+
+def write_report(path: str, records: list = None) -> None:
+    """
+    Rapport des étapes : CSV (une ligne par étape) si path finit par
+    .csv, JSON (étapes et appels) sinon.
+    """
+    if records is None:
+        records = get_records()
+    summary = summarize(records)
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as report_file:
+        if path.endswith(".csv"):
+            fields = list(summary[0]) if len(summary) > 0 else ["step"]
+            writer = csv.DictWriter(report_file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(summary)
+        else:
+            json.dump(
+                {"mode": _mode, "steps": summary, "calls": records},
+                report_file,
+                indent=1,
+            )
+    os.replace(path + ".tmp", path)
+
+
+def print_report(records: list = None) -> None:
+    summary = summarize(records)
+    if len(summary) == 0:
+        return
+    print("Mesure des étapes :")
+    print(
+        f"{'étape':<32} {'appels':>7} {'total (s)':>10} {'p50 (ms)':>9} "
+        f"{'p90 (ms)':>9} {'max (ms)':>9} {'lignes':>9} {'mémoire (Mo)':>13}"
+    )
+    for row in summary:
+        rows = "-" if row["rows_out"] is None else row["rows_out"]
+        memory = (
+            "-" if row["memory_peak"] is None else f"{row['memory_peak'] / 1e6:.1f}"
+        )
+        print(
+            f"{row['step']:<32} {row['calls']:>7} {row['total']:>10.2f} "
+            f"{1e3 * row['p50']:>9.1f} {1e3 * row['p90']:>9.1f} "
+            f"{1e3 * row['max']:>9.1f} {rows:>9} {memory:>13}"
+        )
+
+
+def save_report() -> None:
+    """
+    Fin d'un run : affiche le rapport et l'écrit dans le fichier de
+    SYRIDE_PROFILE_REPORT s'il est renseigné. Sans effet si la mesure
+    est désactivée.
+    """
+    if _mode is None:
+        return
+    print_report()
+    path = os.environ.get(REPORT_ENV_VAR)
+    if path:
+        write_report(path)
+        print(f"Rapport de mesure écrit dans {path}")
+
+
+configure()
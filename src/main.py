@@ -7,10 +7,13 @@ all the traces.
 """
 
 # Imports
+import instrumentation
 import python_functions
-from create_global_pkl import create_gobal_flight_data
+import rate_limit
+from create_global_pkl import build_global_flight_data
 import params_scrap_syride as params
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Parameters
 pilotes = params.pilots
@@ -26,28 +29,106 @@ parser.add_argument(
     "--scroll",
     type=int,
     default=-1,
-    help="Nombre de scroll nécessaire dans le scaping.",
+    help=(
+        "Nombre maximal de scroll dans le scaping (défaut : 40), "
+        "arrêt dès qu'une trace déjà téléchargée apparaît."
+    ),
 )
 parser.add_argument(
     "--pkl",
     type=int,
     default=1,
-    help="Construction du fichier pkl : 1=oui (defaut), 0=non",
+    help="Construction du fichier des vols (Parquet) : 1=oui (defaut), 0=non",
+)
+parser.add_argument(
+    "--jobs",
+    type=int,
+    default=1,
+    help="Nombre de pilotes scrapés puis intégrés au fichier des vols en "
+    "parallèle (1 processus par job), défaut=1.",
 )
 
 args = parser.parse_args()
 
+
+def print_summary(reports: list) -> None:
+    """
+    Affiche le bilan agrégé du scraping : nouvelles traces,
+    erreurs et temps par pilote.
+    """
+    print("Bilan du scraping :")
+    print(f"{'pilote':<20} {'nouvelles':>10} {'échecs':>8} {'durée (s)':>10}  erreur")
+    for report in reports:
+        error = report["error"].strip().splitlines()[-1] if report["error"] else ""
+        print(
+            f"{report['pilot']:<20} {report['new_traces']:>10} "
+            f"{report['failed_traces']:>8} {report['duration']:>10.1f}  {error}"
+        )
+    nb_new = sum(report["new_traces"] for report in reports)
+    nb_failed = sum(report["failed_traces"] for report in reports)
+    nb_errors = sum(report["error"] is not None for report in reports)
+    print(
+        f"Total : {nb_new} nouvelle(s) trace(s), {nb_failed} trace(s) en échec, "
+        f"{nb_errors} pilote(s) en erreur.",
+        "\n",
+    )
+
+
 # Lancement du script
 if __name__ == "__main__":
-    for pilot in pilotes:
-        print(pilot)
-        python_functions.get_syride_traces(
-            path=main_path, pilot=pilot, scroll=args.scroll
-        )
-        print("\n\n")
+    reports = []
+    if args.jobs > 1:
+        # Un seul limiteur de débit partagé par tous les processus
+        limiter = rate_limit.create_limiter(shared=True)
+        with ProcessPoolExecutor(
+            max_workers=args.jobs,
+            initializer=rate_limit.set_default_limiter,
+            initargs=(limiter,),
+        ) as executor:
+            futures = {
+                executor.submit(
+                    python_functions.scrape_pilot,
+                    path=main_path,
+                    pilot=pilot,
+                    scroll=args.scroll,
+                ): pilot
+                for pilot in pilotes
+            }
+            for future in as_completed(futures):
+                pilot = futures[future]
+                try:
+                    report = future.result()
+                except Exception as excep:
+                    # Processus worker tombé : on isole l'échec sur ce pilote
+                    report = {
+                        "pilot": pilot,
+                        "new_traces": 0,
+                        "failed_traces": 0,
+                        "error": repr(excep),
+                        "duration": 0.0,
+                        "output": "",
+                        "profile": [],
+                    }
+                print(pilot)
+                print(report["output"])
+                print("\n\n")
+                instrumentation.add_records(report["profile"])
+                reports.append(report)
+    else:
+        for pilot in pilotes:
+            print(pilot)
+            report = python_functions.scrape_pilot(
+                path=main_path, pilot=pilot, scroll=args.scroll, capture_output=False
+            )
+            instrumentation.add_records(report["profile"])
+            reports.append(report)
+            print("\n\n")
     print("Tous les fichiers ont été téléchargés", "\n")
+    print_summary(reports=reports)
 
     if args.pkl == 1:
-        create_gobal_flight_data(
-            common_filename=main_path, dict_filenames=dict_filenames
+        build_global_flight_data(
+            common_filename=main_path, dict_filenames=dict_filenames, jobs=args.jobs
         )
+
+    instrumentation.save_report()
@@ -0,0 +1,189 @@
+"""
+Uniformisation des valeurs par tables d'alias (aliases.json).
+
+Une table par colonne (voile, site, jour_semaine, mois, saison) donne,
+pour chaque valeur retenue, la liste de ses alias. Une table s'applique
+en un seul passage : la colonne est factorisée (codes des catégories),
+seules les valeurs distinctes sont transformées puis remplacées, et le
+résultat est reconstruit à partir des codes. Les valeurs qui ne sont ni
+un alias ni une valeur retenue sont gardées telles quelles (ou vidées,
+"unmapped": "missing") et listées dans le rapport des valeurs sans
+alias (voir get_unmapped).
+
+Le fichier porte une version de format (ALIASES_VERSION) et chaque table
+une révision, à incrémenter à chaque ajout d'alias.
+"""
+
+# ------------------------ Imports -----------------------
+
+import functools
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# ------------------------ Constants -----------------------
+
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aliases.json")
+ALIASES_VERSION = 1
+
+TRANSFORMS = {
+    None: None,
+    "lower": str.lower,
+    "str": str,
+}
+
+# ------------------------ Classes -----------------------
+
+
+class AliasTable:
+    """
+    Table d'alias d'une colonne.
+
+    args:
+    -----------
+    * name: str
+        nom de la table (colonne uniformisée).
+    * revision: int
+        révision de la table.
+    * aliases: dict
+        {valeur retenue: [alias]}.
+    * transform: str
+        transformation appliquée avant la recherche ("lower", "str").
+    * unmapped: str
+        "keep" (valeur gardée) ou "missing" (valeur vidée).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        revision: int,
+        aliases: dict,
+        transform: str = None,
+        unmapped: str = "keep",
+    ):
+        self.name = name
+        self.revision = revision
+        self.transform = TRANSFORMS[transform]
+        self.unmapped = unmapped
+        self.mapping = {}
+        for canonical, values in aliases.items():
+            for value in values:
+                if self.mapping.get(value, canonical) != canonical:
+                    raise ValueError(
+                        f"Table {name} : alias {value!r} de "
+                        f"{self.mapping[value]!r} et de {canonical!r}"
+                    )
+                self.mapping[value] = canonical
+        self.canonical = set(aliases)
+
+    def map_value(self, value):
+        """
+        Valeur retenue pour une valeur brute ; None si elle est inconnue
+        de la table.
+        """
+        if self.transform is not None:
+            value = self.transform(value)
+        if value in self.mapping:
+            return self.mapping[value]
+        if self.unmapped == "keep" and value in self.canonical:
+            return value
+        return None
+
+    def apply(self, values: pd.Series) -> pd.Series:
+        """
+        Applique la table à une colonne, en un passage sur les codes des
+        valeurs distinctes. Les valeurs sans alias sont comptées (voir
+        get_unmapped).
+        """
+        codes, uniques = pd.factorize(values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        mapped = []
+        for value, nb in zip(uniques, counts):
+            result = self.map_value(value)
+            if result is None:
+                count_unmapped(self.name, value, int(nb))
+                if self.unmapped == "keep":
+                    result = value if self.transform is None else self.transform(value)
+                else:
+                    result = np.nan
+            mapped.append(result)
+        # Valeurs manquantes (code -1) gardées manquantes
+        missing = codes < 0
+        if missing.any():
+            codes = np.where(missing, len(mapped), codes)
+            mapped.append(np.nan)
+        return pd.Series(pd.Index(mapped).take(codes), index=values.index)
+
+
+# ------------------------ Functions -----------------------
+
+_unmapped = Counter()
+_unmapped_lock = threading.Lock()
+
+
+def count_unmapped(table: str, value, nb: int) -> None:
+    with _unmapped_lock:
+        _unmapped[(table, value)] += nb
+
+
+def get_unmapped() -> dict:
+    """
+    Valeurs sans alias : {(table, valeur): nombre de vols}.
+    """
+    with _unmapped_lock:
+        return dict(_unmapped)
+
+
+def reset_unmapped() -> None:
+    with _unmapped_lock:
+        _unmapped.clear()
+
+
+def print_unmapped(max_values: int = 10) -> None:
+    unmapped = get_unmapped()
+    tables = sorted({table for table, _ in unmapped})
+    for table in tables:
+        values = sorted(
+            ((value, nb) for (name, value), nb in unmapped.items() if name == table),
+            key=lambda item: -item[1],
+        )
+        details = ", ".join(f"{value} ({nb})" for value, nb in values[:max_values])
+        if len(values) > max_values:
+            details += ", ..."
+        print(f"Valeurs sans alias ({table}, {len(values)}) : {details}")
+
+
+@functools.lru_cache(maxsize=None)
+def load_alias_tables(path: str = ALIASES_PATH) -> dict:
+    """
+    Tables d'alias du fichier path : {nom: AliasTable}.
+    """
+    with open(path, "r", encoding="utf-8") as aliases_file:
+        content = json.load(aliases_file)
+    if content.get("version") != ALIASES_VERSION:
+        raise ValueError(
+            f"{path} : version {content.get('version')}, "
+            f"version {ALIASES_VERSION} attendue"
+        )
+    return {
+        name: AliasTable(name=name, **table)
+        for name, table in content["tables"].items()
+    }
+
+
+def normalize(
+    df: pd.DataFrame, table: str, column: str = None, source: str = None
+) -> pd.DataFrame:
+    """
+    Applique la table d'alias table à la colonne source et écrit le
+    résultat dans la colonne column (par défaut, toutes deux du nom de
+    la table).
+    """
+    column = table if column is None else column
+    source = column if source is None else source
+    df[column] = load_alias_tables()[table].apply(df[source])
+    return df
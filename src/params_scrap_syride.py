@@ -4,6 +4,9 @@ Informations nécessaires pour faire fonctionner
 les scripts :
     - main.py
     - create_global_pkl.py
+    - driver_pool.py
+    - http_session.py
+    - rate_limit.py
 """
 
 # main path in which the pilot's folder will be created
@@ -61,8 +64,87 @@ dict_pilotes = {
 }
 
 
-# Chemin menant au pkl des données
+# Chemin menant au pkl des données (ancien format, lu si dataset_path est vide)
 pkl_path = "/Users/Adrien/Documents/paramoteur/syride/analyze_traces/syride_traces/global_flights_data.pkl"
+# Chemin menant au fichier Parquet des données (voir flight_dataset.py)
+dataset_path = "/Users/Adrien/Documents/paramoteur/syride/analyze_traces/syride_traces/global_flights_data.parquet"
+# Écriture de l'ancien pkl en plus du fichier Parquet : 1=oui, 0=non
+write_legacy_pkl = 0
+# Nettoyage des vols de chaque pilote : "fused" (un seul passage, voir
+# cleaning_plan.py) ou "chain" (chaîne d'étapes d'analyze_functions)
+cleaning_pipeline = "fused"
+
+# Navigateur utilisé pour le scraping (voir driver_pool.py)
+# chemin du chromedriver, None = résolution automatique par selenium
+webdriver_path = "/Users/Adrien/Documents/paramoteur/syride/analyze_traces/chromedriver-mac-x64/chromedriver"
+browser_headless = True
+# blocage des images, polices et feuilles de style
+browser_block_resources = True
+# nombre d'utilisations d'une session avant recyclage
+browser_max_uses = 50
+
+# Défilement de la page pilote (voir python_functions.scroll_to_bottom)
+# attente max (s) de nouvelles activités après chaque scroll
+scroll_step_timeout = 10
+# nombre de scrolls sans nouvelle activité avant arrêt
+scroll_patience = 2
+# vider dans le navigateur les activités déjà lues (mémoire constante)
+scroll_discard_dom = True
+
+# Enchaînement des étapes (voir python_functions.get_syride_traces)
+# "pipeline" : découverte, détail et téléchargements en flux (scrape_pipeline.py)
+# "phases" : chaque étape attend la fin de la précédente
+scrape_mode = "pipeline"
+# taille des files entre deux étapes du pipeline
+pipeline_queue_size = 32
+
+# Découverte des activités (voir python_functions.get_all_navs)
+# "selenium" : page pilote défilée dans Chrome
+# "http" : pagination du fil d'activités en HTTP, sans navigateur, repli sur
+# "selenium" si une requête échoue ; demande feed_url
+discovery_backend = "selenium"
+# URL de la pagination du fil d'activités d'un pilote ; {pilote} et {page}
+# sont remplacés. syride ne documente pas cette URL : aucune valeur n'est
+# fournie, elle doit être relevée dans l'onglet réseau du navigateur en
+# défilant une page pilote. Obligatoire avec discovery_backend = "http".
+feed_url = None
+# numéro de la première page du fil
+feed_first_page = 1
+# parseur des activités (voir activity_parser.py) :
+# "html.parser", "lxml" ou "selectolax" (html.parser si non installé)
+activity_parser_backend = "lxml"
+
+# Pages de détail (voir python_functions.get_zip_adresses)
+# "http" : iframes téléchargées en parallèle, navigateur si JavaScript requis
+detail_backend = "http"
+# nombre de pages de détail téléchargées simultanément
+detail_concurrency = 8
+
+# Téléchargement des archives ZIP (voir python_functions.download_all_traces)
+# nombre de téléchargements simultanés
+download_concurrency = 4
+# taille (octets) des blocs lus dans le flux de la réponse
+download_chunk_size = 64 * 1024
+# au-delà de cette taille (octets), l'archive est mise dans un fichier temporaire
+download_spool_size = 8 * 1024 * 1024
+
+# Session HTTP (voir http_session.py)
+# nombre de connexions gardées ouvertes par hôte
+http_pool_size = 10
+# délai max (s) d'une requête
+http_timeout = 30
+
+# Limitation de débit et reprises (voir rate_limit.py), communes à la
+# découverte, aux pages de détail et aux téléchargements (tous processus confondus)
+# requêtes par seconde en régime établi
+rate_limit_per_s = 5
+# rafale maximale de requêtes
+rate_limit_burst = 10
+# nombre total de tentatives par requête
+retry_max_attempts = 5
+# attente de base et attente max (s) entre deux tentatives
+retry_base_delay = 1.0
+retry_max_delay = 60.0
 
 # Paramètre si en ligne ou non
 online = 0
@@ -1,33 +1,56 @@
 """
 Fonctions utilisées dans le scraping de syride :
+    - count_activities
+    - has_known_activity
+    - wait_for_growth
+    - pull_new_activities
+    - iter_scroll
     - scroll_to_bottom
     - get_filename_without_extension
-    - extract_site
-    - extract_date_heure
-    - extract_flight_data
-    - extract_flight_data2
+    - parse_activities
+    - iter_navs_selenium
+    - get_all_navs_selenium
+    - iter_feed_pages
+    - get_all_navs_http
+    - iter_new_navs
     - get_all_navs
     - get_nav_infos_bs
+    - set_detail_fields
+    - set_empty_detail_fields
+    - record_detail
+    - parse_detail_page
+    - fetch_detail_http
+    - get_zip_adresses_selenium
+    - get_zip_adresses_http
+    - fetch_detail
+    - fetch_detail_browser
     - get_zip_adresses
     - download_traces
+    - save_trace
+    - download_all_traces
     - initiate_search
+    - run_pipeline
     - get_syride_traces
+    - scrape_new_traces
+    - scrape_pilot
 """
 
 # ------------------------ Imports -----------------------
 
+import contextlib
+import io
+import tempfile
 import zipfile
 import os
 import time
 import json
 import traceback
-import re
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote, urljoin
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
 
 # from selenium.webdriver.remote.webelement import WebElement
 
@@ -39,22 +62,189 @@ from selenium.common.exceptions import (
     StaleElementReferenceException,
 )
 
+from driver_pool import DriverPool, create_pool, get_default_pool
+from http_session import fetch_text, get_default_session, request
+from rate_limit import get_default_limiter
+from scrape_manifest import (
+    DETAIL_FETCHED,
+    DISCOVERED,
+    EXTRACTED,
+    JSON_SAVED,
+    ZIP_DOWNLOADED,
+    ScrapeManifest,
+)
+import activity_parser
+from activity_parser import extract_site  # noqa: F401 (notebooks)
+import flight_fields
+import instrumentation
+import flight_log
+import params_scrap_syride as params
+import scrape_pipeline
+import trace_index
+
 # ------------------------ Functions -----------------------
 
 
-def scroll_to_bottom(driver: webdriver, nb_scroll: int = 40):
+# Nombre de noeuds d'activité (id="activite<num>") présents dans la page
+JS_COUNT_ACTIVITIES = """
+return Array.from(document.querySelectorAll('[id^="activite"]'))
+    .filter(e => /^activite\\d+$/.test(e.id)).length;
+"""
+
+
+# Numéros d'activité (id="type<num>") présents dans la page
+JS_ACTIVITY_NUMBERS = """
+return Array.from(document.querySelectorAll('[id^="type"]'))
+    .map(e => e.id).filter(id => /^type\\d+$/.test(id))
+    .map(id => id.slice(4));
+"""
+
+
+# Code HTML des activités à partir de la position arguments[0] ;
+# si arguments[1], les noeuds sérialisés sont vidés (hauteur conservée)
+JS_PULL_ACTIVITIES = """
+const nodes = Array.from(document.querySelectorAll('[id^="activite"]'))
+    .filter(e => /^activite\\d+$/.test(e.id)).slice(arguments[0]);
+const html = nodes.map(e => e.outerHTML);
+if (arguments[1]) {
+    nodes.forEach(e => {
+        e.style.height = e.offsetHeight + 'px';
+        e.innerHTML = '';
+    });
+}
+return html;
+"""
+
+
+def count_activities(driver: webdriver) -> int:
     """
-    Faire défiler la page jusqu'en bas.
+    Compte les activités chargées dans la page.
     """
+    return driver.execute_script(JS_COUNT_ACTIVITIES)
 
-    # Utiliser la touche End pour faire défiler jusqu'en bas
-    print(f"Scrolling (total : {nb_scroll})...")
-    for i in range(nb_scroll):
-        print(f"{i+1} ", end="", flush=True)
-        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.END)
-        time.sleep(2)  # Attendre pour permettre le chargement du contenu
-    print("")
-    time.sleep(30)
+
+def has_known_activity(driver: webdriver, known_traces: set) -> bool:
+    """
+    Indique si une activité déjà téléchargée est chargée dans la page.
+    """
+    return any(
+        num in known_traces for num in driver.execute_script(JS_ACTIVITY_NUMBERS)
+    )
+
+
+def wait_for_growth(
+    driver: webdriver, count: int, timeout: float, poll_interval: float = 0.25
+) -> int:
+    """
+    Attend que le nombre d'activités dépasse count, au plus timeout secondes.
+    Retourne le nombre d'activités observé en dernier.
+    """
+    deadline = time.perf_counter() + timeout
+    new_count = count_activities(driver)
+    while new_count <= count and time.perf_counter() < deadline:
+        time.sleep(poll_interval)
+        new_count = count_activities(driver)
+    return new_count
+
+
+def pull_new_activities(driver: webdriver, start: int, discard: bool = True) -> list:
+    """
+    Sérialise dans le navigateur les activités à partir de la position
+    start (les activités plus anciennes ont déjà été traitées). Si discard,
+    le contenu des noeuds sérialisés est vidé (hauteur conservée pour ne pas
+    perturber le défilement) : le DOM ne grossit plus avec l'historique.
+    """
+    return driver.execute_script(JS_PULL_ACTIVITIES, start, discard)
+
+
+def iter_scroll(
+    driver: webdriver,
+    nb_scroll: int = 40,
+    step_timeout: float = 10,
+    patience: int = 1,
+    stats: dict = None,
+):
+    """
+    Générateur de défilement : produit le nombre d'activités chargées après
+    le premier chargement, puis après chaque défilement qui a fait grandir
+    la liste. Le consommateur arrête le défilement en sortant de sa boucle.
+
+    Après chaque appui sur End, on attend que la liste des activités
+    grandisse (au plus step_timeout secondes). Le défilement s'arrête
+    quand la liste ne grandit plus pendant patience étapes
+    ou quand nb_scroll défilements ont été faits.
+
+    Si stats est fourni, il reçoit nb_scroll (défilements effectués),
+    duration (s) et count (activités chargées).
+    """
+    if stats is None:
+        stats = {}
+    tic = time.perf_counter()
+    nb_done = 0
+    count = 0
+
+    try:
+        # Attendre le premier lot d'activités
+        count = wait_for_growth(driver, count=0, timeout=step_timeout)
+        yield count
+
+        # Utiliser la touche End pour faire défiler jusqu'en bas
+        print(f"Scrolling (max : {nb_scroll})...")
+        nb_stalls = 0
+        while nb_done < nb_scroll and nb_stalls < patience:
+            nb_done += 1
+            print(f"{nb_done} ", end="", flush=True)
+            driver.find_element(By.TAG_NAME, "body").send_keys(Keys.END)
+            new_count = wait_for_growth(driver, count=count, timeout=step_timeout)
+            if new_count > count:
+                nb_stalls = 0
+                count = new_count
+                yield count
+            else:
+                nb_stalls += 1
+    finally:
+        print("")
+        duration = time.perf_counter() - tic
+        stats.update({"nb_scroll": nb_done, "duration": duration, "count": count})
+        print(f"{nb_done} scroll(s) en {duration:.1f}s, {count} activités chargées.")
+
+
+def scroll_to_bottom(
+    driver: webdriver,
+    nb_scroll: int = 40,
+    step_timeout: float = 10,
+    patience: int = 1,
+    known_traces: set = None,
+):
+    """
+    Faire défiler la page jusqu'en bas (voir iter_scroll).
+
+    Si known_traces est fourni, le défilement s'arrête dès qu'une activité
+    déjà téléchargée apparaît (les activités sont listées de la plus récente
+    à la plus ancienne).
+
+    returns:
+    -----------
+    * nb_done: int
+        nombre de défilements effectués.
+    * duration: float
+        temps passé (s).
+    """
+    stats = {}
+    with contextlib.closing(
+        iter_scroll(
+            driver,
+            nb_scroll=nb_scroll,
+            step_timeout=step_timeout,
+            patience=patience,
+            stats=stats,
+        )
+    ) as scroller:
+        for _ in scroller:
+            if known_traces and has_known_activity(driver, known_traces):
+                print("Activité déjà téléchargée atteinte, arrêt du défilement.")
+                break
+    return stats["nb_scroll"], stats["duration"]
 
 
 def get_filename_without_extension(url: str) -> str:
@@ -72,567 +262,824 @@ def get_filename_without_extension(url: str) -> str:
     return filename_parts[0]
 
 
-def extract_site(text: str) -> str:
+def parse_activities(page_content: str, pilote: str, backend: str = None) -> dict:
     """
-    Fonction permettant d'extraire le nom du site
-    lorsqu'il est précédé de "à" et suivi de "("
+    Parse une page (ou un fragment de page) et retourne les activités
+    trouvées sous la forme {num_activite: dict_activity}
+    (voir activity_parser).
     """
-    # Trouver l'index du premier "à" dans la chaîne
-    index_de_a = text.find("à")
+    if backend is None:
+        backend = params.activity_parser_backend
+    return activity_parser.parse_activities(
+        page_content=page_content, pilote=pilote, backend=backend
+    )
 
-    # Trouver l'index de la première parenthèse ouvrante "(" après le premier "à"
-    index_premiere_parenthese = text.find("(", index_de_a)
 
-    # Extraire le texte entre le premier "à" et la première parenthèse
-    texte_extrait = text[index_de_a + 1 : index_premiere_parenthese].strip()
+def iter_navs_selenium(
+    pilote: str,
+    known_traces: list,
+    nb_scroll: int,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    pool: DriverPool = None,
+    discard_dom: bool = None,
+):
+    """
+    Générateur du backend de découverte selenium : charge la page du pilote
+    dans un navigateur du pool et la fait défiler. Après chaque défilement,
+    seules les activités nouvellement ajoutées sont sérialisées dans le
+    navigateur, parsées comme un fragment séparé et produites aussitôt ;
+    la page entière (page_source) n'est jamais relue. S'arrête dès qu'une
+    activité déjà téléchargée apparaît.
+    """
+    if pool is None:
+        pool = get_default_pool()
+    if discard_dom is None:
+        discard_dom = params.scroll_discard_dom
 
-    return texte_extrait
+    url = base_url + pilote
+    known_traces = set(known_traces)
+
+    with pool.session() as driver:
+        get_default_limiter().acquire()
+        driver.get(url)
+
+        # Faire défiler jusqu'en bas de la page
+        driver.implicitly_wait(600)
+        nb_processed = 0
+        with contextlib.closing(
+            iter_scroll(
+                driver,
+                nb_scroll=nb_scroll,
+                step_timeout=params.scroll_step_timeout,
+                patience=params.scroll_patience,
+            )
+        ) as scroller:
+            for _ in scroller:
+                fragments = pull_new_activities(
+                    driver, start=nb_processed, discard=discard_dom
+                )
+                nb_processed += len(fragments)
+                dict_batch = parse_activities(
+                    page_content="".join(fragments), pilote=pilote
+                )
+                yield dict_batch
+                if any(num in known_traces for num in dict_batch):
+                    print("Activité déjà téléchargée atteinte, arrêt du défilement.")
+                    break
 
 
-def extract_date_heure(date_h_data: str) -> str:
+def get_all_navs_selenium(
+    pilote: str,
+    known_traces: list,
+    nb_scroll: int,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    pool: DriverPool = None,
+) -> dict:
     """
-    Fonction permettant d'extraire la date et
-    l'heure du vol
+    Backend de découverte selenium (voir iter_navs_selenium),
+    tous lots réunis.
     """
-    try:
-        date_h_temp = date_h_data.split(":")[1]
-        date_h = date_h_temp.split(" ")
-    except Exception:
-        print("", "\n", traceback.format_exc())
-        date_h = ["None", "None", "None", "None"]
-
-    date = date_h[1]
+    dict_navs = {}
+    for dict_batch in iter_navs_selenium(
+        pilote=pilote,
+        known_traces=known_traces,
+        nb_scroll=nb_scroll,
+        base_url=base_url,
+        pool=pool,
+    ):
+        dict_navs.update(dict_batch)
+    return dict_navs
+
+
+def iter_feed_pages(
+    pilote: str,
+    known_traces: list,
+    nb_pages: int,
+    feed_url: str,
+    first_page: int = 1,
+    session: requests.Session = None,
+):
+    """
+    Générateur du backend de découverte HTTP : appelle directement la
+    pagination du fil d'activités (feed_url, où {pilote} et {page} sont
+    remplacés) et produit les activités de chaque page dès qu'elle est
+    parsée. S'arrête sur une page vide, dès qu'une activité déjà
+    téléchargée apparaît ou après nb_pages pages.
+    """
+    if session is None:
+        session = get_default_session()
+
+    known_traces = set(known_traces)
+    nb_activities = 0
+    tic = time.perf_counter()
+
+    print(f"Lecture du fil d'activités (max : {nb_pages} pages)...")
+    for page in range(first_page, first_page + nb_pages):
+        print(f"{page} ", end="", flush=True)
+        url = feed_url.format(pilote=quote(pilote), page=page)
+        page_content = fetch_text(session=session, url=url)
+
+        dict_page = parse_activities(page_content=page_content, pilote=pilote)
+        if len(dict_page) == 0:
+            break
+        nb_activities += len(dict_page)
+        yield dict_page
+        if any(num in known_traces for num in dict_page):
+            print("")
+            print("Activité déjà téléchargée atteinte, arrêt de la lecture.")
+            break
+    print("")
 
-    try:
-        heure = date_h[3]
-    except Exception:
-        heure = ""
-    return date, heure
+    duration = time.perf_counter() - tic
+    print(f"{nb_activities} activités lues en {duration:.1f}s.")
 
 
-def extract_flight_data(data: list) -> str:
+def get_all_navs_http(
+    pilote: str,
+    known_traces: list,
+    nb_pages: int,
+    feed_url: str,
+    first_page: int = 1,
+    session: requests.Session = None,
+) -> dict:
     """
-    Fonction permettant d'extraire les données du vol
+    Backend de découverte HTTP (voir iter_feed_pages), toutes pages réunies.
     """
+    dict_navs = {}
+    for dict_page in iter_feed_pages(
+        pilote=pilote,
+        known_traces=known_traces,
+        nb_pages=nb_pages,
+        feed_url=feed_url,
+        first_page=first_page,
+        session=session,
+    ):
+        dict_navs.update(dict_page)
+    return dict_navs
+
+
+def iter_new_navs(
+    pilote: str,
+    known_traces: list,
+    scroll: int,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    pool: DriverPool = None,
+    backend: str = None,
+    feed_url: str = None,
+    session: requests.Session = None,
+):
+    """
+    Générateur des nouvelles activités, par lots : un lot par page du
+    fil (backend "http") ou par défilement (backend "selenium"). Les
+    activités déjà téléchargées et celles qui ne sont pas un vol sont
+    écartées. En cas de repli sur selenium, des activités déjà produites
+    peuvent l'être à nouveau.
+    """
+    if backend is None:
+        backend = params.discovery_backend
+    if feed_url is None:
+        feed_url = params.feed_url
 
-    def extract_flight_time(fl_time_data: str) -> str:
-        """
-        Fonction permettant d'extraire la durée du vol
-        """
-        try:
-            fl_time_temp = fl_time_data.split(":")[1:]
-            fl_time = fl_time_temp[0] + ":" + fl_time_temp[1] + ":" + fl_time_temp[2]
-            fl_time = fl_time[1:-1]
-        except Exception:
-            print("", "\n", traceback.format_exc())
-            fl_time = "None"
-        return fl_time
-
-    def extract_voile(voile_data: str) -> str:
-        """
-        Fonction permettant d'extraire la voile utilisée
-        """
-        try:
-            voile_data_temp = voile_data.split(":")[1]
-            index_premiere_parenthese = voile_data_temp.find("(")
-            voile = voile_data_temp[1 : index_premiere_parenthese - 1]
-        except Exception:
-            print("", "\n", traceback.format_exc())
-            voile = "None"
-        return voile
+    # Le défilement s'arrête de lui-même dès qu'une trace connue apparaît,
+    # scroll ne sert plus que de plafond.
+    if scroll == -1:
+        nb_scroll = 40
+    else:
+        nb_scroll = scroll
 
-    def extract_distance(distance_data: str) -> str:
-        """
-        Fonction permettant d'extraire la distance parcourue
-        """
-        try:
-            distance_data_temp = distance_data.split(":")[1]
-            distance = distance_data_temp[1:-2]
-        except Exception:
-            print("", "\n", traceback.format_exc())
-            distance = "None"
-        return distance
+    def new_navs(dict_navs: dict) -> dict:
+        # On supprime toutes les activités déjà téléchargées
+        # et les activité qui ne sont pas un vol.
+        return {
+            key: value
+            for key, value in dict_navs.items()
+            if key not in known_traces and key != "None"
+        }
+
+    if backend not in ("http", "selenium"):
+        raise ValueError(f"Backend de découverte inconnu : {backend}")
+    if backend == "http" and not feed_url:
+        raise ValueError(
+            'Backend de découverte "http" sans feed_url : renseigner '
+            'params.feed_url ou utiliser le backend "selenium".'
+        )
 
-    def extract_alt_max(altitude_data: str) -> str:
-        """
-        Fonction permettant d'extraire l'altitude maximale
-        """
+    if backend == "http":
         try:
-            altitude_data_temp = altitude_data.split(":")[1]
-            altitude = altitude_data_temp[1:-1]
+            for dict_page in iter_feed_pages(
+                pilote=pilote,
+                known_traces=known_traces,
+                nb_pages=nb_scroll + 1,
+                feed_url=feed_url,
+                first_page=params.feed_first_page,
+                session=session,
+            ):
+                yield new_navs(dict_page)
+            return
         except Exception:
             print("", "\n", traceback.format_exc())
-            altitude = "None"
-        return altitude
+            print("Échec du backend http, repli sur selenium.")
 
-    def extract_instrument(instrument_data: str) -> str:
-        """
-        Fonction permettant d'extraire l'instrument utilisé
-        """
-        try:
-            instrument_data_temp = instrument_data.split(":")[1]
-            index_premiere_parenthese = instrument_data_temp.find("(")
-            instrument = instrument_data_temp[1 : index_premiere_parenthese - 1]
-        except Exception:
-            print("", "\n", traceback.format_exc())
-            instrument = "None"
-        return instrument
-
-    date = None
-    heure = None
-    flight_time = None
-    voile = None
-    distance = None
-    # altitude = None
-    instrument = None
-
-    for item in data:
-        if item.startswith("Date :"):
-            date, heure = extract_date_heure(date_h_data=item)
-        elif item.startswith("Temps de vol :"):
-            flight_time = extract_flight_time(fl_time_data=item)
-        elif item.startswith("Voile utilisée :"):
-            voile = extract_voile(voile_data=item)
-        elif item.startswith("Distance parcourue :"):
-            distance = extract_distance(distance_data=item)
-        elif item.startswith("Instrument utilisé :"):
-            instrument = extract_instrument(instrument_data=item)
-
-    return date, heure, flight_time, voile, distance, instrument
-
-
-def extract_flight_data2(flight_data: str):
-    def extract_text_flight_data(text: str, ind_end: int, ind_start: int = 1):
-        try:
-            text_temp = text.split(":")[1]
-            text = text_temp[ind_start:-ind_end]
-        except Exception as excep:
-            print(str(excep))
-            text = "None"
-        return text
-
-    def extract_site(text: str) -> str:
-        try:
-            # Trouver l'index du premier ":" puis 1ere parenthese dans la chaîne
-            index_de_ponct = text.find(":")
-            index_premiere_parenthese = text.find("(", index_de_ponct)
-            # Extraire le texte entre le premier ":" et la première parenthèse
-            texte_extrait = text[index_de_ponct + 1 : index_premiere_parenthese].strip()
-        except Exception as excep:
-            print(str(excep))
-            texte_extrait = "None"
-        return texte_extrait
-
-    def extract_flight_duration(fl_time_data: str) -> str:
-        try:
-            fl_time_temp = fl_time_data.split(":")[1:]
-            fl_time = fl_time_temp[0] + ":" + fl_time_temp[1] + ":" + fl_time_temp[2]
-            fl_time = fl_time[1:-1]
-        except Exception as excep:
-            print(str(excep))
-            fl_time = "None"
-        return fl_time
-
-    date_act = (None,)
-    site_deco = (None,)
-    distance = (None,)
-    distance_cumulee = (None,)
-    vitesse_max = (None,)
-    vitesse_moyenne = (None,)
-    plafond = (None,)
-    gain = (None,)
-    flight_duration = (None,)
-    vario_max = (None,)
-    g_max = (None,)
-
-    for data in flight_data:
-        if data.startswith("Date :"):
-            date_act = data.split(":")[1].strip()
-        elif data.startswith("Décollage :"):
-            site_deco = extract_site(flight_data[1])
-        elif data.startswith("Distance :"):
-            distance = extract_text_flight_data(text=data, ind_end=2)
-        elif data.startswith("Distance cumulée :"):
-            distance_cumulee = extract_text_flight_data(text=data, ind_end=2)
-        elif data.startswith("Vitesse max :"):
-            vitesse_max = extract_text_flight_data(text=data, ind_end=4)
-        elif data.startswith("Vitesse moyenne :"):
-            vitesse_moyenne = extract_text_flight_data(text=data, ind_end=4)
-        elif data.startswith("Plafond :"):
-            plafond = extract_text_flight_data(text=data, ind_end=1)
-        elif data.startswith("Gain :"):
-            gain = extract_text_flight_data(text=data, ind_end=1)
-        elif data.startswith("Temps de vol :"):
-            flight_duration = extract_flight_duration(fl_time_data=data)
-        elif data.startswith("Vario max :"):
-            vario_max = extract_text_flight_data(text=data, ind_end=3)
-        elif data.startswith("G max :"):
-            g_max = extract_text_flight_data(text=data, ind_end=1)
-
-    return (
-        date_act,
-        site_deco,
-        distance,
-        distance_cumulee,
-        vitesse_max,
-        vitesse_moyenne,
-        plafond,
-        gain,
-        flight_duration,
-        vario_max,
-        g_max,
-    )
+    for dict_batch in iter_navs_selenium(
+        pilote=pilote,
+        known_traces=known_traces,
+        nb_scroll=nb_scroll,
+        base_url=base_url,
+        pool=pool,
+    ):
+        yield new_navs(dict_batch)
 
 
+@instrumentation.instrument
 def get_all_navs(
     pilote: str,
     known_traces: list,
     scroll: int,
     base_url: str = "https://www.syride.com/fr/pilotes/",
+    pool: DriverPool = None,
+    backend: str = None,
+    feed_url: str = None,
+    session: requests.Session = None,
 ) -> list:
     """
     Fonction utilisée pour identifier toutes les traces disponibles.
+
+    backend (params.discovery_backend par défaut) :
+        * "http" : pagination du fil d'activités en HTTP simple,
+          avec repli sur selenium en cas d'échec ; feed_url
+          (params.feed_url par défaut) est alors obligatoire ;
+        * "selenium" : page du pilote rendue et défilée dans Chrome.
     """
+    dict_navs = {}
+    for batch in iter_new_navs(
+        pilote=pilote,
+        known_traces=known_traces,
+        scroll=scroll,
+        base_url=base_url,
+        pool=pool,
+        backend=backend,
+        feed_url=feed_url,
+        session=session,
+    ):
+        dict_navs.update(batch)
 
-    # Configuration de Selenium
-    chrome_options = Options()
-    chrome_options.add_argument(
-        "--headless"
-    )  # Exécuter le navigateur en mode headless (sans interface graphique)
-    webdriver_path = "/Users/Adrien/Documents/paramoteur/syride/analyze_traces/chromedriver-mac-x64/chromedriver"
-    chrome_service = Service(webdriver_path)
-    driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
+    final_list = list(set(dict_navs.keys()))
 
-    url = base_url + pilote
-    dict_navs = {}
+    print(f"{len(final_list)} nouvelles traces trouvées.")
+
+    return final_list, dict_navs
 
-    driver.get(url)
 
-    if scroll == -1:
-        if len(known_traces) >= 1:
-            nb_scroll = 3
-        else:
-            nb_scroll = 40
-    else:
-        nb_scroll = scroll
+def get_nav_infos_bs(activity: BeautifulSoup, pilote: str):
+    """
+    Données d'une activité BeautifulSoup, en un seul parcours
+    (voir activity_parser).
+    """
+    return activity_parser.build_resultats(
+        pilote=pilote, **activity_parser.scan_bs(activity=activity)
+    )
 
-    # Faire défiler jusqu'en bas de la page
-    driver.implicitly_wait(600)
-    scroll_to_bottom(driver, nb_scroll=nb_scroll)
 
-    page_content = driver.page_source
+# Champs lus dans les lignes volTexte (voir flight_fields.DETAIL_REGISTRY)
+DETAIL_FIELDS = flight_fields.DETAIL_REGISTRY.columns
+
+
+def set_detail_fields(dict_nav: dict, liens_download_zip: list, flight_datas: list):
+    """
+    Complète une activité avec les données de sa page de détail
+    (lignes volTexte) et l'adresse du fichier ZIP.
+    """
+    dict_nav.update(flight_fields.DETAIL_REGISTRY.parse(flight_datas))
+    dict_nav[flight_fields.DETAIL_REGISTRY.raw_column] = flight_datas
+    dict_nav["adresse_zip"] = liens_download_zip[0]
+    return dict_nav
+
+
+def set_empty_detail_fields(dict_nav: dict):
+    """
+    Activité sans page de détail exploitable.
+    """
+    for field in DETAIL_FIELDS:
+        dict_nav[field] = None
+    dict_nav[flight_fields.DETAIL_REGISTRY.raw_column] = None
+    dict_nav["adresse_zip"] = None
+    return dict_nav
+
+
+def record_detail(manifest: ScrapeManifest, trace: str, dict_nav: dict):
+    """
+    Enregistre dans le manifeste qu'une page de détail a été exploitée.
+    Une trace syride sans adresse de ZIP reste à l'étape découverte
+    pour être retentée au prochain run.
+    """
+    if manifest is None:
+        return
+    if dict_nav["is_syride"] is not True or dict_nav["adresse_zip"] is not None:
+        manifest.record(trace, DETAIL_FETCHED, dict_nav)
+
+
+def parse_detail_page(page_content: str, page_url: str):
+    """
+    Parse le document de l'iframe de détail d'une activité.
+
+    returns:
+    -----------
+    * (liens_download_zip, flight_datas) ou None si le document ne contient
+    pas les données (page construite en JavaScript).
+    """
     soup = BeautifulSoup(page_content, "html.parser")
-    driver.quit()
+    liens_download_zip = [
+        urljoin(page_url, lien["href"])
+        for lien in soup.find_all("a", href=True)
+        if "downloadZIP" in lien["href"]
+    ]
+    # Texte normalisé comme le nom accessible lu par selenium
+    flight_datas = [
+        " ".join(element.get_text(" ").split())
+        for element in soup.find_all(class_="volTexte")
+    ]
+    if len(liens_download_zip) == 0 or len(flight_datas) == 0:
+        return None
+    return liens_download_zip, flight_datas
+
+
+def fetch_detail_http(session: requests.Session, url: str):
+    """
+    Récupère en HTTP la page d'une activité puis le document de son
+    iframe popupIframe. Retourne None si la page nécessite JavaScript.
+    """
+    page_content = fetch_text(session=session, url=url)
+    iframe = BeautifulSoup(page_content, "html.parser").find(id="popupIframe")
+    if iframe is None or not iframe.get("src"):
+        return None
 
-    id_pattern = re.compile(r"^activite\d{5,10}$")
-    activities = soup.find_all(id=id_pattern)
+    iframe_url = urljoin(url, iframe["src"])
+    iframe_content = fetch_text(session=session, url=iframe_url)
+    return parse_detail_page(page_content=iframe_content, page_url=iframe_url)
 
-    for activity in activities:
-        try:
-            num_activite, dict_activity = get_nav_infos_bs(
-                activity=activity, pilote=pilote
-            )
-            dict_navs[f"{num_activite}"] = dict_activity
-        except Exception:
-            print("", "\n", traceback.format_exc())
-            pass
-
-    # On supprime toutes les activités déjà téléchargées
-    # et les activité qui ne sont pas un vol.
-    dict_navs = {
-        key: value
-        for key, value in dict_navs.items()
-        if key not in known_traces and key != "None"
-    }
 
-    final_list = list(set(dict_navs.keys()))
+def get_zip_adresses_selenium(
+    pilote: str,
+    traces: dict,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    pool: DriverPool = None,
+    manifest: ScrapeManifest = None,
+) -> dict:
+    """
+    Backend de détail selenium : charge chaque page d'activité dans
+    un navigateur du pool et lit le contenu de l'iframe.
+    """
+    if pool is None:
+        pool = get_default_pool()
 
-    print(f"{len(final_list)} nouvelles traces trouvées.")
+    # Charger la page
+    url = base_url + pilote
 
-    return final_list, dict_navs
+    updated_dict_navs = {}
+    with pool.session() as driver:
+        for i, dict_nav in enumerate(traces.items()):
+            trace = dict_nav[0]
+            dict_nav = dict_nav[1]
+            print(f"{i+1} ", end="", flush=True)
 
+            if dict_nav["is_syride"] is True:
+                url1 = url + "/" + trace
 
-def get_nav_infos_bs(activity: BeautifulSoup, pilote: str):
-    def get_activity_number(activity_id: str):
-        id_activity = activity_id.replace("activite", "")
-        return id_activity
+                get_default_limiter().acquire()
+                driver.get(url1)
 
-    resultats = {}
+                try:
+                    iframe_selector = "popupIframe"
+                    iframe = driver.find_element(By.ID, iframe_selector)
 
-    try:
-        # Trouver le numéro d'activité
-        id_activity = get_activity_number(
-            activity_id=activity.get("id"),
-        )
-    except Exception:
-        print("", "\n", traceback.format_exc())
-        id_activity = "None"
-
-    # identifier s'il s'agit d'une trace syride ou non
-    element = activity.find(class_="photoGps")
-    if element is not None:
-        is_syride = True
-    else:
-        is_syride = False
+                    # Basculer vers l'iframe
+                    driver.switch_to.frame(iframe)
 
-    # identifier le numero d'activite et le type de vol
-    try:
-        type_pattern = re.compile(r"^type\d{5,10}$")
-        elements_type_temp = activity.find(id=type_pattern)
-        elements_type = elements_type_temp.text
-        if "\n" in elements_type:
-            elements_type = elements_type.replace("\n", "")
-        if "\t" in elements_type:
-            elements_type = elements_type.replace("\t", "")
-        num_activite_temp = elements_type_temp.get("id")
-        num_activite = num_activite_temp.replace("type", "")
-    except Exception:
-        print(f"activite{id_activity}: Ceci n'est pas un vol")
-        print("", "\n", traceback.format_exc())
-        elements_type = "None"
-        num_activite = "None"
-
-    # identifier l'id du nom du site
-    try:
-        site_pattern = re.compile(r"^site\d{5,10}$")
-        site_name_temp = activity.find(id=site_pattern)
-    except Exception:
-        print("", "\n", traceback.format_exc())
-        site_name_temp = "None"
-
-    # Récupérer les éléments de l'activté
-    ul_elements = activity.find_all("ul")
-    liste_data = [element.text for element in ul_elements]
-
-    # Récupérer les éléments en fonction de is_syride
-    if is_syride is True:
-        if site_name_temp != "None":
-            try:
-                site_name = extract_site(text=site_name_temp.text)
-            except Exception:
-                print("", "\n", traceback.format_exc())
-                site_name = "None"
-        else:
-            site_name = "None"
+                    liens_iframe = driver.find_elements(By.TAG_NAME, "a")
+                    liens_download_zip = [
+                        lien.get_attribute("href")
+                        for lien in liens_iframe
+                        if "downloadZIP" in lien.get_attribute("href")
+                    ]
 
-        (
-            date,
-            heure,
-            flight_time,
-            voile,
-            distance,
-            instrument,
-        ) = extract_flight_data(data=liste_data)
+                    flight_datas_temp = driver.find_elements(By.CLASS_NAME, "volTexte")
+                    # flight_datas = [element.text for element in flight_datas_temp]
+                    flight_datas = [
+                        element.accessible_name for element in flight_datas_temp
+                    ]
 
-    else:
-        if site_name_temp != "None":
+                    updated_dict_navs[trace] = set_detail_fields(
+                        dict_nav=dict_nav,
+                        liens_download_zip=liens_download_zip,
+                        flight_datas=flight_datas,
+                    )
+
+                    driver.switch_to.default_content()
+                except (
+                    NoSuchElementException,
+                    StaleElementReferenceException,
+                    Exception,
+                ):
+                    updated_dict_navs[trace] = set_empty_detail_fields(dict_nav)
+                    driver.switch_to.default_content()
+            else:
+                updated_dict_navs[trace] = set_empty_detail_fields(dict_nav)
+
+            record_detail(manifest, trace, updated_dict_navs[trace])
+
+    print("")
+
+    return updated_dict_navs
+
+
+def get_zip_adresses_http(
+    pilote: str,
+    traces: dict,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    concurrency: int = 8,
+    session: requests.Session = None,
+    manifest: ScrapeManifest = None,
+) -> tuple:
+    """
+    Backend de détail HTTP : télécharge les documents des iframes de
+    détail en parallèle (concurrency requêtes simultanées) sur la session
+    partagée.
+
+    returns:
+    -----------
+    * updated_dict_navs: dict
+        activités complétées.
+    * js_traces: dict
+        activités dont la page nécessite un navigateur.
+    """
+    if session is None:
+        session = get_default_session()
+
+    url = base_url + pilote
+
+    updated_dict_navs = {}
+    js_traces = {}
+    for trace, dict_nav in traces.items():
+        if dict_nav["is_syride"] is not True:
+            updated_dict_navs[trace] = set_empty_detail_fields(dict_nav)
+            record_detail(manifest, trace, updated_dict_navs[trace])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                fetch_detail_http, session=session, url=url + "/" + quote(trace)
+            ): trace
+            for trace, dict_nav in traces.items()
+            if dict_nav["is_syride"] is True
+        }
+        for i, future in enumerate(as_completed(futures)):
+            print(f"{i+1} ", end="", flush=True)
+            trace = futures[future]
             try:
-                site_name = site_name_temp.text
+                result = future.result()
             except Exception:
                 print("", "\n", traceback.format_exc())
-                site_name = "None"
-        else:
-            site_name = "None"
-
-        (
-            date,
-            _,
-            flight_time,
-            voile,
-            _,
-            _,
-        ) = extract_flight_data(data=liste_data)
-        heure = "None"
-        distance = "None"
-        instrument = "None"
-
-    resultats["pilote"] = pilote
-    resultats["id_activite"] = id_activity
-    resultats["num_activite"] = num_activite
-    resultats["types"] = elements_type
-    resultats["site"] = site_name
-    resultats["date"] = date
-    resultats["heure"] = heure
-    resultats["flight_time"] = flight_time
-    resultats["voile"] = voile
-    resultats["distance"] = distance
-    resultats["instrument"] = instrument
-    resultats["is_syride"] = is_syride
-
-    return num_activite, resultats
+                result = None
+
+            if result is None:
+                js_traces[trace] = traces[trace]
+            else:
+                liens_download_zip, flight_datas = result
+                updated_dict_navs[trace] = set_detail_fields(
+                    dict_nav=traces[trace],
+                    liens_download_zip=liens_download_zip,
+                    flight_datas=flight_datas,
+                )
+                record_detail(manifest, trace, updated_dict_navs[trace])
+    print("")
 
+    return updated_dict_navs, js_traces
 
-def get_zip_adresses(
-    pilote: str, traces: dict, base_url: str = "https://www.syride.com/fr/pilotes/"
+
+@instrumentation.instrument
+def fetch_detail(
+    pilote: str,
+    trace: str,
+    dict_nav: dict,
+    base_url: str,
+    manifest: ScrapeManifest,
 ) -> dict:
     """
-    Récupère l'adresse du fichier ZIP
+    Page de détail d'une activité pour le pipeline (voir
+    scrape_pipeline.py), en HTTP. None si la page nécessite JavaScript
+    (voir fetch_detail_browser).
     """
-    chrome_options = Options()
-    chrome_options.add_argument(
-        "--headless"
-    )  # Exécuter le navigateur en mode headless (sans interface graphique)
-    webdriver_path = "/Users/Adrien/Documents/paramoteur/syride/analyze_traces/chromedriver-mac-x64/chromedriver"
-    chrome_service = Service(webdriver_path)
-    driver = webdriver.Chrome(service=chrome_service, options=chrome_options)
-    # driver = webdriver.Chrome(options=chrome_options)
+    if dict_nav["is_syride"] is not True:
+        dict_nav = set_empty_detail_fields(dict_nav)
+        record_detail(manifest, trace, dict_nav)
+        return dict_nav
 
-    # Charger la page
-    url = base_url + pilote
+    result = None
+    if params.detail_backend == "http":
+        try:
+            result = fetch_detail_http(
+                session=get_default_session(),
+                url=base_url + pilote + "/" + quote(trace),
+            )
+        except Exception:
+            print("", "\n", traceback.format_exc())
 
-    updated_dict_navs = {}
-    for i, dict_nav in enumerate(traces.items()):
-        trace = dict_nav[0]
-        dict_nav = dict_nav[1]
-        print(f"{i+1} ", end="", flush=True)
+    if result is None:
+        return None
 
-        if dict_nav["is_syride"] is True:
-            url1 = url + "/" + trace
+    liens_download_zip, flight_datas = result
+    dict_nav = set_detail_fields(
+        dict_nav=dict_nav,
+        liens_download_zip=liens_download_zip,
+        flight_datas=flight_datas,
+    )
+    record_detail(manifest, trace, dict_nav)
+    return dict_nav
 
-            driver.get(url1)
 
-            try:
-                iframe_selector = "popupIframe"
-                iframe = driver.find_element(By.ID, iframe_selector)
-
-                # Basculer vers l'iframe
-                driver.switch_to.frame(iframe)
-
-                liens_iframe = driver.find_elements(By.TAG_NAME, "a")
-                liens_download_zip = [
-                    lien.get_attribute("href")
-                    for lien in liens_iframe
-                    if "downloadZIP" in lien.get_attribute("href")
-                ]
-
-                flight_datas_temp = driver.find_elements(By.CLASS_NAME, "volTexte")
-                # flight_datas = [element.text for element in flight_datas_temp]
-                flight_datas = [
-                    element.accessible_name for element in flight_datas_temp
-                ]
-
-                (
-                    date_act,
-                    site_deco,
-                    distance,
-                    distance_cumulee,
-                    vitesse_max,
-                    vitesse_moyenne,
-                    plafond,
-                    gain,
-                    flight_duration,
-                    vario_max,
-                    g_max,
-                ) = extract_flight_data2(flight_data=flight_datas)
-
-                dict_nav["date_activite"] = date_act
-                dict_nav["site_activite"] = site_deco
-                dict_nav["distance_activite"] = distance
-                dict_nav["distance_cumulee"] = distance_cumulee
-                dict_nav["vitesse_max"] = vitesse_max
-                dict_nav["vitesse_moyenne"] = vitesse_moyenne
-                dict_nav["plafond"] = plafond
-                dict_nav["gain"] = gain
-                dict_nav["duree_vol"] = flight_duration
-                dict_nav["vario_max"] = vario_max
-                dict_nav["g_max"] = g_max
-                dict_nav["adresse_zip"] = liens_download_zip[0]
-
-                updated_dict_navs[trace] = dict_nav
-
-                driver.switch_to.default_content()
-            except (NoSuchElementException, StaleElementReferenceException, Exception):
-                dict_nav["date_activite"] = None
-                dict_nav["site_activite"] = None
-                dict_nav["distance_activite"] = None
-                dict_nav["distance_cumulee"] = None
-                dict_nav["vitesse_max"] = None
-                dict_nav["vitesse_moyenne"] = None
-                dict_nav["plafond"] = None
-                dict_nav["gain"] = None
-                dict_nav["duree_vol"] = None
-                dict_nav["vario_max"] = None
-                dict_nav["g_max"] = None
-                dict_nav["adresse_zip"] = None
-                updated_dict_navs[trace] = dict_nav
-                driver.switch_to.default_content()
-        else:
-            dict_nav["date_activite"] = None
-            dict_nav["site_activite"] = None
-            dict_nav["distance_activite"] = None
-            dict_nav["distance_cumulee"] = None
-            dict_nav["vitesse_max"] = None
-            dict_nav["vitesse_moyenne"] = None
-            dict_nav["plafond"] = None
-            dict_nav["gain"] = None
-            dict_nav["duree_vol"] = None
-            dict_nav["vario_max"] = None
-            dict_nav["g_max"] = None
-            dict_nav["adresse_zip"] = None
-
-            updated_dict_navs[trace] = dict_nav
+@instrumentation.instrument
+def fetch_detail_browser(
+    pilote: str,
+    trace: str,
+    dict_nav: dict,
+    base_url: str,
+    manifest: ScrapeManifest,
+    pool: DriverPool,
+) -> dict:
+    """
+    Page de détail d'une activité lue dans un navigateur de pool, pour le
+    pipeline. pool doit être distinct de celui de la découverte, dont le
+    navigateur reste pris pendant tout le défilement.
+    """
+    return get_zip_adresses_selenium(
+        pilote=pilote,
+        traces={trace: dict_nav},
+        base_url=base_url,
+        pool=pool,
+        manifest=manifest,
+    )[trace]
 
-    print("")
 
-    # Fermer le navigateur Selenium
-    driver.quit()
+@instrumentation.instrument
+def get_zip_adresses(
+    pilote: str,
+    traces: dict,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    pool: DriverPool = None,
+    backend: str = None,
+    concurrency: int = None,
+    session: requests.Session = None,
+    manifest: ScrapeManifest = None,
+) -> dict:
+    """
+    Récupère l'adresse du fichier ZIP et les données de détail de chaque
+    activité. Avec un manifeste, chaque activité est enregistrée dès que
+    sa page de détail est exploitée.
+
+    backend (params.detail_backend par défaut) :
+        * "http" : pages de détail téléchargées en parallèle
+          (params.detail_concurrency), le navigateur n'est utilisé que pour
+          les pages qui nécessitent JavaScript ;
+        * "selenium" : toutes les pages sont rendues dans Chrome.
+    """
+    if backend is None:
+        backend = params.detail_backend
+    if concurrency is None:
+        concurrency = params.detail_concurrency
+
+    if backend != "http":
+        return get_zip_adresses_selenium(
+            pilote=pilote,
+            traces=traces,
+            base_url=base_url,
+            pool=pool,
+            manifest=manifest,
+        )
 
-    return updated_dict_navs
+    updated_dict_navs, js_traces = get_zip_adresses_http(
+        pilote=pilote,
+        traces=traces,
+        base_url=base_url,
+        concurrency=concurrency,
+        session=session,
+        manifest=manifest,
+    )
+    if len(js_traces) > 0:
+        print(f"Repli navigateur pour {len(js_traces)} page(s)...")
+        updated_dict_navs.update(
+            get_zip_adresses_selenium(
+                pilote=pilote,
+                traces=js_traces,
+                base_url=base_url,
+                pool=pool,
+                manifest=manifest,
+            )
+        )
+
+    # Conserver l'ordre des activités
+    return {trace: updated_dict_navs[trace] for trace in traces}
 
 
-def download_traces(main_repertoire: str, nav: str, link: str):
+@instrumentation.instrument
+def download_traces(
+    main_repertoire: str,
+    nav: str,
+    link: str,
+    session: requests.Session = None,
+    chunk_size: int = None,
+    spool_size: int = None,
+    manifest: ScrapeManifest = None,
+):
     """
     Fonction utilisée pour télécharger les traces.
+
+    Le corps de la réponse est lu par blocs de chunk_size octets dans un
+    fichier temporaire gardé en mémoire jusqu'à spool_size octets (au-delà,
+    il est écrit dans le dossier "traces" du pilote), puis l'archive est
+    extraite dans traces/<nav>.
+
+    returns:
+    -----------
+    * stats: dict
+        octets téléchargés et latence (s) du fichier.
     """
+    if session is None:
+        session = get_default_session()
+    if chunk_size is None:
+        chunk_size = params.download_chunk_size
+    if spool_size is None:
+        spool_size = params.download_spool_size
 
     repertoire_extraction = main_repertoire + "/traces"
-    response = requests.get(link)
-
-    if response.status_code == 200:
-        # Spécifier le nom de fichier souhaité
-        nom_fichier_zip = nav + ".zip"
+    tic = time.perf_counter()
+
+    with request(session=session, url=link, stream=True) as response:
+        # Échec définitif après reprises : la trace est comptée en échec
+        response.raise_for_status()
+
+        nb_bytes = 0
+        with tempfile.SpooledTemporaryFile(
+            max_size=spool_size, dir=repertoire_extraction
+        ) as archive:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                archive.write(chunk)
+                nb_bytes += len(chunk)
+            archive.seek(0)
+            if manifest is not None:
+                manifest.record(nav, ZIP_DOWNLOADED)
+
+            # Extraire le contenu de l'archive zip dans le dossier "traces"
+            with zipfile.ZipFile(archive, "r") as zip_ref:
+                zip_ref.extractall(f"{repertoire_extraction}/{nav}")
+            # Fichiers existants réécrits sur place : dossier marqué pour
+            # trace_index
+            trace_index.touch_folder(directory=main_repertoire, name=nav)
+            if manifest is not None:
+                manifest.record(nav, EXTRACTED)
+
+    latency = time.perf_counter() - tic
+    print(f"Archive extraite dans le répertoire : {nav}")
+    return {"nav": nav, "bytes": nb_bytes, "latency": latency}
+
+
+@instrumentation.instrument
+def save_trace(
+    main_repertoire: str,
+    nav: str,
+    data_nav: dict,
+    session: requests.Session = None,
+    manifest: ScrapeManifest = None,
+):
+    """
+    Télécharge (trace syride) ou crée (autre activité) le dossier
+    d'une trace puis sauvegarde ses données de vol. Une archive déjà
+    extraite d'après le manifeste n'est pas retéléchargée.
+    """
+    stats = None
+    stage = manifest.get_stage(nav) if manifest is not None else 0
+    if data_nav["is_syride"] is True:
+        if stage < EXTRACTED:
+            stats = download_traces(
+                main_repertoire=main_repertoire,
+                nav=nav,
+                link=data_nav["adresse_zip"],
+                session=session,
+                manifest=manifest,
+            )
+    else:
+        if not os.path.exists(f"{main_repertoire}/traces/{nav}"):
+            os.makedirs(f"{main_repertoire}/traces/{nav}")
+
+    save_flight_data(main_repertoire=main_repertoire, flight_data=data_nav)
+    if manifest is not None:
+        manifest.record(nav, JSON_SAVED)
+    return stats
+
+
+@instrumentation.instrument
+def download_all_traces(
+    main_repertoire: str,
+    dict_navs: dict,
+    concurrency: int = None,
+    session: requests.Session = None,
+    manifest: ScrapeManifest = None,
+):
+    """
+    Télécharge et sauvegarde toutes les traces, concurrency
+    téléchargements simultanés sur la session partagée, puis affiche
+    le débit global et la latence par fichier.
 
-        # Enregistrer le contenu téléchargé dans le fichier avec le nom spécifié
-        with open(nom_fichier_zip, "wb") as f:
-            f.write(response.content)
-        # print(f"Téléchargement réussi. Fichier enregistré sous le nom : {nom_fichier_zip}")
+    returns:
+    -----------
+    * nb_saved: int
+        nombre de traces sauvegardées.
+    * nb_failed: int
+        nombre de traces en échec.
+    """
+    if concurrency is None:
+        concurrency = params.download_concurrency
+
+    nb_saved = 0
+    nb_failed = 0
+    list_stats = []
+    tic = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                save_trace,
+                main_repertoire=main_repertoire,
+                nav=nav,
+                data_nav=data_nav,
+                session=session,
+                manifest=manifest,
+            ): nav
+            for nav, data_nav in dict_navs.items()
+        }
+        for i, future in enumerate(as_completed(futures)):
+            nav = futures[future]
+            print(f"{i+1} ", end="", flush=True)
+            try:
+                stats = future.result()
+                if stats is not None:
+                    list_stats.append(stats)
+                nb_saved += 1
+            except Exception:
+                print("", "\n", traceback.format_exc())
+                print(f"Trace {nav} non sauvegardée")
+                nb_failed += 1
+    duration = time.perf_counter() - tic
+    print("")
 
-        # Extraire le contenu de l'archive zip dans le dossier "traces"
-        with zipfile.ZipFile(nom_fichier_zip, "r") as zip_ref:
-            zip_ref.extractall(f"{repertoire_extraction}/{nav}")
-        print(f"Archive extraite dans le répertoire : {nav}")
+    if len(list_stats) > 0:
+        nb_bytes = sum(stats["bytes"] for stats in list_stats)
+        latencies = [stats["latency"] for stats in list_stats]
+        print(
+            f"{len(list_stats)} archive(s), {nb_bytes / 1e6:.1f} Mo en "
+            f"{duration:.1f}s ({nb_bytes / 1e6 / max(duration, 1e-9):.2f} Mo/s), "
+            f"latence par fichier : moyenne {sum(latencies) / len(latencies):.2f}s, "
+            f"max {max(latencies):.2f}s"
+        )
 
-        # Supprimer le fichier zip après l'extraction (facultatif)
-        os.remove(nom_fichier_zip)
-        # print(f"Fichier zip supprimé : {nom_fichier_zip}")
-    else:
-        print(f"Échec du téléchargement. Code d'état : {response.status_code}")
+    return nb_saved, nb_failed
 
 
+@instrumentation.instrument
 def save_flight_data(main_repertoire: str, flight_data: dict):
     num_act = flight_data["num_activite"]
     file_name = main_repertoire + "/traces/" + f"{num_act}/" + f"{num_act}.json"
-    with open(file_name, "w", encoding="utf-8") as fp:
+    # Fichier temporaire renommé : le dossier de la trace change de date
+    # de modification (revalidation de trace_index)
+    with open(file_name + ".tmp", "w", encoding="utf-8") as fp:
         json.dump(
             flight_data,
             fp,
             ensure_ascii=False,
         )
+    os.replace(file_name + ".tmp", file_name)
+    flight_log.append_record(
+        directory=main_repertoire, record=flight_data, json_file=file_name
+    )
     print(f"Données de vol {num_act} sauvegardées")
 
 
-def initiate_search(main_repertoire: str):
+def initiate_search(main_repertoire: str, manifest: ScrapeManifest = None):
     """
     Fonction used to create a specific folder for a pilot.
     If not exists, the function creates the initial folder,
     it then create the "traces" directtory and finally
     lists all traces already available in the directory.
 
+    With a manifest, a folder only counts as downloaded if its
+    activity reached the json_saved stage (or, for folders scraped
+    before the manifest existed, if it contains its json file).
+
 
     args:
     -----------
     * main_repertoire: str
         main path for the folder
+    * manifest: ScrapeManifest
+        scrape manifest of the pilot (optional)
 
     returns:
     -----------
@@ -650,56 +1097,258 @@ def initiate_search(main_repertoire: str):
         folder_list = []
         print("Dossiers créés, aucune traces déjà téléchargées")
     else:
-        directory_path = repertoire_extraction + "/"
-        folder_list = [
-            f
-            for f in os.listdir(directory_path)
-            if os.path.isdir(os.path.join(directory_path, f))
-        ]
+        folders = trace_index.load_trace_index(directory=main_repertoire)
+        folder_list = list(folders)
+        if manifest is not None:
+            stages = manifest.stages()
+            folder_list = [
+                f
+                for f in folder_list
+                if stages.get(f, 0) == JSON_SAVED
+                or (f not in stages and f"{f}.json" in folders[f]["files"])
+            ]
         print(f"Dossiers trouvés, {len(folder_list)} trace(s) déjà téléchargée(s).")
 
     return folder_list
 
 
-def get_syride_traces(path: str, pilot: str, scroll: int):
+def run_pipeline(
+    repertoire_pilote: str,
+    pilot: str,
+    known_traces: list,
+    scroll: int,
+    manifest: ScrapeManifest,
+    detail_pool: DriverPool,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    feed_url: str = None,
+    timings: dict = None,
+):
     """
-    docstring
+    Étapes du scraping en flux (voir scrape_pipeline.py) : découverte,
+    pages de détail en HTTP puis, si besoin, dans un navigateur de
+    detail_pool, téléchargements.
     """
+    return scrape_pipeline.run_scrape_pipeline(
+        batches=iter_new_navs(
+            pilote=pilot,
+            known_traces=known_traces,
+            scroll=scroll,
+            base_url=base_url,
+            feed_url=feed_url,
+        ),
+        manifest=manifest,
+        fetch_detail=lambda trace, dict_nav: fetch_detail(
+            pilote=pilot,
+            trace=trace,
+            dict_nav=dict_nav,
+            base_url=base_url,
+            manifest=manifest,
+        ),
+        fetch_detail_browser=lambda trace, dict_nav: fetch_detail_browser(
+            pilote=pilot,
+            trace=trace,
+            dict_nav=dict_nav,
+            base_url=base_url,
+            manifest=manifest,
+            pool=detail_pool,
+        ),
+        save_trace=lambda trace, dict_nav: save_trace(
+            main_repertoire=repertoire_pilote,
+            nav=trace,
+            data_nav=dict_nav,
+            manifest=manifest,
+        ),
+        empty_detail=set_empty_detail_fields,
+        timings=timings,
+    )
 
-    repertoire_pilote = path + pilot
-    list_of_known_traces = initiate_search(main_repertoire=repertoire_pilote)
 
-    new_navs, dict_navs = get_all_navs(
-        pilote=pilot, known_traces=list_of_known_traces, scroll=scroll
-    )
+def get_syride_traces(
+    path: str,
+    pilot: str,
+    scroll: int,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    feed_url: str = None,
+    timings: dict = None,
+):
+    """
+    Récupère toutes les nouvelles traces d'un pilote.
 
-    if len(new_navs) > 0:
-        print(f"Réupération des liens (total {len(new_navs)})...")
-        updated_dict_navs = get_zip_adresses(pilote=pilot, traces=dict_navs)
+    Chaque étape terminée est écrite dans le manifeste du pilote ;
+    les activités laissées incomplètes par un run précédent reprennent
+    à leur première étape incomplète. Si timings est fourni, il reçoit
+    la durée (s) de chaque étape : discovery, detail, download.
 
-        print("")
-        print(f"Téléchargement des traces (total {len(updated_dict_navs)})...")
-        for i, dict_item in enumerate(updated_dict_navs.items()):
-            nav = dict_item[0]
-            data_nav = dict_item[1]
-            link = data_nav["adresse_zip"]
-            print(f"{i+1} ", end="", flush=True)
-            try:
-                if data_nav["is_syride"] is True:
-                    download_traces(
-                        main_repertoire=repertoire_pilote, nav=nav, link=link
-                    )
-                else:
-                    if not os.path.exists(f"{repertoire_pilote}/traces/{nav}"):
-                        os.makedirs(f"{repertoire_pilote}/traces/{nav}")
+    params.scrape_mode :
+        * "pipeline" : étapes en flux (voir scrape_pipeline.py) ;
+        * "phases" : découverte, puis détail, puis téléchargements.
+
+    returns:
+    -----------
+    * nb_saved: int
+        nombre de traces sauvegardées.
+    * nb_failed: int
+        nombre de traces en échec.
+    """
+
+    repertoire_pilote = path + pilot
+    manifest = ScrapeManifest(main_repertoire=repertoire_pilote)
+    flight_fields.reset_failures()
+    try:
+        list_of_known_traces = initiate_search(
+            main_repertoire=repertoire_pilote, manifest=manifest
+        )
 
-                save_flight_data(
-                    main_repertoire=repertoire_pilote, flight_data=data_nav
+        if params.scrape_mode == "pipeline":
+            # Navigateur des pages de détail distinct de celui de la
+            # découverte (pris pendant tout le défilement)
+            detail_pool = create_pool()
+            try:
+                nb_saved, nb_failed = run_pipeline(
+                    repertoire_pilote=repertoire_pilote,
+                    pilot=pilot,
+                    known_traces=list_of_known_traces,
+                    scroll=scroll,
+                    manifest=manifest,
+                    detail_pool=detail_pool,
+                    base_url=base_url,
+                    feed_url=feed_url,
+                    timings=timings,
                 )
-            except Exception:
-                print("", "\n", traceback.format_exc())
-                print(f"Trace {nav} non sauvegardée")
-                pass
+            finally:
+                detail_pool.close()
+            return nb_saved, nb_failed
+
+        tic = time.perf_counter()
+        new_navs, dict_navs = get_all_navs(
+            pilote=pilot,
+            known_traces=list_of_known_traces,
+            scroll=scroll,
+            base_url=base_url,
+            feed_url=feed_url,
+        )
+        if timings is not None:
+            timings["discovery"] = time.perf_counter() - tic
+
+        # Reprise des activités incomplètes d'un run précédent
+        stages = manifest.stages()
+        for nav, data_nav in dict_navs.items():
+            if nav not in stages:
+                manifest.record(nav, DISCOVERED, data_nav)
+        for nav, (stage, data_nav) in manifest.pending().items():
+            if data_nav is not None and (
+                stage >= DETAIL_FETCHED or nav not in dict_navs
+            ):
+                dict_navs[nav] = data_nav
+        if len(dict_navs) > len(new_navs):
+            print(
+                f"Reprise de {len(dict_navs) - len(new_navs)} trace(s) incomplète(s)."
+            )
+
+        nb_saved, nb_failed = scrape_new_traces(
+            repertoire_pilote=repertoire_pilote,
+            pilot=pilot,
+            dict_navs=dict_navs,
+            manifest=manifest,
+            base_url=base_url,
+            timings=timings,
+        )
+    finally:
+        manifest.close()
+        flight_fields.print_failures()
+
+    return nb_saved, nb_failed
+
+
+def scrape_new_traces(
+    repertoire_pilote: str,
+    pilot: str,
+    dict_navs: dict,
+    manifest: ScrapeManifest,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+    timings: dict = None,
+):
+    """
+    Pages de détail puis téléchargements des activités découvertes,
+    en sautant les étapes déjà terminées d'après le manifeste.
+    """
+    if timings is None:
+        timings = {}
+    nb_saved = 0
+    nb_failed = 0
+    if len(dict_navs) > 0:
+        stages = manifest.stages()
+        to_fetch = {
+            nav: data_nav
+            for nav, data_nav in dict_navs.items()
+            if stages.get(nav, 0) < DETAIL_FETCHED
+        }
+        print(f"Réupération des liens (total {len(to_fetch)})...")
+        tic = time.perf_counter()
+        if len(to_fetch) > 0:
+            fetched = get_zip_adresses(
+                pilote=pilot, traces=to_fetch, base_url=base_url, manifest=manifest
+            )
+        else:
+            fetched = {}
+        timings["detail"] = time.perf_counter() - tic
+        updated_dict_navs = {
+            nav: fetched.get(nav, data_nav) for nav, data_nav in dict_navs.items()
+        }
 
+        print("")
+        print(f"Téléchargement des traces (total {len(updated_dict_navs)})...")
+        tic = time.perf_counter()
+        nb_saved, nb_failed = download_all_traces(
+            main_repertoire=repertoire_pilote,
+            dict_navs=updated_dict_navs,
+            manifest=manifest,
+        )
+        timings["download"] = time.perf_counter() - tic
     else:
         print("Pas de nouvelles traces a telecharger.")
+
+    return nb_saved, nb_failed
+
+
+def scrape_pilot(path: str, pilot: str, scroll: int, capture_output: bool = True):
+    """
+    Lance get_syride_traces pour un pilote en isolant ses erreurs
+    (et sa sortie si capture_output=True). Utilisée par main.py, y compris
+    dans les processus du mode --jobs.
+
+    returns:
+    -----------
+    * report: dict
+        pilote, nombre de nouvelles traces, nombre d'échecs, erreur
+        éventuelle, durée (s), sortie capturée et appels mesurés (voir
+        instrumentation.py).
+    """
+    buffer = io.StringIO()
+    redirect = (
+        contextlib.redirect_stdout(buffer)
+        if capture_output
+        else contextlib.nullcontext()
+    )
+
+    nb_saved, nb_failed, error = 0, 0, None
+    tic = time.perf_counter()
+    with redirect:
+        try:
+            nb_saved, nb_failed = get_syride_traces(
+                path=path, pilot=pilot, scroll=scroll
+            )
+        except Exception:
+            error = traceback.format_exc()
+            print("", "\n", error)
+    toc = time.perf_counter()
+
+    return {
+        "pilot": pilot,
+        "new_traces": nb_saved,
+        "failed_traces": nb_failed,
+        "error": error,
+        "duration": toc - tic,
+        "output": buffer.getvalue(),
+        "profile": instrumentation.drain(),
+    }
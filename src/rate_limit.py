@@ -0,0 +1,152 @@
+"""
+Limitation de débit et reprises pour toutes les requêtes vers syride.
+
+    - TokenBucket : seau à jetons partagé entre threads et, si besoin,
+      entre processus (mode --jobs de main.py) ;
+    - RetryPolicy : reprises avec attente exponentielle et gigue
+      sur les erreurs transitoires.
+"""
+
+# ------------------------ Imports -----------------------
+
+import multiprocessing
+import random
+import threading
+import time
+
+import params_scrap_syride as params
+
+# ------------------------ Classes -----------------------
+
+
+class TokenBucket:
+    """
+    Seau à jetons : au plus rate requêtes par seconde en régime
+    établi, avec des rafales de capacity requêtes.
+
+    args:
+    -----------
+    * rate: float
+        jetons ajoutés par seconde.
+    * capacity: float
+        nombre maximal de jetons en réserve.
+    * shared: bool
+        état stocké en mémoire partagée pour être utilisé par plusieurs
+        processus (à transmettre aux processus à leur création).
+    """
+
+    def __init__(self, rate: float, capacity: float, shared: bool = False):
+        self.rate = rate
+        self.capacity = capacity
+        if shared:
+            # [jetons disponibles, date du dernier remplissage]
+            self._state = multiprocessing.Array("d", [capacity, time.monotonic()])
+            self._lock = self._state.get_lock()
+        else:
+            self._state = [capacity, time.monotonic()]
+            self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Bloque jusqu'à ce que tokens jetons soient disponibles.
+        Retourne le temps d'attente (s).
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                available = min(
+                    self.capacity,
+                    self._state[0] + (now - self._state[1]) * self.rate,
+                )
+                self._state[1] = now
+                if available >= tokens:
+                    self._state[0] = available - tokens
+                    return waited
+                self._state[0] = available
+                wait = (tokens - available) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class RetryPolicy:
+    """
+    Reprises avec attente exponentielle et gigue complète :
+    avant la tentative n+1, attente aléatoire dans
+    [0, min(max_delay, base_delay * 2**n)].
+
+    args:
+    -----------
+    * max_attempts: int
+        nombre total de tentatives.
+    * base_delay: float
+        attente de base (s).
+    * max_delay: float
+        plafond de l'attente (s).
+    * retry_statuses: tuple
+        codes HTTP considérés comme transitoires.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        retry_statuses: tuple = (429, 500, 502, 503, 504),
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """
+        Attente avant la tentative suivante ; un en-tête Retry-After
+        en secondes est respecté s'il est plus long.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(self.max_delay, float(retry_after)))
+        return delay
+
+
+# ------------------------ Functions -----------------------
+
+_default_limiter = None
+_default_retry_policy = None
+
+
+def get_default_limiter() -> TokenBucket:
+    """
+    Limiteur du processus courant : celui transmis par set_default_limiter
+    (mode --jobs) ou, à défaut, un limiteur créé depuis les paramètres.
+    """
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = create_limiter()
+    return _default_limiter
+
+
+def set_default_limiter(limiter: TokenBucket) -> None:
+    """
+    Installe le limiteur du processus (initializer des processus --jobs).
+    """
+    global _default_limiter
+    _default_limiter = limiter
+
+
+def create_limiter(shared: bool = False) -> TokenBucket:
+    return TokenBucket(
+        rate=params.rate_limit_per_s, capacity=params.rate_limit_burst, shared=shared
+    )
+
+
+def get_default_retry_policy() -> RetryPolicy:
+    global _default_retry_policy
+    if _default_retry_policy is None:
+        _default_retry_policy = RetryPolicy(
+            max_attempts=params.retry_max_attempts,
+            base_delay=params.retry_base_delay,
+            max_delay=params.retry_max_delay,
+        )
+    return _default_retry_policy
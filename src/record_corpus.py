@@ -0,0 +1,211 @@
+"""
+Enregistre un corpus de rejeu pour standin_server.py à partir
+des pages réelles d'un pilote : fil d'activités, pages d'activité,
+documents de détail (popupIframe) et archives ZIP.
+
+Les liens sont réécrits vers les routes du serveur de rejeu
+(/iframes/<trace>.html, /downloadZIP/<trace>.zip).
+
+Usage :
+    python record_corpus.py --pilot AdrienM --corpus <dossier>
+        [--max-pages 3] [--max-traces 50]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import datetime
+import json
+import os
+import re
+from urllib.parse import quote, urljoin
+
+from bs4 import BeautifulSoup
+
+import params_scrap_syride as params
+import python_functions
+from driver_pool import get_default_pool
+from http_session import fetch_text, get_default_session, request
+
+# ------------------------ Functions -----------------------
+
+
+def write_file(filename: str, content) -> None:
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    encoding = None if isinstance(content, bytes) else "utf-8"
+    with open(filename, mode, encoding=encoding) as file:
+        file.write(content)
+
+
+def fetch_feed(
+    pilote: str,
+    max_pages: int,
+    feed_url: str = None,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+):
+    """
+    Récupère les pages du fil d'activités. Sans feed_url, la page du
+    pilote rendue par selenium est retournée comme page unique.
+
+    returns:
+    -----------
+    * pages: list
+        contenu des pages.
+    * dict_navs: dict
+        activités trouvées.
+    """
+    pages = []
+    dict_navs = {}
+    if feed_url:
+        session = get_default_session()
+        for i in range(max_pages):
+            page = params.feed_first_page + i
+            page_content = fetch_text(
+                session=session, url=feed_url.format(pilote=quote(pilote), page=page)
+            )
+            dict_page = python_functions.parse_activities(page_content, pilote)
+            if len(dict_page) == 0:
+                break
+            pages.append(page_content)
+            dict_navs.update(dict_page)
+    else:
+        with get_default_pool().session() as driver:
+            driver.get(base_url + pilote)
+            python_functions.scroll_to_bottom(
+                driver,
+                nb_scroll=max_pages,
+                step_timeout=params.scroll_step_timeout,
+                patience=params.scroll_patience,
+            )
+            page_content = driver.page_source
+        pages.append(page_content)
+        dict_navs = python_functions.parse_activities(page_content, pilote)
+
+    return pages, dict_navs
+
+
+def prune_feed_page(page_content: str, traces: set) -> str:
+    """
+    Retire d'une page du fil les traces syride absentes du corpus,
+    pour que le rejeu ne demande que des pages enregistrées.
+    """
+    soup = BeautifulSoup(page_content, "html.parser")
+    for activity in soup.find_all(id=re.compile(r"^activite\d{5,10}$")):
+        element_type = activity.find(id=re.compile(r"^type\d{5,10}$"))
+        is_syride = activity.find(class_="photoGps") is not None
+        if is_syride and element_type is not None:
+            if element_type.get("id").replace("type", "") not in traces:
+                activity.decompose()
+    return str(soup)
+
+
+def record_trace(
+    pilote: str,
+    trace: str,
+    corpus_dir: str,
+    base_url: str = "https://www.syride.com/fr/pilotes/",
+) -> bool:
+    """
+    Enregistre la page d'activité, le document de détail et l'archive
+    d'une trace. Retourne False si la page nécessite JavaScript.
+    """
+    session = get_default_session()
+    url = base_url + pilote + "/" + trace
+
+    activity_soup = BeautifulSoup(fetch_text(session=session, url=url), "html.parser")
+    iframe = activity_soup.find(id="popupIframe")
+    if iframe is None or not iframe.get("src"):
+        return False
+    iframe_url = urljoin(url, iframe["src"])
+    iframe["src"] = f"/iframes/{trace}.html"
+
+    iframe_soup = BeautifulSoup(
+        fetch_text(session=session, url=iframe_url), "html.parser"
+    )
+    liens_download_zip = [
+        lien
+        for lien in iframe_soup.find_all("a", href=True)
+        if "downloadZIP" in lien["href"]
+    ]
+    if len(liens_download_zip) == 0:
+        return False
+
+    response = request(
+        session=session, url=urljoin(iframe_url, liens_download_zip[0]["href"])
+    )
+    response.raise_for_status()
+    for lien in liens_download_zip:
+        lien["href"] = f"/downloadZIP/{trace}.zip"
+
+    write_file(
+        os.path.join(corpus_dir, "activities", f"{trace}.html"), str(activity_soup)
+    )
+    write_file(os.path.join(corpus_dir, "iframes", f"{trace}.html"), str(iframe_soup))
+    write_file(os.path.join(corpus_dir, "zips", f"{trace}.zip"), response.content)
+    return True
+
+
+def record_corpus(
+    pilote: str,
+    corpus_dir: str,
+    max_pages: int = 3,
+    max_traces: int = 50,
+    feed_url: str = None,
+) -> None:
+    """
+    Enregistre le corpus complet d'un pilote et son descriptif
+    (corpus.json).
+    """
+    print(f"Enregistrement du fil d'activités de {pilote}...")
+    pages, dict_navs = fetch_feed(pilote=pilote, max_pages=max_pages, feed_url=feed_url)
+    traces = [
+        trace
+        for trace, dict_nav in dict_navs.items()
+        if trace != "None" and dict_nav["is_syride"] is True
+    ][:max_traces]
+
+    print(f"Enregistrement des traces (total {len(traces)})...")
+    recorded = []
+    for i, trace in enumerate(traces):
+        print(f"{i+1} ", end="", flush=True)
+        if record_trace(pilote=pilote, trace=trace, corpus_dir=corpus_dir):
+            recorded.append(trace)
+    print("")
+
+    for i, page_content in enumerate(pages):
+        write_file(
+            os.path.join(corpus_dir, "feed", f"{i + 1}.html"),
+            prune_feed_page(page_content=page_content, traces=set(recorded)),
+        )
+
+    descriptif = {
+        "pilot": pilote,
+        "activities": len(dict_navs),
+        "traces": recorded,
+        "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    write_file(
+        os.path.join(corpus_dir, "corpus.json"),
+        json.dumps(descriptif, ensure_ascii=False, indent=2),
+    )
+    print(f"Corpus enregistré dans {corpus_dir} ({len(recorded)} traces).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Enregistre un corpus de rejeu pour standin_server.py."
+    )
+    parser.add_argument("--pilot", required=True, help="Nom du pilote syride.")
+    parser.add_argument("--corpus", required=True, help="Dossier du corpus.")
+    parser.add_argument("--max-pages", type=int, default=3)
+    parser.add_argument("--max-traces", type=int, default=50)
+    args = parser.parse_args()
+
+    record_corpus(
+        pilote=args.pilot,
+        corpus_dir=args.corpus,
+        max_pages=args.max_pages,
+        max_traces=args.max_traces,
+        feed_url=params.feed_url,
+    )
@@ -0,0 +1,419 @@
+"""
+Vérifications de non-régression, sans réseau ni données réelles : chaque
+fonction check_* reproduit un cas corrigé et lève une AssertionError si
+le comportement fautif revient.
+
+Usage :
+    python regression_checks.py
+"""
+
+# ------------------------ Imports -----------------------
+
+import contextlib
+import datetime
+import io
+import os
+import pickle
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+import analyze_functions
+import driver_pool
+import flight_dataset
+import flight_fields
+import normalization
+import params_scrap_syride as params
+import python_functions
+import rate_limit
+import trace_index
+
+# ------------------------ Constants -----------------------
+
+KML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<kml xmlns="http://www.opengis.net/kml/2.2" '
+    'xmlns:gx="http://www.google.com/kml/ext/2.2"><Document><name>t</name>\n'
+)
+KML_FOOTER = "</Document></kml>\n"
+
+# (placemarks, décollage attendu)
+KML_CASES = {
+    "point puis trace": (
+        "<Placemark><Point><coordinates>0.5,44.5,100</coordinates></Point>"
+        "</Placemark>\n<Placemark><LineString><coordinates>\n1.0,45.0,100 "
+        "1.5,45.5,110\n</coordinates></LineString></Placemark>\n",
+        [1.0, 45.0],
+    ),
+    "gx:Track": (
+        "<Placemark><gx:Track><when>2023-01-01T00:00:00Z</when>"
+        "<when>2023-01-01T00:00:01Z</when><gx:coord>3.0 47.0 100</gx:coord>"
+        "<gx:coord>3.9 47.9 110</gx:coord></gx:Track></Placemark>\n",
+        [3.0, 47.0],
+    ),
+    "deux traces": (
+        "<Placemark><LineString><coordinates>1.0,45.0,100 1.5,45.5,110"
+        "</coordinates></LineString></Placemark>\n<Placemark><LineString>"
+        "<coordinates>2.0,46.0,100 2.5,46.5,110</coordinates></LineString>"
+        "</Placemark>\n",
+        [1.0, 45.0],
+    ),
+}
+
+# Lignes réelles du fil d'activités et d'une page de détail (notebooks
+# scrap_syride_old.ipynb et scrap_syride.ipynb), avec les valeurs
+# qu'en tiraient extract_flight_data et extract_flight_data2 avant le
+# registre de flight_fields
+ACTIVITY_LINES = [
+    (
+        [
+            "Date : 29/04/2023 - 11h07",
+            "Temps de vol : 01:14:45s",
+            "Voile utilisée : Daytona (ITV )",
+            "Distance parcourue : 29km",
+            "Instrument utilisé : Evolution (v2.93)",
+        ],
+        ("29/04/2023", "11h07", "01:14:45", "Daytona", "29", "Evolution"),
+    ),
+    (
+        [
+            "Date : 16/06/2023 - 20h09",
+            "Temps de vol : 00:02:51s",
+            "Voile utilisée : Daytona (ITV )",
+            "Distance parcourue : 0km",
+            "Instrument utilisé : Evolution (v2.93)",
+        ],
+        ("16/06/2023", "20h09", "00:02:51", "Daytona", "0", "Evolution"),
+    ),
+]
+DETAIL_LINES = (
+    [
+        "Date : 23/08/2023",
+        "Décollage : Site Secondigne Sur Belle 01 ( France / Nouvelle-Aquitaine)",
+        "Voile : Daytona (ITV )",
+        "Nom du vol : 23-08-2023",
+        "Instrument : Evo (v2.93)",
+        "Fichiers : IGC, Google Earth, ZIP",
+        "Qui j'ai croisé ? ",
+        "Distance : 35km",
+        "Distance cumulée : 46km",
+        "Vitesse max : 61km/h",
+        "Vitesse moyenne : 33.4km/h",
+        "Plafond : 881m",
+        "Gain : 827m",
+        "Temps de vol : 01:02:48s",
+        "Vario max : 4.4m/s",
+        "G max : 1.4g",
+    ],
+    (
+        "23/08/2023",
+        "Site Secondigne Sur Belle 01",
+        "35",
+        "46",
+        "61",
+        "33.4",
+        "881",
+        "827",
+        "01:02:48",
+        "4.4",
+        "1.4",
+    ),
+)
+
+# ------------------------ Classes -----------------------
+
+
+class FakeElement:
+    def __init__(self, driver=None, href: str = None, accessible_name: str = None):
+        self.driver = driver
+        self.href = href
+        self.accessible_name = accessible_name
+
+    def get_attribute(self, name: str) -> str:
+        return self.href
+
+    def send_keys(self, key) -> None:
+        # Touche End : un lot d'activités de plus
+        self.driver.loaded = min(self.driver.loaded + 20, self.driver.total)
+
+
+class FakeSwitchTo:
+    def frame(self, frame) -> None:
+        pass
+
+    def default_content(self) -> None:
+        pass
+
+
+class FakeDriver:
+    """
+    Navigateur factice : page pilote de total activités syride chargées
+    par lots de 20, pages de détail avec un lien ZIP.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.loaded = 0
+        self.switch_to = FakeSwitchTo()
+
+    def get(self, url: str) -> None:
+        if url.endswith("/fake"):
+            self.loaded = min(20, self.total)
+
+    def implicitly_wait(self, timeout: float) -> None:
+        pass
+
+    def activity(self, i: int) -> str:
+        num = 1000000 + i
+        return (
+            f'<div id="activite{num + 5}"><span class="photoGps"></span>'
+            f'<div id="type{num}">Vol site</div>'
+            f'<div id="site{num}">à Fayards (FR)</div><ul>13/05/2023</ul></div>'
+        )
+
+    def execute_script(self, script: str, *args):
+        if script == python_functions.JS_COUNT_ACTIVITIES:
+            return self.loaded
+        if script == python_functions.JS_ACTIVITY_NUMBERS:
+            return [str(1000000 + i) for i in range(self.loaded)]
+        if script == python_functions.JS_PULL_ACTIVITIES:
+            return [self.activity(i) for i in range(args[0], self.loaded)]
+        return 1
+
+    def find_element(self, by, value) -> FakeElement:
+        return FakeElement(driver=self)
+
+    def find_elements(self, by, value) -> list:
+        if value == "a":
+            return [FakeElement(href="https://x/downloadZIP.php?id=1")]
+        return [FakeElement(accessible_name="Durée : 00:10:00")]
+
+    def quit(self) -> None:
+        pass
+
+
+# ------------------------ Functions -----------------------
+
+
+def check_alias_missing_values() -> None:
+    """
+    Une valeur manquante reste manquante après une table d'alias, quelle
+    que soit la position des valeurs distinctes.
+    """
+    tables = normalization.load_alias_tables()
+    wings = tables["voile"].apply(pd.Series(["Boxer", np.nan, "PIPPER"]))
+    assert wings.iloc[0] == "boxer" and wings.iloc[2] == "piper", wings.tolist()
+    assert pd.isna(wings.iloc[1]), wings.tolist()
+
+    days = tables["jour_semaine"].apply(pd.Series(["Monday", np.nan, "Foo"]))
+    assert days.iloc[0] == "lundi" and days.iloc[2] == "Foo", days.tolist()
+    assert pd.isna(days.iloc[1]), days.tolist()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyze_functions.replace_values(
+            pd.DataFrame({"valeur": ["1", np.nan, "2"]}),
+            dict_values={"1": "un", "2": "deux"},
+            var_interest="valeur",
+        )
+    assert df["valeur"].iloc[0] == "un" and df["valeur"].iloc[2] == "deux"
+    assert pd.isna(df["valeur"].iloc[1]), df["valeur"].tolist()
+
+
+def check_flight_fields_lines() -> None:
+    """
+    Les registres de flight_fields lisent les lignes réelles comme les
+    anciens extracteurs : heure après " - ", durée suivie de "s", unité
+    "g" en minuscule.
+    """
+    flight_fields.reset_failures()
+    for lines, expected in ACTIVITY_LINES:
+        values = flight_fields.ACTIVITY_REGISTRY.parse(lines)
+        values = tuple(str(value) for value in values.values())
+        assert values == expected, (values, expected)
+
+    lines, expected = DETAIL_LINES
+    values = flight_fields.DETAIL_REGISTRY.parse(lines)
+    values = tuple(str(value) for value in values.values())
+    assert values == expected, (values, expected)
+    assert flight_fields.get_failures() == {}, flight_fields.get_failures()
+
+
+def check_reparse_raw_fields() -> None:
+    """
+    La relecture en bloc des lignes brutes (reparse_raw_fields) redonne les
+    valeurs des anciens extracteurs, sans écraser celles des vols sans
+    lignes brutes.
+    """
+    activity_columns = flight_fields.ACTIVITY_REGISTRY.columns
+    detail_columns = flight_fields.DETAIL_REGISTRY.columns
+    rows = []
+    for lines, expected in ACTIVITY_LINES:
+        row = dict.fromkeys(activity_columns + detail_columns, "avant")
+        row.update(
+            {
+                "is_syride": True,
+                "lignes_activite": lines,
+                "lignes_detail": DETAIL_LINES[0],
+            }
+        )
+        rows.append(row)
+    # Ancienne trace sans lignes brutes : valeurs gardées
+    rows.append(dict(rows[0], lignes_activite=None, lignes_detail=None))
+
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        df = analyze_functions.reparse_raw_fields(pd.DataFrame(rows))
+    assert "illisible" not in output.getvalue(), output.getvalue()
+
+    for i, (_, expected) in enumerate(ACTIVITY_LINES):
+        values = tuple(str(df.loc[i, column]) for column in activity_columns)
+        assert values == expected, (i, values, expected)
+        values = tuple(str(df.loc[i, column]) for column in detail_columns)
+        assert values == DETAIL_LINES[1], (i, values, DETAIL_LINES[1])
+    last = df.iloc[-1][activity_columns + detail_columns]
+    assert (last == "avant").all(), last.tolist()
+
+
+def check_legacy_pickle_fallback() -> None:
+    """
+    Un déploiement qui n'a que l'ancien pkl reste lisible à la place du
+    fichier Parquet ; le fichier Parquet est lu dès qu'il existe.
+    """
+    df = pd.DataFrame({"pilote": ["AdrienM", "j2f"], "annee": [2023, 2024]})
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, flight_dataset.DATASET_NAME)
+        legacy_path = os.path.join(directory, flight_dataset.LEGACY_PICKLE_NAME)
+        with open(legacy_path, "wb") as pickle_file:
+            pickle.dump(df, pickle_file)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            found = flight_dataset.find_flight_data(path)
+        assert found == legacy_path, found
+        read = flight_dataset.read_flight_data(found, columns=["pilote", "annee"])
+        assert read["pilote"].tolist() == ["AdrienM", "j2f"], read
+
+        flight_dataset.write_flight_data(
+            df=df, path=path, date_update=datetime.datetime(2024, 1, 1)
+        )
+        assert flight_dataset.find_flight_data(path) == path
+
+
+def check_kml_takeoff() -> None:
+    """
+    Décollage = premier point de la première trace, quelle que soit la
+    taille des blocs lus.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for label, (placemarks, expected) in KML_CASES.items():
+            path = os.path.join(directory, "1.kml")
+            with open(path, "w", encoding="utf-8") as kml_file:
+                kml_file.write(KML_HEADER + placemarks + KML_FOOTER)
+            for chunk_size in (7, 16 * 1024):
+                takeoff = analyze_functions.get_takeoff_coordinates(
+                    path, chunk_size=chunk_size
+                )
+                assert takeoff == expected, (label, chunk_size, takeoff)
+
+
+def check_trace_index_nested_rewrite() -> None:
+    """
+    Un fichier réécrit dans un sous-dossier de trace (renommage), ou sur
+    place puis marqué par touch_folder, a sa nouvelle signature dans
+    l'index.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        nested = os.path.join(directory, "traces", "1000", "sub")
+        os.makedirs(nested)
+        path = os.path.join(nested, "1000.kml")
+        with open(path, "w", encoding="utf-8") as trace_file:
+            trace_file.write("a")
+        trace_index.load_trace_index(directory)
+
+        with open(path + ".tmp", "w", encoding="utf-8") as trace_file:
+            trace_file.write("bb")
+        os.replace(path + ".tmp", path)
+        files = trace_index.get_trace_files(directory, extension=".kml")
+        assert files["1000"][1] == 2, files
+
+        with open(path, "w", encoding="utf-8") as trace_file:
+            trace_file.write("ccc")
+        trace_index.touch_folder(directory=directory, name="1000")
+        files = trace_index.get_trace_files(directory, extension=".kml")
+        assert files["1000"][1] == 3, files
+
+
+def check_pipeline_browser_fallback(nb_activities: int = 60) -> None:
+    """
+    Pipeline avec découverte selenium et pages de détail toutes en repli
+    navigateur : plus d'activités que la file et les threads de détail
+    n'en absorbent ne doit pas bloquer la découverte (navigateur de la
+    découverte gardé pendant tout le défilement).
+    """
+
+    def create_driver(pool):
+        driver = FakeDriver(total=nb_activities)
+        pool._uses[id(driver)] = 0
+        return driver
+
+    def fail_http(session, url):
+        raise ConnectionError("page de détail HTTP indisponible")
+
+    saved = []
+    patches = [
+        (driver_pool.DriverPool, "_create_driver", create_driver),
+        (python_functions, "fetch_detail_http", fail_http),
+        (
+            python_functions,
+            "save_trace",
+            lambda main_repertoire, nav, data_nav, manifest: saved.append(nav),
+        ),
+        (params, "feed_url", None),
+        (params, "scrape_mode", "pipeline"),
+        (params, "detail_backend", "http"),
+        (params, "scroll_step_timeout", 0.05),
+        (params, "scroll_patience", 1),
+    ]
+    originals = [(owner, name, getattr(owner, name)) for owner, name, _ in patches]
+    for owner, name, value in patches:
+        setattr(owner, name, value)
+    driver_pool.close_default_pool()
+    rate_limit.set_default_limiter(rate_limit.TokenBucket(rate=1e6, capacity=1e6))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            result = {}
+
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result["counts"] = python_functions.get_syride_traces(
+                        path=directory + "/", pilot="fake", scroll=-1
+                    )
+
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            thread.join(timeout=20)
+            assert not thread.is_alive(), f"pipeline bloqué ({len(saved)} traces)"
+            assert result["counts"] == (nb_activities, 0), result
+    finally:
+        for owner, name, value in originals:
+            setattr(owner, name, value)
+        driver_pool.close_default_pool()
+        rate_limit.set_default_limiter(None)
+
+
+CHECKS = [
+    check_alias_missing_values,
+    check_flight_fields_lines,
+    check_reparse_raw_fields,
+    check_legacy_pickle_fallback,
+    check_kml_takeoff,
+    check_trace_index_nested_rewrite,
+    check_pipeline_browser_fallback,
+]
+
+
+if __name__ == "__main__":
+    normalization.reset_unmapped()
+    for check in CHECKS:
+        check()
+        print(f"{check.__name__} : ok")
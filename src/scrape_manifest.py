@@ -0,0 +1,125 @@
+"""
+Manifeste de scraping d'un pilote (base SQLite embarquée).
+
+Pour chaque activité, le manifeste garde la dernière étape terminée
+(découverte, détail récupéré, zip téléchargé, extrait, json sauvegardé)
+et les données déjà collectées. Chaque étape est écrite dès qu'elle se
+termine : après un arrêt brutal, get_syride_traces reprend chaque
+activité à sa première étape incomplète.
+"""
+
+# ------------------------ Imports -----------------------
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ------------------------ Constants -----------------------
+
+DISCOVERED = 1
+DETAIL_FETCHED = 2
+ZIP_DOWNLOADED = 3
+EXTRACTED = 4
+JSON_SAVED = 5
+
+STAGE_NAMES = {
+    DISCOVERED: "discovered",
+    DETAIL_FETCHED: "detail_fetched",
+    ZIP_DOWNLOADED: "zip_downloaded",
+    EXTRACTED: "extracted",
+    JSON_SAVED: "json_saved",
+}
+
+MANIFEST_FILENAME = "scrape_manifest.sqlite"
+
+# ------------------------ Classes -----------------------
+
+
+class ScrapeManifest:
+    """
+    Manifeste SQLite stocké dans le dossier du pilote. Utilisable depuis
+    plusieurs threads (téléchargements concurrents).
+
+    args:
+    -----------
+    * main_repertoire: str
+        dossier du pilote.
+    """
+
+    def __init__(self, main_repertoire: str):
+        os.makedirs(main_repertoire, exist_ok=True)
+        self.path = os.path.join(main_repertoire, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS activities (
+                num_activite TEXT PRIMARY KEY,
+                stage INTEGER NOT NULL,
+                data TEXT,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def record(self, num_activite: str, stage: int, data: dict = None) -> None:
+        """
+        Enregistre qu'une étape est terminée pour une activité. L'étape
+        enregistrée ne recule jamais ; data remplace les données stockées
+        si elle est fournie.
+        """
+        data_json = json.dumps(data, ensure_ascii=False) if data is not None else None
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO activities (num_activite, stage, data, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(num_activite) DO UPDATE SET
+                    stage = MAX(stage, excluded.stage),
+                    data = COALESCE(excluded.data, data),
+                    updated_at = excluded.updated_at
+                """,
+                (num_activite, stage, data_json, time.time()),
+            )
+            self._conn.commit()
+
+    def get_stage(self, num_activite: str) -> int:
+        """
+        Dernière étape terminée (0 si l'activité est inconnue).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stage FROM activities WHERE num_activite = ?",
+                (num_activite,),
+            ).fetchone()
+        return row[0] if row is not None else 0
+
+    def stages(self) -> dict:
+        """
+        {num_activite: étape} pour toutes les activités du manifeste.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT num_activite, stage FROM activities"
+            ).fetchall()
+        return dict(rows)
+
+    def pending(self) -> dict:
+        """
+        Activités incomplètes : {num_activite: (étape, données)}.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT num_activite, stage, data FROM activities WHERE stage < ?",
+                (JSON_SAVED,),
+            ).fetchall()
+        return {
+            num: (stage, json.loads(data) if data is not None else None)
+            for num, stage, data in rows
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
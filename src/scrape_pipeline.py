@@ -0,0 +1,236 @@
+"""
+Pipeline de scraping en flux : découverte → pages de détail →
+téléchargements.
+
+Chaque activité passe à l'étape suivante dès qu'elle est prête, sans
+attendre la fin de l'étape précédente. Les étapes communiquent par des
+files bornées (contre-pression : la découverte se met en pause quand les
+pages de détail ne suivent pas) et chaque étape a son propre nombre de
+threads. La durée totale tend vers celle de l'étape la plus lente.
+
+Les pages de détail qui nécessitent un navigateur passent par une file
+non bornée, traitée par un seul thread : les threads de détail (et donc
+la découverte) ne se bloquent jamais en attendant le navigateur.
+
+Les étapes elles-mêmes (découverte, page de détail, sauvegarde) sont
+fournies par l'appelant (python_functions.get_syride_traces) : ce module
+ne dépend pas de python_functions.
+"""
+
+# ------------------------ Imports -----------------------
+
+import queue
+import threading
+import time
+import traceback
+
+import params_scrap_syride as params
+from scrape_manifest import DETAIL_FETCHED, DISCOVERED, ScrapeManifest
+
+# Fin de flux dans une file
+_STOP = object()
+
+# ------------------------ Classes -----------------------
+
+
+class StageTimer:
+    """
+    Durée active d'une étape : du premier élément traité
+    à la fin du dernier.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = None
+        self.end = None
+
+    def mark(self, tic: float, toc: float) -> None:
+        with self._lock:
+            self.start = tic if self.start is None else min(self.start, tic)
+            self.end = toc if self.end is None else max(self.end, toc)
+
+    @property
+    def duration(self) -> float:
+        if self.start is None:
+            return 0.0
+        return self.end - self.start
+
+
+# ------------------------ Functions -----------------------
+
+
+def run_scrape_pipeline(
+    batches,
+    manifest: ScrapeManifest,
+    fetch_detail,
+    fetch_detail_browser,
+    save_trace,
+    empty_detail,
+    detail_workers: int = None,
+    download_workers: int = None,
+    queue_size: int = None,
+    timings: dict = None,
+):
+    """
+    Lance le pipeline pour un pilote. Les activités incomplètes d'un run
+    précédent (manifeste) sont injectées à l'étape où elles s'étaient
+    arrêtées.
+
+    args:
+    -----------
+    * batches: iterable
+        lots d'activités découvertes {trace: dict_nav}, consommés au fil
+        de l'eau.
+    * fetch_detail: callable
+        fetch_detail(trace=, dict_nav=) : activité complétée par sa page
+        de détail, None si la page nécessite un navigateur.
+    * fetch_detail_browser: callable
+        fetch_detail_browser(trace=, dict_nav=) : page de détail lue dans
+        un navigateur, qui ne doit pas être celui de la découverte.
+    * save_trace: callable
+        save_trace(trace=, dict_nav=) : téléchargement et sauvegarde.
+    * empty_detail: callable
+        empty_detail(dict_nav) : activité sans page de détail exploitable
+        (échec de fetch_detail ou fetch_detail_browser).
+
+    returns:
+    -----------
+    * nb_saved: int
+        nombre de traces sauvegardées.
+    * nb_failed: int
+        nombre de traces en échec.
+    """
+    if detail_workers is None:
+        detail_workers = params.detail_concurrency
+    if download_workers is None:
+        download_workers = params.download_concurrency
+    if queue_size is None:
+        queue_size = params.pipeline_queue_size
+
+    detail_queue = queue.Queue(maxsize=queue_size)
+    download_queue = queue.Queue(maxsize=queue_size)
+    # Non bornée : un thread de détail y dépose sans jamais attendre
+    browser_queue = queue.Queue()
+    timers = {"detail": StageTimer(), "download": StageTimer()}
+    counts = {"saved": 0, "failed": 0}
+    counts_lock = threading.Lock()
+
+    def detail_worker():
+        while True:
+            item = detail_queue.get()
+            if item is _STOP:
+                return
+            trace, dict_nav = item
+            tic = time.perf_counter()
+            try:
+                result = fetch_detail(trace=trace, dict_nav=dict_nav)
+            except Exception:
+                print("", "\n", traceback.format_exc())
+                result = empty_detail(dict_nav)
+            timers["detail"].mark(tic, time.perf_counter())
+            if result is None:
+                browser_queue.put((trace, dict_nav))
+            else:
+                download_queue.put((trace, result))
+
+    def browser_worker():
+        while True:
+            item = browser_queue.get()
+            if item is _STOP:
+                return
+            trace, dict_nav = item
+            tic = time.perf_counter()
+            try:
+                dict_nav = fetch_detail_browser(trace=trace, dict_nav=dict_nav)
+            except Exception:
+                print("", "\n", traceback.format_exc())
+                dict_nav = empty_detail(dict_nav)
+            timers["detail"].mark(tic, time.perf_counter())
+            download_queue.put((trace, dict_nav))
+
+    def download_worker():
+        while True:
+            item = download_queue.get()
+            if item is _STOP:
+                return
+            trace, dict_nav = item
+            tic = time.perf_counter()
+            try:
+                save_trace(trace=trace, dict_nav=dict_nav)
+                outcome = "saved"
+            except Exception:
+                print("", "\n", traceback.format_exc())
+                print(f"Trace {trace} non sauvegardée")
+                outcome = "failed"
+            timers["download"].mark(tic, time.perf_counter())
+            with counts_lock:
+                counts[outcome] += 1
+
+    detail_threads = [
+        threading.Thread(target=detail_worker, daemon=True)
+        for _ in range(detail_workers)
+    ]
+    download_threads = [
+        threading.Thread(target=download_worker, daemon=True)
+        for _ in range(download_workers)
+    ]
+    browser_thread = threading.Thread(target=browser_worker, daemon=True)
+    for thread in detail_threads + [browser_thread] + download_threads:
+        thread.start()
+
+    def submit(trace: str, dict_nav: dict, stage: int) -> None:
+        if stage >= DETAIL_FETCHED:
+            download_queue.put((trace, dict_nav))
+        else:
+            detail_queue.put((trace, dict_nav))
+
+    tic = time.perf_counter()
+    try:
+        # Reprise des activités incomplètes d'un run précédent
+        seen = set()
+        stages = manifest.stages()
+        pending = manifest.pending()
+        for trace, (stage, dict_nav) in pending.items():
+            if dict_nav is not None:
+                seen.add(trace)
+                submit(trace, dict_nav, stage)
+        if len(seen) > 0:
+            print(f"Reprise de {len(seen)} trace(s) incomplète(s).")
+
+        # Découverte : chaque lot part vers les pages de détail
+        for batch in batches:
+            for trace, dict_nav in batch.items():
+                if trace in seen:
+                    continue
+                seen.add(trace)
+                if trace not in stages:
+                    manifest.record(trace, DISCOVERED, dict_nav)
+                submit(trace, dict_nav, stages.get(trace, 0))
+        discovery_duration = time.perf_counter() - tic
+        print(f"{len(seen)} trace(s) envoyée(s) dans le pipeline.")
+    finally:
+        for _ in detail_threads:
+            detail_queue.put(_STOP)
+        for thread in detail_threads:
+            thread.join()
+        browser_queue.put(_STOP)
+        browser_thread.join()
+        for _ in download_threads:
+            download_queue.put(_STOP)
+        for thread in download_threads:
+            thread.join()
+
+    total = time.perf_counter() - tic
+    print(
+        f"Pipeline terminé en {total:.1f}s : {counts['saved']} trace(s) "
+        f"sauvegardée(s), {counts['failed']} en échec "
+        f"(découverte {discovery_duration:.1f}s, "
+        f"détail {timers['detail'].duration:.1f}s, "
+        f"téléchargement {timers['download'].duration:.1f}s)."
+    )
+    if timings is not None:
+        timings["discovery"] = discovery_duration
+        timings["detail"] = timers["detail"].duration
+        timings["download"] = timers["download"].duration
+
+    return counts["saved"], counts["failed"]
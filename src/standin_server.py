@@ -0,0 +1,188 @@
+"""
+Serveur HTTP local qui rejoue un corpus enregistré par record_corpus.py
+à la place de syride.com, avec latence et erreurs injectables.
+
+Routes servies (un seul pilote par corpus) :
+    - /feed/<page>.html            : pages du fil d'activités
+    - /pilotes/<pilote>/<trace>    : pages d'activité
+    - /iframes/<trace>.html        : documents de détail (popupIframe)
+    - /downloadZIP/<trace>.zip     : archives des traces
+
+Usage :
+    python standin_server.py --corpus <dossier> [--port 8765]
+        [--latency 0.05] [--jitter 0.02] [--error-rate 0.01]
+"""
+
+# ------------------------ Imports -----------------------
+
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------ Classes -----------------------
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    Serveur de rejeu. Compte les requêtes et octets servis par type
+    de ressource (feed, activity, iframe, zip).
+
+    args:
+    -----------
+    * corpus_dir: str
+        dossier du corpus.
+    * latency: float
+        délai fixe (s) ajouté à chaque réponse.
+    * jitter: float
+        délai aléatoire supplémentaire maximal (s).
+    * error_rate: float
+        probabilité de répondre 503 à une requête.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: tuple,
+        corpus_dir: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        super().__init__(server_address, StandinHandler)
+        self.corpus_dir = corpus_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests = {"feed": 0, "activity": 0, "iframe": 0, "zip": 0}
+            self.bytes = {"feed": 0, "activity": 0, "iframe": 0, "zip": 0}
+            self.errors = 0
+
+    def count(self, kind: str, nb_bytes: int) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+            self.bytes[kind] += nb_bytes
+
+    def count_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    def resolve(self, path: str):
+        """
+        Retourne (type de ressource, fichier du corpus, content-type).
+        """
+        parts = path.split("?")[0].strip("/").split("/")
+        corpus_dir = self.server.corpus_dir
+        if len(parts) == 2 and parts[0] == "feed":
+            return "feed", os.path.join(corpus_dir, "feed", parts[1]), "text/html"
+        if len(parts) == 3 and parts[0] == "pilotes":
+            filename = os.path.join(corpus_dir, "activities", f"{parts[2]}.html")
+            return "activity", filename, "text/html"
+        if len(parts) == 2 and parts[0] == "iframes":
+            return "iframe", os.path.join(corpus_dir, "iframes", parts[1]), "text/html"
+        if len(parts) == 2 and parts[0] == "downloadZIP":
+            filename = os.path.join(corpus_dir, "zips", parts[1])
+            return "zip", filename, "application/zip"
+        return None, None, None
+
+    def do_GET(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+        if random.random() < server.error_rate:
+            server.count_error()
+            self.send_error(503)
+            return
+
+        kind, filename, content_type = self.resolve(self.path)
+        if kind is None:
+            self.send_error(404)
+            return
+        if os.path.exists(filename):
+            with open(filename, "rb") as file:
+                body = file.read()
+        elif kind == "feed":
+            # Au-delà de la dernière page enregistrée : page vide
+            body = b""
+        else:
+            self.send_error(404)
+            return
+
+        server.count(kind, len(body))
+        self.send_response(200)
+        if content_type == "text/html":
+            content_type += "; charset=utf-8"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ------------------------ Functions -----------------------
+
+
+def start_standin_server(
+    corpus_dir: str,
+    port: int = 0,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+) -> StandinServer:
+    """
+    Démarre le serveur dans un thread (port=0 : port libre choisi
+    par le système). Arrêt avec server.shutdown().
+    """
+    server = StandinServer(
+        ("127.0.0.1", port),
+        corpus_dir=corpus_dir,
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serveur local rejouant un corpus syride enregistré."
+    )
+    parser.add_argument("--corpus", required=True, help="Dossier du corpus.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai fixe (s).")
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Délai aléatoire (s)."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Proportion de réponses 503."
+    )
+    args = parser.parse_args()
+
+    server = StandinServer(
+        ("127.0.0.1", args.port),
+        corpus_dir=args.corpus,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    print(f"Corpus {args.corpus} servi sur {server.root_url}")
+    server.serve_forever()
@@ -0,0 +1,188 @@
+"""
+Index des fichiers de traces d'un pilote (dossier traces/<num_activite>/).
+
+Un seul parcours os.scandir relève, pour chaque dossier de trace, les
+fichiers json, kml et igc avec leur taille et leur date de modification.
+L'index est gardé dans le dossier du pilote (trace_index.json) et
+revalidé par la date de modification des dossiers de traces et de leurs
+sous-dossiers : seuls les dossiers de traces dont l'un a changé depuis
+le dernier parcours sont relus. Les fichiers réécrits sur place sans
+changer de dossier ne sont pas détectés : le scraper écrit le json par
+un fichier temporaire renommé (voir python_functions.save_flight_data)
+et marque le dossier après l'extraction d'une archive (touch_folder).
+"""
+
+# ------------------------ Imports -----------------------
+
+import json
+import os
+
+# ------------------------ Constants -----------------------
+
+INDEX_FILENAME = "trace_index.json"
+INDEX_VERSION = 2
+EXTENSIONS = (".json", ".kml", ".igc")
+
+# ------------------------ Functions -----------------------
+
+
+def scan_folder(path: str, prefix: str = "", dirs: dict = None) -> dict:
+    """
+    Fichiers d'un dossier de trace (sous-dossiers compris) dont le nom
+    est un numéro : {chemin relatif: [taille, mtime_ns]}. Les dates de
+    modification des sous-dossiers sont ajoutées à dirs ({chemin
+    relatif: mtime_ns}).
+    """
+    files = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                relative_dir = prefix + entry.name
+                if dirs is not None:
+                    dirs[relative_dir] = entry.stat().st_mtime_ns
+                files.update(scan_folder(entry.path, relative_dir + "/", dirs))
+                continue
+            stem, extension = os.path.splitext(entry.name)
+            if extension in EXTENSIONS and stem.isdigit():
+                stat = entry.stat()
+                files[prefix + entry.name] = [stat.st_size, stat.st_mtime_ns]
+    return files
+
+
+def scan_trace_folder(path: str, mtime: int) -> dict:
+    dirs = {}
+    files = scan_folder(path, dirs=dirs)
+    return {"mtime": mtime, "dirs": dirs, "files": files}
+
+
+def is_unchanged(path: str, entry: dict, mtime: int) -> bool:
+    """
+    Vrai si le dossier de trace et ses sous-dossiers ont la date de
+    modification de l'index.
+    """
+    if entry is None or entry["mtime"] != mtime:
+        return False
+    for relative_dir, dir_mtime in entry["dirs"].items():
+        try:
+            if os.stat(os.path.join(path, relative_dir)).st_mtime_ns != dir_mtime:
+                return False
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def touch_folder(directory: str, name: str) -> None:
+    """
+    Marque le dossier de trace name comme modifié (date de modification
+    à maintenant), pour qu'il soit relu au prochain chargement de
+    l'index : à appeler après une écriture sur place (extraction d'une
+    archive par-dessus des fichiers existants).
+    """
+    os.utime(os.path.join(directory, "traces", name))
+
+
+def read_index(index_path: str) -> dict:
+    try:
+        with open(index_path, "r", encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def write_index(index_path: str, index: dict) -> None:
+    try:
+        with open(index_path + ".tmp", "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+        os.replace(index_path + ".tmp", index_path)
+    except OSError:
+        # Dossier en lecture seule : l'index reste en mémoire
+        pass
+
+
+def load_trace_index(directory: str, refresh: bool = False) -> dict:
+    """
+    Index des dossiers de traces d'un pilote.
+
+    args:
+    -----------
+    * directory: str
+        dossier du pilote (contenant traces/).
+    * refresh: bool
+        ignorer l'index enregistré et tout relire.
+
+    returns:
+    -----------
+    * folders: dict
+        {dossier: {"mtime": mtime_ns, "dirs": {sous-dossier: mtime_ns},
+        "files": {chemin relatif: [taille, mtime_ns]}}} ; vide si le
+        dossier traces/ n'existe pas.
+    """
+    traces_dir = os.path.join(directory, "traces")
+    index_path = os.path.join(directory, INDEX_FILENAME)
+    try:
+        traces_mtime = os.stat(traces_dir).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    cached = None if refresh else read_index(index_path)
+    cached_folders = cached["folders"] if cached is not None else {}
+    changed = cached is None or cached["mtime"] != traces_mtime
+    if changed:
+        with os.scandir(traces_dir) as entries:
+            folder_names = [entry.name for entry in entries if entry.is_dir()]
+    else:
+        folder_names = list(cached_folders)
+
+    folders = {}
+    for name in folder_names:
+        path = os.path.join(traces_dir, name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            changed = True
+            continue
+        entry = cached_folders.get(name)
+        if not is_unchanged(path=path, entry=entry, mtime=mtime):
+            entry = scan_trace_folder(path=path, mtime=mtime)
+            changed = True
+        folders[name] = entry
+
+    if changed:
+        write_index(
+            index_path,
+            {"version": INDEX_VERSION, "mtime": traces_mtime, "folders": folders},
+        )
+    return folders
+
+
+def select_files(directory: str, folders: dict, extension: str) -> dict:
+    """
+    Fichiers d'une extension donnée (".json", ".kml", ".igc") dans un
+    index (voir load_trace_index).
+
+    returns:
+    -----------
+    * files: dict
+        {numéro de trace: [chemin, taille, mtime_ns]}.
+    """
+    traces_dir = os.path.join(directory, "traces")
+    files = {}
+    for name, entry in folders.items():
+        for relative_path, (size, mtime) in entry["files"].items():
+            stem, file_extension = os.path.splitext(os.path.basename(relative_path))
+            if file_extension == extension:
+                path = os.path.join(traces_dir, name, relative_path)
+                files[stem] = [path, size, mtime]
+    return files
+
+
+def get_trace_files(directory: str, extension: str, refresh: bool = False) -> dict:
+    """
+    Fichiers d'une extension donnée dans les dossiers de traces d'un
+    pilote (voir select_files).
+    """
+    folders = load_trace_index(directory, refresh=refresh)
+    return select_files(directory=directory, folders=folders, extension=extension)